@@ -1,8 +1,13 @@
 import cv2
-import mediapipe as mp
 import math
-import collections
 import time
+import sys
+
+from filters import make_filter
+from frame_sources import open_source
+from gestures import classify, push_velocity
+from hand_worker import BackgroundHands
+from profiler import StartupTimer
 
 # --------------------
 # Configurações (ajuste à vontade)
@@ -12,47 +17,19 @@ TABLE_MARGIN_Y = 80      # margem vertical (px)
 BALL_RADIUS = 30         # raio da bola (px)
 FRICTION = 0.995        # fricção por frame (1 = sem fricção)
 RESTITUTION = 0.90      # perda de energia ao ricochetear (0..1)
-HISTORY_LEN = 5         # quantos pontos usar para estimar movimento do dedo
+FINGER_FILTER = "one_euro"  # suavização e velocidade do dedo (filters.py)
 PUSH_BASE_SPEED = 10.0  # velocidade base ao empurrar (px por frame)
 PUSH_SPEED_MULT = 1.6   # multiplica a média de movimento do dedo
 TOUCH_COOLDOWN = 0.15   # segundos entre empurrões consecutivos
 
-# --------------------
-# Funções auxiliares
-# --------------------
-def distance(a, b):
-    return math.hypot(a.x - b.x, a.y - b.y)
-
-def is_pointing(hand_landmarks):
-    """Retorna True se apenas o indicador estiver levantado."""
-    index_tip = hand_landmarks.landmark[8]
-    index_pip = hand_landmarks.landmark[6]
-
-    middle_tip = hand_landmarks.landmark[12]
-    middle_pip = hand_landmarks.landmark[10]
-
-    ring_tip = hand_landmarks.landmark[16]
-    ring_pip = hand_landmarks.landmark[14]
-
-    pinky_tip = hand_landmarks.landmark[20]
-    pinky_pip = hand_landmarks.landmark[18]
-
-    index_up = index_tip.y < index_pip.y
-    middle_down = middle_tip.y > middle_pip.y
-    ring_down = ring_tip.y > ring_pip.y
-    pinky_down = pinky_tip.y > pinky_pip.y
-
-    return index_up and middle_down and ring_down and pinky_down
-
 # --------------------
 # Inicialização
 # --------------------
-mp_hands = mp.solutions.hands
-mp_drawing = mp.solutions.drawing_utils
+startup = StartupTimer()   # até o primeiro frame e a primeira mão
 
-cap = cv2.VideoCapture(0)
+cap = open_source(sys.argv[1] if len(sys.argv) > 1 else 0)  # webcam, vídeo, pasta ou "synthetic"
 
-index_history = collections.deque(maxlen=HISTORY_LEN)  # guarda (x_px, y_px, t)
+finger = make_filter(FINGER_FILTER)  # posição filtrada e velocidade (px/s)
 last_push_time = 0.0
 
 # pos/vel da bola (serão inicializadas quando soubermos w,h)
@@ -61,12 +38,13 @@ ball_y = None
 ball_vx = 0.0
 ball_vy = 0.0
 
-with mp_hands.Hands(max_num_hands=1,
-                    min_detection_confidence=0.6,
-                    min_tracking_confidence=0.6) as hands:
+# MediaPipe carrega e aquece numa thread: a câmera aparece já (process dá None até lá)
+with BackgroundHands(max_num_hands=1,
+                     min_detection_confidence=0.6,
+                     min_tracking_confidence=0.6) as hands:
 
     while True:
-        ret, frame = cap.read()
+        ret, frame, frame_time = cap.read()
         if not ret:
             break
 
@@ -91,7 +69,9 @@ with mp_hands.Hands(max_num_hands=1,
         pointing = False
         avg_ix = avg_iy = None
 
-        if results.multi_hand_landmarks:
+        if results is not None and results.multi_hand_landmarks:
+            startup.detection()
+            mp_drawing, mp_hands = hands.solutions.drawing_utils, hands.solutions.hands
             for hand_landmarks in results.multi_hand_landmarks:
                 mp_drawing.draw_landmarks(frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
 
@@ -99,62 +79,35 @@ with mp_hands.Hands(max_num_hands=1,
                 index_tip = hand_landmarks.landmark[8]
                 ix = int(index_tip.x * w)
                 iy = int(index_tip.y * h)
-                now = time.time()
+                now = frame_time  # instante da captura, não do processamento
 
-                # atualiza histórico do dedo
-                index_history.append((ix, iy, now))
+                # filtra a posição do dedo para suavizar ruído
+                fx, fy = finger.update(ix, iy, now)
                 index_found = True
-
-                # média do histórico para suavizar ruído
-                sumx = sum(p[0] for p in index_history)
-                sumy = sum(p[1] for p in index_history)
-                avg_ix = int(round(sumx / len(index_history)))
-                avg_iy = int(round(sumy / len(index_history)))
+                avg_ix = int(round(fx))
+                avg_iy = int(round(fy))
 
                 # desenho do indicador suavizado
                 cv2.circle(frame, (avg_ix, avg_iy), 8, (0, 255, 0), -1)
 
                 # detectar gesto (apenas indicador levantado)
-                pointing = is_pointing(hand_landmarks)
+                pointing = classify(hand_landmarks)["index_up"]
 
                 # se está apontando e tocando a bola -> empurrar (com cooldown)
-                if pointing:
-                    # distância entre dedo (médio suavizado) e centro da bola
-                    dist = math.hypot(avg_ix - ball_x, avg_iy - ball_y)
-                    if dist <= BALL_RADIUS + 12:  # margem de toque
-                        if now - last_push_time > TOUCH_COOLDOWN:
-                            # direção do empurrão: do dedo para o centro da bola (bola sai para fora do dedo)
-                            dx = ball_x - avg_ix
-                            dy = ball_y - avg_iy
-                            norm = math.hypot(dx, dy)
-                            if norm == 0:
-                                # fallback aleatório
-                                push_dir_x, push_dir_y = 1.0, 0.0
-                            else:
-                                push_dir_x = dx / norm
-                                push_dir_y = dy / norm
-
-                            # estimativa do movimento médio do dedo em px/quadros
-                            if len(index_history) >= 2:
-                                oldest = index_history[0]
-                                newest = index_history[-1]
-                                frames = max(1, len(index_history) - 1)
-                                avg_move = math.hypot(newest[0] - oldest[0], newest[1] - oldest[1]) / frames
-                            else:
-                                avg_move = 0.0
-
-                            # velocidade resultante = base + movimento do dedo * multiplicador
-                            speed = PUSH_BASE_SPEED + avg_move * PUSH_SPEED_MULT
-
-                            # aplica velocidade (px por frame)
-                            ball_vx = push_dir_x * speed
-                            ball_vy = push_dir_y * speed
-
-                            last_push_time = now
+                # direção: do dedo para o centro da bola; força: base + velocidade do dedo
+                if pointing and now - last_push_time > TOUCH_COOLDOWN:
+                    push = push_velocity(avg_ix, avg_iy, ball_x, ball_y, finger.speed,
+                                         BALL_RADIUS + 12,  # margem de toque
+                                         PUSH_BASE_SPEED, PUSH_SPEED_MULT,
+                                         fallback=(1.0, 0.0))  # dedo no centro da bola
+                    if push is not None:
+                        # aplica velocidade (px por frame)
+                        ball_vx, ball_vy = push
+                        last_push_time = now
 
         else:
             # se não detectou dedo, limpar histórico (evita usar valores antigos)
-            index_history.clear()
+            finger.reset()
 
         # --------------------
         # Atualiza física da bola
@@ -195,6 +148,8 @@ with mp_hands.Hands(max_num_hands=1,
 
         # HUD simples
         status = "Pointing" if pointing else "No pointing"
+        if not hands.ready:
+            status = "carregando o modelo das maos..."
         cv2.putText(frame, f"{status}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (255, 255, 255), 2)
 
         # desenha uma linha guia do dedo até a bola (opcional, ajuda a ver direção)
@@ -202,9 +157,11 @@ with mp_hands.Hands(max_num_hands=1,
             cv2.line(frame, (avg_ix, avg_iy), (int(ball_x), int(ball_y)), (180, 180, 180), 1)
 
         cv2.imshow("Mesa de Bilhar (gestos)", frame)
+        startup.frame()
 
         if cv2.waitKey(1) & 0xFF == ord("q"):
             break
 
+print(startup.report(hands.load_time))
 cap.release()
 cv2.destroyAllWindows()
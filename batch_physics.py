@@ -0,0 +1,512 @@
+import copy
+import math
+
+import numpy as np
+
+from physics import (BALL_RADIUS, FRICTION, RESTITUTION, COL_RESTITUTION,
+                     POCKET_RADIUS, STOP_SPEED, CONTACT_SLOP, MAX_TOI_ITERS, SLEEP_TICKS)
+
+
+# --------------------
+# K mesas de uma vez (arrays K x N)
+# --------------------
+class BatchTable:
+    """
+    K mesas independentes com N bolas cada: x, y, vx, vy, alive e is_white
+    são arrays (K, N) e step avança todas as mesas na mesma chamada, com as
+    mesmas contas de BallTable.move (atrito, corte de velocidade, tabelas,
+    caçapas).
+
+    Cada subpasso só mexe nas bolas em movimento (juntadas de todas as
+    mesas num vetor só): uma bola parada não anda, não cai e não começa um
+    contato sozinha. Os contatos de cada bola em movimento com as outras
+    bolas da sua mesa são resolvidos todos juntos (cada bola soma a
+    correção de todos os seus pares), em vez da passada sequencial de
+    BallTable.collide: com um contato por bola — o caso comum — dá o mesmo
+    resultado; em batidas simultâneas (quebra do rack) é uma aproximação.
+    Sem CCD: use substeps para que nenhuma bola ande mais que um raio por
+    subpasso. Para o mesmo resultado de BallTable, use ExactBatchTable.
+    """
+
+    _arrays = ("x", "y", "vx", "vy", "alive", "is_white")
+
+    def __init__(self, k, n, radius=BALL_RADIUS, friction=FRICTION, restitution=RESTITUTION,
+                 col_restitution=COL_RESTITUTION, pocket_radius=POCKET_RADIUS,
+                 stop_speed=STOP_SPEED, pocket_on_move=True):
+        self.radius = radius
+        self.friction = friction
+        self.restitution = restitution
+        self.col_restitution = col_restitution
+        self.pocket_radius = pocket_radius
+        self.stop_speed = stop_speed
+        self.pocket_on_move = pocket_on_move
+
+        self.x = np.zeros((k, n))
+        self.y = np.zeros((k, n))
+        self.vx = np.zeros((k, n))
+        self.vy = np.zeros((k, n))
+        self.alive = np.zeros((k, n), dtype=bool)
+        self.is_white = np.zeros((k, n), dtype=bool)
+
+    @classmethod
+    def from_table(cls, table, k):
+        """K cópias de uma BallTable (mesmos parâmetros de física)."""
+        batch = cls(k, len(table), table.radius, table.friction, table.restitution,
+                    table.col_restitution, table.pocket_radius, table.stop_speed,
+                    table.pocket_on_move)
+        batch.x[:] = table.x
+        batch.y[:] = table.y
+        batch.vx[:] = table.vx
+        batch.vy[:] = table.vy
+        batch.alive[:] = table.alive
+        batch.is_white[:] = table.is_white
+        return batch
+
+    def take(self, rows):
+        """Novo lote (mesma classe e parâmetros) só com as mesas rows (índices ou máscara)."""
+        batch = copy.copy(self)
+        for name in self._arrays:
+            setattr(batch, name, getattr(self, name)[rows])
+        return batch
+
+    def __len__(self):
+        return len(self.x)
+
+    def moving(self):
+        """(K,) True nas mesas com alguma bola viva em movimento."""
+        return (self.alive & ((self.vx != 0.0) | (self.vy != 0.0))).any(axis=1)
+
+    # --------------------
+    # Passo
+    # --------------------
+    def step(self, left, top, right, bottom, pockets, substeps=1, tables=None):
+        """
+        Um tick em todas as mesas (ou só nas marcadas na máscara tables, (K,)):
+        movimento -> colisões -> caçapas, por subpasso.
+        """
+        frac = 1.0 / substeps
+        for _ in range(substeps):
+            moving = self.alive & ((self.vx != 0.0) | (self.vy != 0.0))
+            if tables is not None:
+                moving &= tables[:, None]
+            flat = np.flatnonzero(moving)
+            if not len(flat):
+                return
+            self.move(left, top, right, bottom, pockets, frac, flat)
+            self.collide(flat)
+            self.check_pockets(pockets, flat)
+
+    def _flat(self, flat):
+        if flat is None:
+            flat = np.flatnonzero(self.alive)
+        return flat
+
+    def move(self, left, top, right, bottom, pockets, frac=1.0, flat=None):
+        """flat: índices (no array achatado K*N) das bolas a mover; padrão, as vivas."""
+        flat = self._flat(flat)
+        xs, ys = self.x.reshape(-1), self.y.reshape(-1)
+        vxs, vys = self.vx.reshape(-1), self.vy.reshape(-1)
+        r = self.radius
+
+        vx, vy = vxs[flat], vys[flat]
+        x = xs[flat] + vx * frac
+        y = ys[flat] + vy * frac
+        friction = self.friction ** frac
+        vx *= friction
+        vy *= friction
+        vx[np.abs(vx) < self.stop_speed] = 0.0
+        vy[np.abs(vy) < self.stop_speed] = 0.0
+
+        hit = x - r < left
+        x[hit] = left + r
+        vx[hit] = np.abs(vx[hit]) * self.restitution
+        hit = x + r > right
+        x[hit] = right - r
+        vx[hit] = -np.abs(vx[hit]) * self.restitution
+        hit = y - r < top
+        y[hit] = top + r
+        vy[hit] = np.abs(vy[hit]) * self.restitution
+        hit = y + r > bottom
+        y[hit] = bottom - r
+        vy[hit] = -np.abs(vy[hit]) * self.restitution
+
+        xs[flat], ys[flat] = x, y
+        vxs[flat], vys[flat] = vx, vy
+        if self.pocket_on_move:
+            inside = self._in_pocket(x, y, pockets) & ~self.is_white.reshape(-1)[flat]
+            self.alive.reshape(-1)[flat[inside]] = False
+
+    def collide(self, flat=None):
+        """Contatos das bolas flat com as outras bolas vivas da mesma mesa."""
+        flat = self._flat(flat)
+        n = self.x.shape[1]
+        t, i = np.divmod(flat, n)
+        mv = np.zeros(self.alive.shape, dtype=bool)
+        mv.reshape(-1)[flat] = True
+
+        # (M, N): cada bola em movimento contra todas da sua mesa
+        dx = self.x[t] - self.x[t, i][:, None]
+        dy = self.y[t] - self.y[t, i][:, None]
+        d2 = dx * dx + dy * dy
+        min_dist = 2 * self.radius
+        hit = (d2 < min_dist * min_dist) & (d2 > 0) & self.alive[t]
+        hit &= ~mv[t] | (i[:, None] < np.arange(n))     # par com as duas andando: uma vez só
+        if not hit.any():
+            return
+        m, j = np.nonzero(hit)
+        t, i = t[m], i[m]
+        a, b = np.minimum(i, j), np.maximum(i, j)
+        sign = np.where(i < j, 1.0, -1.0)               # normal de a para b
+        d = np.sqrt(d2[m, j])
+        nx = dx[m, j] * sign / d
+        ny = dy[m, j] * sign / d
+        half = (min_dist - d) / 2
+
+        # mesma resposta de BallTable._resolve_pair, com as velocidades do início do passo
+        vx, vy = self.vx, self.vy
+        v1n = vx[t, a] * nx + vy[t, a] * ny
+        v1t = -vx[t, a] * ny + vy[t, a] * nx
+        v2n = vx[t, b] * nx + vy[t, b] * ny
+        v2t = -vx[t, b] * ny + vy[t, b] * nx
+        c = self.col_restitution
+        dvx_a = (v2n * nx - v1t * ny) * c - vx[t, a]
+        dvy_a = (v2n * ny + v1t * nx) * c - vy[t, a]
+        dvx_b = (v1n * nx - v2t * ny) * c - vx[t, b]
+        dvy_b = (v1n * ny + v2t * nx) * c - vy[t, b]
+
+        np.add.at(self.x, (t, a), -nx * half)
+        np.add.at(self.y, (t, a), -ny * half)
+        np.add.at(self.x, (t, b), nx * half)
+        np.add.at(self.y, (t, b), ny * half)
+        np.add.at(vx, (t, a), dvx_a)
+        np.add.at(vy, (t, a), dvy_a)
+        np.add.at(vx, (t, b), dvx_b)
+        np.add.at(vy, (t, b), dvy_b)
+
+    def check_pockets(self, pockets, flat=None):
+        """Tira as bolas flat (padrão: todas as vivas) que estão numa caçapa."""
+        flat = self._flat(flat)
+        inside = self._in_pocket(self.x.reshape(-1)[flat], self.y.reshape(-1)[flat], pockets)
+        self.alive.reshape(-1)[flat[inside]] = False
+
+    def _in_pocket(self, x, y, pockets):
+        inside = np.zeros(x.shape, dtype=bool)
+        r2 = self.pocket_radius ** 2
+        for px, py in pockets:
+            inside |= (x - px) ** 2 + (y - py) ** 2 < r2
+        return inside
+
+
+# --------------------
+# Lote com as mesmas contas e a mesma ordem de BallTable
+# --------------------
+class ExactBatchTable(BatchTable):
+    """
+    K mesas com o mesmo resultado de K BallTable (mesmo CCD, bolas dormindo
+    e colisões na ordem (i, j) de BallTable.collide): serve para reproduzir
+    partidas gravadas e conferir o resultado com o do jogo.
+
+    Tudo que é por bola é vetorizado em (K, N); o que é sequencial numa
+    mesa (a passada de colisões) anda par a par, com cada par resolvido em
+    todas as mesas de uma vez. Só entram na passada as mesas com algum par
+    encostado no início dela (sem isso nenhuma resposta acontece). O tempo
+    de impacto do CCD é por mesa, então cada mesa avança a sua fração.
+    """
+
+    _arrays = BatchTable._arrays + ("asleep", "still")
+
+    def __init__(self, k, n, radius=BALL_RADIUS, friction=FRICTION, restitution=RESTITUTION,
+                 col_restitution=COL_RESTITUTION, pocket_radius=POCKET_RADIUS,
+                 stop_speed=STOP_SPEED, pocket_on_move=True, ccd=True,
+                 sleep_ticks=SLEEP_TICKS):
+        super().__init__(k, n, radius, friction, restitution, col_restitution,
+                         pocket_radius, stop_speed, pocket_on_move)
+        self.ccd = ccd
+        self.sleep_ticks = sleep_ticks
+        self.asleep = np.zeros((k, n), dtype=bool)
+        self.still = np.zeros((k, n), dtype=np.int64)
+        self._pair_i, self._pair_j = np.triu_indices(n, k=1)
+
+    @classmethod
+    def from_table(cls, table, k):
+        batch = super().from_table(table, k)
+        batch.ccd = table.ccd
+        batch.sleep_ticks = table.sleep_ticks
+        batch.asleep[:] = table.asleep
+        batch.still[:] = table.still
+        return batch
+
+    @property
+    def awake(self):
+        return self.alive & ~self.asleep
+
+    def _tables(self, tables):
+        return np.ones(len(self.x), dtype=bool) if tables is None else tables
+
+    # --------------------
+    # Passo (BallTable.step por mesa)
+    # --------------------
+    def step(self, left, top, right, bottom, pockets, substeps=1, tables=None):
+        tables = self._tables(tables)
+        self._wake_moved(tables)
+        tables = tables & self.awake.any(axis=1)
+        if not tables.any():
+            return
+        frac = 1.0 / substeps
+        for _ in range(substeps):
+            self._advance(left, top, right, bottom, pockets, frac, tables)
+            self.check_pockets(pockets, tables)
+        self._update_sleep(tables)
+
+    def _wake_moved(self, tables):
+        moved = self.asleep & ((self.vx != 0.0) | (self.vy != 0.0)) & tables[:, None]
+        self.asleep &= ~moved
+        self.still[moved] = 0
+
+    def _update_sleep(self, tables):
+        if self.sleep_ticks <= 0:
+            return
+        rest = self.awake & (self.vx == 0.0) & (self.vy == 0.0)
+        self.still = np.where(rest, self.still + 1, np.where(tables[:, None], 0, self.still))
+        self.asleep |= rest & tables[:, None] & (self.still >= self.sleep_ticks)
+
+    def _advance(self, left, top, right, bottom, pockets, frac, tables):
+        remaining = np.where(tables, frac, 0.0)
+        if self.ccd:
+            pending = tables.copy()
+            for _ in range(MAX_TOI_ITERS):
+                t = self.time_of_impact(remaining, pending)
+                pending &= ~np.isnan(t)
+                if not pending.any():
+                    break
+                t = np.where(pending, t, 0.0)
+                self.move(left, top, right, bottom, pockets, t, pending)
+                self.collide(pending)
+                remaining = remaining - t
+        self.move(left, top, right, bottom, pockets, remaining, tables)
+        self.collide(tables)
+
+    def time_of_impact(self, frac, tables):
+        """(K,) menor fração de impacto de cada mesa, como em BallTable; nan se não há."""
+        out = np.full(len(self.x), np.nan)
+        r = self.radius
+        fast = self.awake & tables[:, None] & (np.hypot(self.vx, self.vy) * frac[:, None] > r)
+        rows = np.flatnonzero(fast.any(axis=1))
+        if not len(rows):
+            return out
+        x, y, vx, vy = self.x[rows], self.y[rows], self.vx[rows], self.vy[rows]
+        # [mesa, rápida, outra]
+        px = x[:, None, :] - x[:, :, None]
+        py = y[:, None, :] - y[:, :, None]
+        rvx = vx[:, None, :] - vx[:, :, None]
+        rvy = vy[:, None, :] - vy[:, :, None]
+        contact = 2 * r - CONTACT_SLOP
+        a = rvx * rvx + rvy * rvy
+        b = 2 * (px * rvx + py * rvy)
+        c = px * px + py * py - contact * contact
+        disc = b * b - 4 * a * c
+        ok = (fast[rows][:, :, None] & self.alive[rows][:, None, :]
+              & (a > 0) & (b < 0) & (c > 0) & (disc >= 0))
+        t = np.full(ok.shape, np.inf)
+        t[ok] = (-b[ok] - np.sqrt(disc[ok])) / (2 * a[ok])
+        t[t >= frac[rows][:, None, None]] = np.inf
+        t = t.min(axis=(1, 2))
+        out[rows] = np.where(np.isfinite(t), t, np.nan)
+        return out
+
+    def move(self, left, top, right, bottom, pockets, frac, tables=None):
+        """BallTable.move com a fração frac[k] de cada mesa."""
+        m = self.awake & self._tables(tables)[:, None]
+        r = self.radius
+        x, y, vx, vy = self.x, self.y, self.vx, self.vy
+        frac = np.asarray(frac, dtype=float).reshape(-1, 1)
+
+        np.add(x, vx * frac, out=x, where=m)
+        np.add(y, vy * frac, out=y, where=m)
+        # pow do Python, como em BallTable (o de numpy difere no último bit às vezes)
+        values, inverse = np.unique(frac, return_inverse=True)
+        friction = np.array([self.friction ** v for v in values.tolist()])[inverse].reshape(-1, 1)
+        np.multiply(vx, friction, out=vx, where=m)
+        np.multiply(vy, friction, out=vy, where=m)
+        vx[m & (np.abs(vx) < self.stop_speed)] = 0.0
+        vy[m & (np.abs(vy) < self.stop_speed)] = 0.0
+
+        hit = m & (x - r < left)
+        x[hit] = left + r
+        vx[hit] = np.abs(vx[hit]) * self.restitution
+        hit = m & (x + r > right)
+        x[hit] = right - r
+        vx[hit] = -np.abs(vx[hit]) * self.restitution
+        hit = m & (y - r < top)
+        y[hit] = top + r
+        vy[hit] = np.abs(vy[hit]) * self.restitution
+        hit = m & (y + r > bottom)
+        y[hit] = bottom - r
+        vy[hit] = -np.abs(vy[hit]) * self.restitution
+
+        if self.pocket_on_move:
+            self.alive &= ~(~self.is_white & self._pocketed(pockets, m))
+
+    def collide(self, tables=None):
+        """
+        Passada de BallTable.collide em cada mesa: pares candidatos do
+        broadphase (distância < 2 diâmetros no início), em ordem (i, j),
+        cada um vendo as posições já corrigidas pelos anteriores.
+        """
+        m = self.awake & self._tables(tables)[:, None]
+        t, i = np.divmod(np.flatnonzero(m), m.shape[1])
+        if not len(t):
+            return
+        # só há resposta numa mesa se uma bola acordada já encosta em outra
+        dx = self.x[t] - self.x[t, i][:, None]
+        dy = self.y[t] - self.y[t, i][:, None]
+        dist = np.hypot(dx, dy)
+        touching = self.alive[t] & (dist > 0) & (dist < 2 * self.radius * (1 + 1e-9))
+        rows = np.unique(t[touching.any(axis=1)])
+        if not len(rows):
+            return
+
+        pi, pj = self._pair_i, self._pair_j
+        x, y, alive = self.x[rows], self.y[rows], self.alive[rows]
+        xi, xj = x[:, pi], x[:, pj]
+        dx = xj - xi
+        dy = y[:, pj] - y[:, pi]
+        reach = 4 * self.radius
+        # mesmo teste de sweep_and_prune
+        cand = (alive[:, pi] & alive[:, pj]
+                & (np.maximum(xi, xj) < np.minimum(xi, xj) + reach)
+                & (np.abs(dy) < reach) & (dx * dx + dy * dy < reach * reach))
+        for p in np.flatnonzero(cand.any(axis=0)):
+            self._resolve_pair(rows[cand[:, p]], pi[p], pj[p])
+
+    def _resolve_pair(self, rows, i, j):
+        """BallTable._resolve_pair(i, j) nas mesas rows."""
+        x, y, vx, vy = self.x, self.y, self.vx, self.vy
+        rows = rows[~(self.asleep[rows, i] & self.asleep[rows, j])]
+        dx = x[rows, j] - x[rows, i]
+        dy = y[rows, j] - y[rows, i]
+        min_dist = 2 * self.radius
+        # np.hypot e math.hypot (o de BallTable) podem diferir no último bit:
+        # filtra com folga e mede as poucas que sobram com math.hypot
+        near = np.flatnonzero(np.hypot(dx, dy) < min_dist * (1 + 1e-9))
+        dist = np.array([math.hypot(a, b) for a, b in zip(dx[near].tolist(), dy[near].tolist())])
+        sel = (dist > 0) & (dist < min_dist)
+        if not sel.any():
+            return
+        near = near[sel]
+        rows, dx, dy, dist = rows[near], dx[near], dy[near], dist[sel]
+
+        nx = dx / dist
+        ny = dy / dist
+        overlap = (min_dist - dist)
+        sleepy = rows[self.asleep[rows, i] | self.asleep[rows, j]]
+        self.asleep[sleepy, i] = self.asleep[sleepy, j] = False
+        self.still[sleepy, i] = self.still[sleepy, j] = 0
+        x[rows, i] -= nx * overlap / 2
+        y[rows, i] -= ny * overlap / 2
+        x[rows, j] += nx * overlap / 2
+        y[rows, j] += ny * overlap / 2
+
+        tx = -ny
+        ty = nx
+        v1n = vx[rows, i] * nx + vy[rows, i] * ny
+        v1t = vx[rows, i] * tx + vy[rows, i] * ty
+        v2n = vx[rows, j] * nx + vy[rows, j] * ny
+        v2t = vx[rows, j] * tx + vy[rows, j] * ty
+        v1n, v2n = v2n, v1n
+
+        c = self.col_restitution
+        vx[rows, i] = (v1n * nx + v1t * tx) * c
+        vy[rows, i] = (v1n * ny + v1t * ty) * c
+        vx[rows, j] = (v2n * nx + v2t * tx) * c
+        vy[rows, j] = (v2n * ny + v2t * ty) * c
+
+    def check_pockets(self, pockets, tables=None):
+        self.alive &= ~self._pocketed(pockets, self.awake & self._tables(tables)[:, None])
+
+    def _pocketed(self, pockets, m):
+        """Bolas de m sobre uma caçapa; as outras (paradas) não saem do lugar."""
+        out = np.zeros(m.shape, dtype=bool)
+        if not len(pockets):
+            return out
+        flat = np.flatnonzero(m)
+        p = np.asarray(pockets, dtype=float)
+        xs, ys = self.x.reshape(-1)[flat], self.y.reshape(-1)[flat]
+        d = np.hypot(xs[:, None] - p[:, 0], ys[:, None] - p[:, 1])
+        out.reshape(-1)[flat] = (d < self.pocket_radius).any(axis=1)
+        return out
+
+
+# --------------------
+# Partidas em lote ("playing" / "gameover" por mesa)
+# --------------------
+STATES = ("playing", "gameover")
+PLAYING, GAMEOVER = 0, 1
+
+
+class BatchGame:
+    """
+    K partidas com a regra de fim do loop de billiards_with_buttons.py: a
+    mesa passa de "playing" para "gameover" quando a branca cai ou não sobra
+    bola colorida, e ganha quem termina com a branca na mesa. Mesa em
+    gameover não anda mais (como na tela de game over).
+
+    Por mesa: state (índice em STATES), won, ticks jogados, shots, bolas
+    coloridas encaçapadas e pocket_tick (K, N), o tick em que cada bola
+    caiu (-1 se está na mesa). O fim é testado a cada tick, como no jogo
+    (que para de andar a física no tick em que a partida acaba).
+    """
+
+    def __init__(self, tables, bounds, pockets, substeps=1):
+        self.tables = tables
+        self.bounds = tuple(bounds)
+        self.pockets = [(float(px), float(py)) for px, py in pockets]
+        self.substeps = substeps
+        k = len(tables)
+        self.state = np.full(k, PLAYING, dtype=np.int8)
+        self.won = np.zeros(k, dtype=bool)
+        self.ticks = np.zeros(k, dtype=np.int64)
+        self.shots = np.zeros(k, dtype=np.int64)
+        self.pocketed = np.zeros(k, dtype=np.int64)
+        self.pocket_tick = np.full(tables.x.shape, -1, dtype=np.int64)
+        self._white = np.argmax(tables.is_white, axis=1)
+
+    def __len__(self):
+        return len(self.state)
+
+    @property
+    def playing(self):
+        return self.state == PLAYING
+
+    def state_names(self):
+        return [STATES[s] for s in self.state.tolist()]
+
+    def shoot(self, rows, vx, vy):
+        """Empurrão (px/tick) na branca das mesas rows que ainda estão jogando."""
+        rows = np.asarray(rows, dtype=np.intp)
+        vx = np.broadcast_to(np.asarray(vx, dtype=float), rows.shape)
+        vy = np.broadcast_to(np.asarray(vy, dtype=float), rows.shape)
+        keep = self.playing[rows]
+        rows, vx, vy = rows[keep], vx[keep], vy[keep]
+        self.tables.vx[rows, self._white[rows]] = vx
+        self.tables.vy[rows, self._white[rows]] = vy
+        np.add.at(self.shots, rows, 1)
+
+    def step(self, tables=None):
+        """Um tick nas mesas jogando (e em tables, se dado); devolve a máscara das que acabaram."""
+        active = self.playing if tables is None else self.playing & tables
+        t = self.tables
+        before = t.alive.copy()
+        t.step(*self.bounds, self.pockets, self.substeps, active)
+        self.ticks[active] += 1
+
+        fell = before & ~t.alive
+        if fell.any():
+            self.pocket_tick = np.where(fell, self.ticks[:, None], self.pocket_tick)
+            self.pocketed += (fell & ~t.is_white).sum(axis=1)
+        white = (t.alive & t.is_white).any(axis=1)
+        colors = (t.alive & ~t.is_white).any(axis=1)
+        over = active & ~(white & colors)
+        self.state[over] = GAMEOVER
+        self.won[over] = white[over]
+        return over
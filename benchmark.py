@@ -0,0 +1,410 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from broadphase import all_pairs
+from frame_sources import POINTING_HAND
+from gestures import classify, classify_batch
+from hand_tracker import HandTracker
+from hand_worker import LandmarkList
+from physics import BallTable, BALL_RADIUS, SLEEP_TICKS
+from render_layers import BallSprites
+from shot_ai import AI_CHUNK, candidate_shots, evaluate_shots, table_state
+from shot_preview import simulate_shot
+
+# --------------------
+# Mesa de teste (sem câmera)
+# --------------------
+def random_table(n, seed=0):
+    """
+    Mesa "party table" com n bolas: metade em rack compacto (paradas) e
+    metade espalhada com velocidade aleatória. A mesa cresce com n para
+    manter a densidade parecida com a do jogo.
+    """
+    rng = np.random.default_rng(seed)
+    side = max(600.0, (n ** 0.5) * BALL_RADIUS * 6)
+    left, top, right, bottom = 0.0, 0.0, side * 1.6, side
+    table = BallTable()
+
+    spacing = BALL_RADIUS * 2 + 2
+    per_row = max(1, int((n // 2) ** 0.5))
+    for k in range(n // 2):
+        table.add_ball(left + 40 + (k % per_row) * spacing,
+                       top + 40 + (k // per_row) * spacing,
+                       (255, 255, 255), is_white=(k == 0))
+    for _ in range(n - n // 2):
+        i = table.add_ball(rng.uniform(left + 20, right - 20), rng.uniform(top + 20, bottom - 20),
+                           (200, 30, 30))
+        table.vx[i], table.vy[i] = rng.uniform(-6, 6, 2)
+    return table, (left, top, right, bottom)
+
+
+# --------------------
+# Broadphase x loop de todos os pares
+# --------------------
+def bench_broadphase(counts=(16, 100, 1000, 3000), steps=20):
+    """Pares testados por passo e tempo de colisão: broadphase x loop (i, j) original."""
+    rows = []
+    for n in counts:
+        table, bounds = random_table(n)
+        pockets = []
+        candidates = 0
+        t0 = time.perf_counter()
+        for _ in range(steps):
+            table.move(*bounds, pockets)
+            pairs = table.candidate_pairs()
+            candidates += len(pairs)
+            for i, j in pairs:
+                table._resolve_pair(i, j)
+        t_broad = (time.perf_counter() - t0) / steps
+
+        # loop original: todos os pares, todo frame (poucos passos, é lento)
+        table, bounds = random_table(n)
+        ai, aj = all_pairs(len(table))
+        legacy_steps = max(1, min(steps, 20000 // max(1, len(ai))))
+        t0 = time.perf_counter()
+        for _ in range(legacy_steps):
+            table.move(*bounds, pockets)
+            for i, j in zip(ai.tolist(), aj.tolist()):
+                table._resolve_pair(i, j)
+        t_all = (time.perf_counter() - t0) / legacy_steps
+
+        rows.append({
+            "balls": n,
+            "pairs_all": len(ai),
+            "pairs_broadphase": candidates / steps,
+            "ms_all": t_all * 1000,
+            "ms_broadphase": t_broad * 1000,
+        })
+    return rows
+
+
+# --------------------
+# Mesa parada: bolas dormindo x sem dormir
+# --------------------
+def bench_idle(counts=(16, 100, 1000), steps=200):
+    """Tempo de um step (2 subpassos) com todas as bolas paradas, com e sem sleep."""
+    rows = []
+    for n in counts:
+        row = {"balls": n}
+        for name, sleep_ticks in (("awake", 0), ("sleeping", SLEEP_TICKS)):
+            table, bounds = random_table(n)
+            table.sleep_ticks = sleep_ticks
+            table.vx[:] = 0.0
+            table.vy[:] = 0.0
+            for _ in range(sleep_ticks + 1):
+                table.step(*bounds, [], substeps=2)
+            t0 = time.perf_counter()
+            for _ in range(steps):
+                table.step(*bounds, [], substeps=2)
+            row["us_" + name] = (time.perf_counter() - t0) / steps * 1e6
+        rows.append(row)
+    return rows
+
+
+# --------------------
+# Custo por mão rastreada
+# --------------------
+def bench_hands(counts=(1, 2, 4), frames=2000, width=1280, height=720):
+    """
+    Tempo por frame de HandTracker.observe + update (associação, previsão,
+    filtro e gestos) com n mãos sintéticas andando em círculos separados.
+    """
+    rows = []
+    for n in counts:
+        tracker = HandTracker(n)
+        hand = np.zeros((21, 3), dtype=np.float32)
+        hand[:, :2] = POINTING_HAND * (0.2 * height / width, 0.2)
+        centers = np.linspace(0.2, 0.8, n)
+        hands = np.repeat(hand[None], n, axis=0)
+        base = hands.copy()
+        t0 = time.perf_counter()
+        for k in range(frames):
+            t = k / 30.0
+            hands[:, :, 0] = base[:, :, 0] + centers[:, None] + 0.05 * np.cos(t)
+            hands[:, :, 1] = base[:, :, 1] + 0.5 + 0.05 * np.sin(t)
+            tracker.observe(t, hands)
+            tracker.update(t, width, height)
+        elapsed = (time.perf_counter() - t0) / frames
+        rows.append({"hands": n, "us_frame": elapsed * 1e6, "us_hand": elapsed * 1e6 / n,
+                     "tracked": int(tracker.visible.sum())})
+    return rows
+
+
+# --------------------
+# Desenho das bolas: cv2.circle x sprites
+# --------------------
+def bench_ball_drawing(counts=(16, 100, 1000), frames=50, width=1920, height=1080):
+    """
+    Tempo para desenhar n bolas num frame: loop de cv2.circle (sem e com
+    LINE_AA) x sprites pré-desenhados (render_layers.BallSprites).
+    """
+    rows = []
+    for n in counts:
+        table, (left, top, right, bottom) = random_table(n)
+        xs = table.x * (width - 40) / right + 20
+        ys = table.y * (height - 40) / bottom + 20
+        frame = np.full((height, width, 3), 40, dtype=np.uint8)
+        sprites = BallSprites()
+
+        def circles(line_type):
+            for i in range(len(table)):
+                if table.alive[i]:
+                    color = tuple(int(c) for c in table.color[i])
+                    cv2.circle(frame, (int(xs[i]), int(ys[i])), table.radius, color, -1, line_type)
+
+        row = {"balls": n}
+        for name, draw in (("circle", lambda: circles(cv2.LINE_8)),
+                           ("circle_aa", lambda: circles(cv2.LINE_AA)),
+                           ("sprites", lambda: sprites.draw(frame, xs, ys, table.color,
+                                                            table.radius, table.alive))):
+            draw()
+            t0 = time.perf_counter()
+            for _ in range(frames):
+                draw()
+            row["us_" + name] = (time.perf_counter() - t0) / frames * 1e6
+        rows.append(row)
+    return rows
+
+
+# --------------------
+# Suíte de regressão (resultados em JSON, comparáveis entre revisões)
+# --------------------
+BALL_COUNTS = (16, 100, 1000)
+RESOLUTIONS = ((640, 480), (1280, 720), (1920, 1080))
+HAND_BATCHES = (1, 4, 256)
+REGRESSION_TOLERANCE = 0.25   # mais de 25% mais lento que a base conta como regressão
+
+
+def measure(fn, repeat=7, min_time=0.02):
+    """Mediana do tempo por chamada (s): cada repetição roda fn o bastante para durar min_time."""
+    number = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        if time.perf_counter() - t0 >= min_time or number >= 1 << 20:
+            break
+        number *= 2
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        times.append((time.perf_counter() - t0) / number)
+    return float(np.median(times))
+
+
+def _far_pockets(bounds):
+    # caçapas fora da mesa: o teste roda inteiro mas nenhuma bola cai
+    left, top, right, bottom = bounds
+    return [(left - 100, top - 100), (right + 100, top - 100),
+            (left - 100, bottom + 100), (right + 100, bottom + 100)]
+
+
+def _case_physics(name, n):
+    table, bounds = random_table(n)
+    pockets = _far_pockets(bounds)
+    if name == "physics.move":
+        return lambda: table.move(*bounds, pockets)
+    if name == "physics.collide":
+        return table.collide
+    if name == "physics.pockets":
+        return lambda: table.check_pockets(pockets)
+    if name == "physics.step":
+        # volta ao estado inicial a cada chamada: sem isso as bolas param,
+        # dormem e o caso passa a medir a mesa parada
+        fields = ("x", "y", "vx", "vy", "alive", "asleep", "still")
+        start = {f: getattr(table, f).copy() for f in fields}
+
+        def step():
+            for f in fields:
+                np.copyto(getattr(table, f), start[f])
+            table.step(*bounds, pockets, substeps=2)
+        return step
+    raise KeyError(name)
+
+
+def _case_gestures(name, batch):
+    hand = np.zeros((21, 3), dtype=np.float32)
+    hand[:, :2] = POINTING_HAND * 0.2 + 0.5
+    if name == "gestures.classify":
+        landmarks = LandmarkList(hand)
+        return lambda: classify(landmarks)
+    hands = np.repeat(hand[None], batch, axis=0)
+    hands[:, :, :2] += np.random.default_rng(0).normal(0, 0.01, (batch, 21, 2))
+    return lambda: classify_batch(hands)
+
+
+def _case_render(name, width, height, n=None):
+    import billiards_with_buttons as game
+    frame = np.full((height, width, 3), 40, dtype=np.uint8)
+    left, top = game.TABLE_MARGIN_X, game.TABLE_MARGIN_Y
+    right, bottom = width - game.TABLE_MARGIN_X, height - game.TABLE_MARGIN_Y
+    if name == "game.reset_balls":
+        return lambda: game.reset_balls(left, top, right, bottom)
+    if name == "preview.simulate_shot":
+        # tacada contra o rack, sem cache (ShotPreview só simula quando a mira muda)
+        table = game.reset_balls(left, top, right, bottom)
+        pockets = [(left, top), ((left + right) // 2, top), (right, top),
+                   (left, bottom), ((left + right) // 2, bottom), (right, bottom)]
+        return lambda: simulate_shot(table, (left, top, right, bottom), pockets, -12.0, 0.3,
+                                     game.SUBSTEPS)
+    if name == "ai.evaluate_shots":
+        # um pedaço da busca do adversário (AI_CHUNK tacadas em lote), no processo atual
+        table = game.reset_balls(left, top, right, bottom)
+        pockets = [(left, top), ((left + right) // 2, top), (right, top),
+                   (left, bottom), ((left + right) // 2, bottom), (right, bottom)]
+        shots = candidate_shots(table, pockets)[:AI_CHUNK]
+        state = table_state(table)
+        return lambda: evaluate_shots(state, (left, top, right, bottom), pockets, shots,
+                                      game.SUBSTEPS)
+    layer = game.build_layer(width, height, "playing")
+    if name == "render.layer":
+        return lambda: layer.blend(frame)
+    table, (_, _, tr, tb) = random_table(n)
+    table.x = left + 20 + table.x * (right - left - 40) / tr
+    table.y = top + 20 + table.y * (bottom - top - 40) / tb
+    table.prev_x, table.prev_y = table.x.copy(), table.y.copy()
+
+    def draw_frame():
+        layer.blend(frame)
+        game.draw_balls(frame, table)
+    return draw_frame
+
+
+def suite_cases():
+    """(nome, parâmetros, fábrica da função medida) de cada caso da suíte."""
+    cases = []
+    for name in ("physics.move", "physics.collide", "physics.pockets", "physics.step"):
+        for n in BALL_COUNTS:
+            cases.append((name, {"balls": n}, lambda name=name, n=n: _case_physics(name, n)))
+    cases.append(("gestures.classify", {"hands": 1},
+                  lambda: _case_gestures("gestures.classify", 1)))
+    for b in HAND_BATCHES:
+        cases.append(("gestures.classify_batch", {"hands": b},
+                      lambda b=b: _case_gestures("gestures.classify_batch", b)))
+    for w, h in RESOLUTIONS:
+        res = f"{w}x{h}"
+        cases.append(("game.reset_balls", {"resolution": res},
+                      lambda w=w, h=h: _case_render("game.reset_balls", w, h)))
+        cases.append(("preview.simulate_shot", {"resolution": res},
+                      lambda w=w, h=h: _case_render("preview.simulate_shot", w, h)))
+        cases.append(("ai.evaluate_shots", {"resolution": res},
+                      lambda w=w, h=h: _case_render("ai.evaluate_shots", w, h)))
+        cases.append(("render.layer", {"resolution": res},
+                      lambda w=w, h=h: _case_render("render.layer", w, h)))
+        for n in BALL_COUNTS:
+            cases.append(("render.frame", {"resolution": res, "balls": n},
+                          lambda w=w, h=h, n=n: _case_render("render.frame", w, h, n)))
+    return cases
+
+
+def case_key(name, params):
+    return name + "".join(f" {k}={v}" for k, v in sorted(params.items()))
+
+
+def run_suite(only=None, repeat=7):
+    """Roda os casos (filtrados por substring em only) e devolve o documento de resultados."""
+    results = []
+    for name, params, make in suite_cases():
+        key = case_key(name, params)
+        if only and not any(o in key for o in only):
+            continue
+        results.append({"name": name, "params": params, "key": key,
+                        "us": measure(make(), repeat) * 1e6})
+    return {"meta": environment(), "results": results}
+
+
+def environment():
+    """Versões e revisão, para saber o que se está comparando."""
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                             text=True, timeout=5, cwd=os.path.dirname(os.path.abspath(__file__)))
+        revision = rev.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        revision = None
+    return {"revision": revision, "python": platform.python_version(),
+            "numpy": np.__version__, "opencv": cv2.__version__,
+            "machine": platform.machine(), "system": platform.system(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+
+def compare(base, current, tolerance=REGRESSION_TOLERANCE):
+    """Linhas (chave, us base, us atual, razão, regrediu) dos casos presentes nos dois."""
+    before = {r["key"]: r["us"] for r in base["results"]}
+    rows = []
+    for r in current["results"]:
+        if r["key"] in before:
+            ratio = r["us"] / before[r["key"]] if before[r["key"]] > 0 else float("inf")
+            rows.append((r["key"], before[r["key"]], r["us"], ratio, ratio > 1.0 + tolerance))
+    return rows
+
+
+def print_reports():
+    """Tabelas comparativas (broadphase, mesa parada, mãos, desenho das bolas)."""
+    print(f"{'bolas':>6} {'pares (todos)':>14} {'pares (broad)':>14} {'ms todos':>10} {'ms broad':>10}")
+    for r in bench_broadphase():
+        print(f"{r['balls']:>6} {r['pairs_all']:>14} {r['pairs_broadphase']:>14.1f} "
+              f"{r['ms_all']:>10.2f} {r['ms_broadphase']:>10.2f}")
+
+    print()
+    print(f"{'bolas':>6} {'us parada':>10} {'us dormindo':>12}")
+    for r in bench_idle():
+        print(f"{r['balls']:>6} {r['us_awake']:>10.1f} {r['us_sleeping']:>12.1f}")
+
+    print()
+    print(f"{'mãos':>6} {'us/frame':>10} {'us/mão':>10}")
+    for r in bench_hands():
+        print(f"{r['hands']:>6} {r['us_frame']:>10.1f} {r['us_hand']:>10.1f}")
+
+    print()
+    print(f"{'bolas':>6} {'us circle':>10} {'us circle AA':>13} {'us sprites':>11}")
+    for r in bench_ball_drawing():
+        print(f"{r['balls']:>6} {r['us_circle']:>10.0f} {r['us_circle_aa']:>13.0f} {r['us_sprites']:>11.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks sem câmera")
+    parser.add_argument("--json", metavar="ARQ", help="grava os resultados da suíte em ARQ")
+    parser.add_argument("--compare", metavar="BASE",
+                        help="compara com resultados gravados antes (sai com 1 se houve regressão)")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE,
+                        help="fração a mais de tempo aceita antes de acusar regressão")
+    parser.add_argument("--only", nargs="+", metavar="TEXTO",
+                        help="só os casos cujo nome/parâmetros contêm algum TEXTO")
+    parser.add_argument("--repeat", type=int, default=7, help="repetições por caso (mediana)")
+    parser.add_argument("--reports", action="store_true",
+                        help="também as tabelas comparativas (broadphase x todos os pares, etc.)")
+    args = parser.parse_args()
+
+    doc = run_suite(args.only, args.repeat)
+    print(f"{'caso':<52} {'us':>12}")
+    for r in doc["results"]:
+        print(f"{r['key']:<52} {r['us']:>12.1f}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(doc, f, indent=1)
+
+    regressed = False
+    if args.compare:
+        with open(args.compare) as f:
+            base = json.load(f)
+        print()
+        print(f"comparado com {base['meta'].get('revision')} (tolerância {args.tolerance:.0%})")
+        print(f"{'caso':<52} {'us base':>10} {'us agora':>10} {'razão':>7}")
+        for key, old, new, ratio, worse in compare(base, doc, args.tolerance):
+            print(f"{key:<52} {old:>10.1f} {new:>10.1f} {ratio:>7.2f}{'  REGRESSÃO' if worse else ''}")
+            regressed |= worse
+
+    if args.reports:
+        print()
+        print_reports()
+    sys.exit(1 if regressed else 0)
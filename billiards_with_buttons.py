@@ -1,11 +1,30 @@
+import argparse
+import asyncio
 import cv2
-import mediapipe as mp
+import numpy as np
 import math
-import collections
 import time
 import random
 import os
 
+from filters import FILTERS
+from frame_sources import open_source, open_sink
+from game_log import GameRecorder
+from gestures import push_aim, push_velocity
+from hand_tracker import HandTracker
+from hand_worker import HandWorker, ROI_SIZE
+from landmark_log import LandmarkRecorder, LogReplayer
+from net_play import NET_PORT, NetClient, NetHost, SharedHands
+from physics import BallTable, SimClock
+from pipeline import END, Pipeline, draw_queues
+from prediction import InferenceScheduler
+from profiler import StageProfiler, StartupTimer
+from render_layers import BallSprites, LayerCache, StaticLayer
+from scripted_input import ScriptedInput, load_script
+from shot_ai import AI_BUDGET, ShotSearch
+from shot_preview import ShotPreview, draw_shot_path
+from snapshot import SnapshotRing, state_arrays
+
 # --------------------
 # Configurações
 # --------------------
@@ -16,7 +35,7 @@ FRICTION = 0.992
 RESTITUTION = 0.90
 COL_RESTITUTION = 0.95
 
-HISTORY_LEN = 7
+FINGER_FILTER = "one_euro"   # "average", "exponential" ou "one_euro" (filters.py)
 POINTING_WINDOW = 6
 POINTING_MIN_TRUE = 4
 NO_DET_GRACE = 0.25
@@ -24,153 +43,38 @@ NO_DET_GRACE = 0.25
 PUSH_BASE_SPEED = 8.0
 PUSH_SPEED_MULT = 1.3
 TOUCH_COOLDOWN = 0.15
+PREVIEW_DIST = 150        # px; dedo apontando mais perto que isso da branca mostra a prévia
 POCKET_RADIUS = 28
 
+SIM_RATE = 30
+SUBSTEPS = 2
+TOUCH_COOLDOWN_TICKS = int(TOUCH_COOLDOWN * SIM_RATE)   # recarga em ticks (determinística)
+REWIND_SECONDS = 5        # quanto o botão VOLTAR volta na partida (0 desliga; ~30 µs/frame)
+
+# cor da ponta do dedo de cada jogador (J1, J2, ...)
+PLAYER_COLORS = [(0, 255, 0), (0, 200, 255), (255, 120, 0), (255, 0, 200)]
+CPU_COLOR = (200, 200, 200)
+
 # --------------------
 # Funções utilitárias
 # --------------------
 def distance_xy(x1, y1, x2, y2):
     return math.hypot(x1 - x2, y1 - y2)
 
-def is_pointing(hand_landmarks):
-    """
-    Retorna True se apenas o indicador estiver levantado.
-    Usa distâncias normalizadas para maior robustez.
-    """
-    lt = hand_landmarks.landmark
-
-    def finger_extended(tip, pip, mcp):
-        return (lt[tip].y < lt[pip].y) and (lt[pip].y < lt[mcp].y)
-
-    # Indicador levantado
-    index_up = finger_extended(8, 6, 5)
-
-    # Outros dedos dobrados
-    middle_down = lt[12].y > lt[10].y
-    ring_down = lt[16].y > lt[14].y
-    pinky_down = lt[20].y > lt[18].y
-
-    return index_up and middle_down and ring_down and pinky_down
-
-
-# --------------------
-# Classe Bola
-# --------------------
-class Ball:
-    def __init__(self, x, y, color, is_white=False):
-        self.x = float(x)
-        self.y = float(y)
-        self.vx = 0.0
-        self.vy = 0.0
-        self.color = color
-        self.is_white = is_white
-        self.alive = True
-
-    def update(self, left, top, right, bottom, pockets):
-        """
-        Atualiza posição, aplica fricção, trata ricochete e checa caçapa.
-        pockets: lista de tuplas (px,py)
-        """
-        if not self.alive:
-            return
-
-        # Atualiza posição com velocidade atual
-        self.x += self.vx
-        self.y += self.vy
-
-        # aplicar atrito
-        self.vx *= FRICTION
-        self.vy *= FRICTION
-
-        # evitar velocidade residual que trava a bola
-        if abs(self.vx) < 0.05:
-            self.vx = 0.0
-        if abs(self.vy) < 0.05:
-            self.vy = 0.0
-
-        # colisão com bordas (ricochete) — reposiciona para evitar "colar"
-        if self.x - BALL_RADIUS < left:
-            self.x = left + BALL_RADIUS
-            self.vx = abs(self.vx) * RESTITUTION
-        if self.x + BALL_RADIUS > right:
-            self.x = right - BALL_RADIUS
-            self.vx = -abs(self.vx) * RESTITUTION
-        if self.y - BALL_RADIUS < top:
-            self.y = top + BALL_RADIUS
-            self.vy = abs(self.vy) * RESTITUTION
-        if self.y + BALL_RADIUS > bottom:
-            self.y = bottom - BALL_RADIUS
-            self.vy = -abs(self.vy) * RESTITUTION
-
-        # verificar se caiu na caçapa (apenas bolas não-brancas desaparecem)
-        for px, py in pockets:
-            if distance_xy(self.x, self.y, px, py) < POCKET_RADIUS:
-                if not self.is_white:
-                    self.alive = False
-                # Se for a branca, não removemos — mantemos em jogo (pode ajustar se preferir)
-                break
-
-    def draw(self, frame):
-        if self.alive:
-            cv2.circle(frame, (int(self.x), int(self.y)), BALL_RADIUS, self.color, -1)
-
-def handle_ball_collision(b1, b2):
-    """
-    Colisão elástica simplificada entre duas bolas (mesma massa).
-    """
-    if not b1.alive or not b2.alive:
-        return
-    dx = b2.x - b1.x
-    dy = b2.y - b1.y
-    dist = math.hypot(dx, dy)
-    if dist <= 0:
-        return
-    min_dist = 2 * BALL_RADIUS
-    if dist < min_dist:
-        nx = dx / dist
-        ny = dy / dist
-        overlap = (min_dist - dist)
-        # separar bolas
-        b1.x -= nx * overlap / 2
-        b1.y -= ny * overlap / 2
-        b2.x += nx * overlap / 2
-        b2.y += ny * overlap / 2
-
-        # vetores tangente/normal
-        tx = -ny
-        ty = nx
-
-        # componentes de velocidade
-        v1n = b1.vx * nx + b1.vy * ny
-        v1t = b1.vx * tx + b1.vy * ty
-        v2n = b2.vx * nx + b2.vy * ny
-        v2t = b2.vx * tx + b2.vy * ty
-
-        # trocam as componentes normais (massas iguais)
-        v1n, v2n = v2n, v1n
-
-        # reconstruir velocidades
-        b1.vx = v1n * nx + v1t * tx
-        b1.vy = v1n * ny + v1t * ty
-        b2.vx = v2n * nx + v2t * tx
-        b2.vy = v2n * ny + v2t * ty
-
-        # pequena perda de energia
-        b1.vx *= COL_RESTITUTION
-        b1.vy *= COL_RESTITUTION
-        b2.vx *= COL_RESTITUTION
-        b2.vy *= COL_RESTITUTION
-
 # --------------------
 # Funções de jogo
 # --------------------
+def new_table():
+    return BallTable(radius=BALL_RADIUS, friction=FRICTION, restitution=RESTITUTION,
+                     col_restitution=COL_RESTITUTION, pocket_radius=POCKET_RADIUS)
+
 def reset_balls(left, top, right, bottom):
-    balls = []
+    balls = new_table()
 
     # Bola branca no centro da mesa
     white_x = (left + right) / 2
     white_y = (top + bottom) / 2
-    balls.append(Ball(white_x, white_y, (255, 255, 255), is_white=True))
+    balls.add_ball(white_x, white_y, (255, 255, 255), is_white=True)
 
     # Cores das 15 bolas
     colors = [
@@ -194,170 +98,765 @@ def reset_balls(left, top, right, bottom):
                 break
             x = start_x - row * spacing
             y = start_y - row * spacing / 2 + col * spacing
-            balls.append(Ball(x, y, colors[k]))
+            balls.add_ball(x, y, colors[k])
             k += 1
 
     return balls
 
-def draw_button(frame, text, center, size=(160, 60)):
-    cx, cy = center
-    w, h = size
-    left, top = cx - w//2, cy - h//2
-    right, bottom = cx + w//2, cy + h//2
-    cv2.rectangle(frame, (left, top), (right, bottom), (50, 50, 200), -1)
-    cv2.putText(frame, text, (left+20, cy+8), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255,255,255), 2)
-    return (left, top, right, bottom)
+BALL_SPRITES = BallSprites()  # bolas com antialiasing, desenhadas uma vez por cor
+
+def draw_balls(frame, balls, alpha=1.0):
+    xs, ys = balls.render_positions(alpha)
+    BALL_SPRITES.draw(frame, xs, ys, balls.color, balls.radius, balls.alive)
+
+def build_layer(w, h, game_state, variant=None, rewind=False):
+    """
+    Parte fixa da tela em cada estado (textos, botões, mesa e caçapas),
+    desenhada uma vez por tamanho de frame e reaproveitada (LayerCache).
+    variant: mensagem do game over ou jogador da vez ("CPU" para o computador).
+    rewind: botão VOLTAR na partida.
+    """
+    layer = StaticLayer(w, h)
+    left, top, right, bottom = TABLE_MARGIN_X, TABLE_MARGIN_Y, w - TABLE_MARGIN_X, h - TABLE_MARGIN_Y
+    cx = (left + right) // 2
+    if game_state == "menu":
+        layer.text("Bilhar com Gestos", (w//2 - 160, 100),
+                   cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255,255,255), 3)
+        layer.button("start", "  START ", (w//2, h//2))
+    elif game_state == "playing":
+        layer.rectangle((left, top), (right, bottom), (30, 120, 30), 6)
+        for px, py in [(left, top), (cx, top), (right, top),
+                       (left, bottom), (cx, bottom), (right, bottom)]:
+            layer.circle((px, py), POCKET_RADIUS, (0, 0, 0), -1)
+        if variant == "CPU":
+            layer.text("Vez: CPU", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, CPU_COLOR, 2)
+        elif variant is not None:
+            layer.text(f"Vez: J{variant + 1}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX,
+                       0.8, PLAYER_COLORS[variant % len(PLAYER_COLORS)], 2)
+        if rewind:
+            layer.button("rewind", "VOLTAR", (w - 110, 32), (140, 40))
+    elif game_state == "gameover":
+        layer.text(variant, (w//2 - 120, 120),
+                   cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255,255,255), 3)
+        layer.button("restart", "RESTART", (w//2, h//2))
+    return layer
 
 def point_in_rect(x, y, rect):
     left, top, right, bottom = rect
     return left <= x <= right and top <= y <= bottom
 
+def pressing(tracker, rect):
+    """Jogador apontando com o dedo dentro do botão (ou None)."""
+    for p in np.flatnonzero(tracker.pointing):
+        if point_in_rect(tracker.tip[p, 0], tracker.tip[p, 1], rect):
+            return p
+    return None
+
+def next_player(tracker, turn):
+    """Próximo jogador em cena depois de turn (ou o mesmo, se está sozinho)."""
+    n = tracker.max_hands
+    for k in range(1, n + 1):
+        p = (turn + k) % n
+        if tracker.active[p]:
+            return p
+    return turn
+
+def draw_net_stats(frame, text):
+    h = frame.shape[0]
+    cv2.putText(frame, text, (10, h - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.45, CPU_COLOR, 1)
+
+def draw_loading(frame):
+    """Aviso enquanto o modelo das mãos carrega (o menu já aparece com a câmera)."""
+    h, w = frame.shape[:2]
+    cv2.putText(frame, "carregando o modelo das maos...", (w // 2 - 170, h - 40),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+
+def sim_arrays(balls, last_push_tick):
+    """Arrays do estado que o rewind volta: mesa e recarga dos empurrões."""
+    arrays = state_arrays(balls=balls)
+    arrays["last_push_tick"] = last_push_tick
+    return arrays
+
+def hand_arrays(tracker):
+    """Arrays das mãos: slots, previsão dos landmarks, filtro do dedo e janela do gesto."""
+    return state_arrays(tracker=tracker, predictor=tracker.predictor, finger=tracker.finger)
+
+def open_input(source, realtime, replay, script, roi, max_hands):
+    """Fonte de frames e worker das mãos: gravação, roteiro ou câmera + MediaPipe."""
+    if replay:
+        # landmarks gravados fazem o papel da câmera e do MediaPipe
+        cap = worker = LogReplayer(replay)
+    elif script:
+        # mão roteirizada (soak test / CI): também dispensa câmera e MediaPipe
+        steps = None if script == "default" else load_script(script)
+        cap = worker = ScriptedInput(steps, realtime=realtime)
+    else:
+        cap = open_source(source, realtime)  # webcam (em thread), vídeo, pasta ou sintética
+        # MediaPipe roda em outro processo; o loop só entrega frames e lê resultados
+        # roi: rastreia a mão num recorte pequeno em vez do frame inteiro
+        worker = HandWorker(
+            roi_size=ROI_SIZE if roi else None,
+            max_num_hands=max_hands,
+            min_detection_confidence=0.6,   # antes 0.7
+            min_tracking_confidence=0.6     # antes 0.7
+        )
+    return cap, worker
+
 # --------------------
-# Main Loop
+# Etapas do jogo
 # --------------------
-mp_hands = mp.solutions.hands
-mp_drawing = mp.solutions.drawing_utils
-cap = cv2.VideoCapture(0)
-
-index_history = collections.deque(maxlen=HISTORY_LEN)
-pointing_hist = collections.deque(maxlen=POINTING_WINDOW)
-last_push_time = 0.0
-last_seen_time = 0.0
+class HandState:
+    """
+    Cópia das mãos de um frame com a parte da interface que o jogo usa
+    (max_hands, active, visible, pointing, tip, speed): a simulação lê o
+    frame N enquanto o rastreador já anda no N + 1. arrays: cópia dos
+    arrays internos do rastreador (hand_arrays) para a foto do rewind.
+    """
 
-game_state = "menu"  # "menu", "playing", "gameover"
-balls = []
+    def __init__(self, hands, arrays=None):
+        self.max_hands = hands.max_hands
+        self.active = hands.active.copy()
+        self.visible = hands.visible.copy()
+        self.pointing = hands.pointing.copy()
+        self.tip = hands.tip.copy()
+        self.speed = hands.speed.copy()
+        self.arrays = {name: a.copy() for name, a in (arrays or {}).items()}
+
+
+class FramePacket:
+    """Um frame passando pelas etapas; cada uma preenche a sua parte."""
+
+    def __init__(self, frame_id, frame, frame_time):
+        self.frame_id = frame_id
+        self.frame = frame
+        self.frame_time = frame_time
+        self.result = None        # (id, instante, mãos, lados) que chegou neste frame
+        self.infer_cost = 0.0     # s no processo do worker
+        self.hands = None         # HandState depois do rastreador
+        self.layer = None         # parte fixa da tela no estado do jogo
+        self.table = None         # mesa (cores e raio) das bolas a desenhar
+        self.balls = None         # (xs, ys, vivas) copiadas, interpoladas
+        self.shot = None          # prévia da tacada
+        self.net_text = None
+
+    def pass_result(self, newer):
+        """
+        Descartado numa fila (drop_oldest): o resultado do worker que este
+        pacote trazia já saiu do worker e só existe aqui, então segue no
+        próximo a sair da fila, se ele não trouxer um mais novo.
+        """
+        if self.result is not None and newer.result is None:
+            newer.result, newer.infer_cost = self.result, self.infer_cost
 
-with mp_hands.Hands(
-    max_num_hands=1,
-    min_detection_confidence=0.6,   # antes 0.7
-    min_tracking_confidence=0.6     # antes 0.7
-) as hands:
 
+class Game:
+    """
+    O jogo em etapas, ligadas por filas limitadas (pipeline.py):
+
+      capture     lê e espelha o frame
+      inference   manda o frame ao worker das mãos e pega o resultado que chegou
+      gesture     rastreador (slots, dedo filtrado, gesto) e mãos do outro quiosque
+      simulation  menu/partida/fim: empurrões, CPU, física, VOLTAR, prévia, rede
+      render      dedos, camada fixa, prévia, bolas e HUD sobre o frame
+      sink        arquivo e/ou janela (tecla q encerra)
+
+    Cada etapa só mexe no próprio estado; o que uma passa para a outra vai
+    no FramePacket (mãos e posições das bolas copiadas), então etapas em
+    threads diferentes nunca dividem um array que ainda está mudando.
+    """
 
-    while True:
-        ret, frame = cap.read()
+    def __init__(self, *, source=0, realtime=False, record=None, replay=None,
+                 headless=False, output=None, script=None, max_frames=None, roi=True,
+                 infer_every=None, finger_filter=FINGER_FILTER, players=1,
+                 profile=False, trace=None, preview=True, ai=False, log_games=None,
+                 rewind=REWIND_SECONDS, dump_state=None, host=None):
+        self.cap, self.worker = open_input(source, realtime, replay, script, roi, players)
+        self.record = record
+        self.recorder = None
+        self.headless = headless
+        self.max_frames = max_frames
+        self.profile = profile
+        self.trace = trace
+        self.dump_state = dump_state
+        self.rewind_seconds = rewind
+        self.sink_out = open_sink(output, SIM_RATE) if output else None
+        # tacadas e resultado de cada partida, para reproduzir em lote (game_log.py)
+        self.games_log = GameRecorder(log_games) if log_games else None
+        self.game_ticks = 0          # ticks de física da partida atual
+        self.games_started = 0
+        self.started_at = time.perf_counter()
+        # até o primeiro frame na tela e a primeira mão (o modelo carrega em paralelo)
+        self.startup = StartupTimer(self.started_at)
+
+        # uma linha por jogador (mão): ponta do dedo filtrada, velocidade (px/s), gesto
+        self.tracker = HandTracker(players, "pointing", finger_filter,
+                                   POINTING_WINDOW, POINTING_MIN_TRUE, NO_DET_GRACE)
+        # outro quiosque (--host): joga como mais um jogador, numa linha depois das mãos locais
+        self.net = None
+        self.hand_view = self.tracker
+        if host is not None:
+            self.net = NetHost(host, slot=players).start()
+            self.hand_view = SharedHands(self.tracker, self.net.remote)
+            print(f"esperando o outro quiosque na porta {self.net.port} (--join este-ip:{self.net.port})")
+        # clock.ticks do último empurrão de cada jogador
+        self.last_push_tick = np.zeros(self.hand_view.max_hands, dtype=np.int64)
+        self.turn = 0                # jogador da vez (com mais de um jogador em cena)
+        self.cpu = players if ai else None   # vez do computador: um índice depois dos jogadores
+        self.human = 0               # último jogador humano que tacou (volta a ele depois da CPU)
+        self.shot_pending = False    # tacada dada, esperando as bolas pararem para passar a vez
+        self.game_shots = 0          # tacadas da partida atual (as do log depois de um rewind saem)
+        self.clock = SimClock(SIM_RATE)
+        self.frame_id = 0
+        # pela entrada de fato (com --script/--replay a source fica no padrão, a webcam 0):
+        # gravação e roteiro (a mão sai da própria leitura) e vídeo/pasta/sintética sem
+        # pacing andam passo a passo: cada frame espera sua inferência, então a mesma
+        # entrada sempre dá o mesmo jogo
+        recorded = bool(script or replay)
+        camera = not recorded and str(source).isdigit()
+        self.lockstep = recorded or not (realtime or camera)
+        # câmera (ou vídeo no ritmo dele) com MediaPipe: uma etapa atrasada descarta o
+        # frame mais velho e o jogo segue com o mais novo; o passo-a-passo espera
+        self.paced = not self.lockstep
+
+        # inferência a cada N frames (N pelo custo medido; fixo em 1 no passo-a-passo);
+        # entre resultados, os landmarks são extrapolados para o instante de cada frame
+        if infer_every is None:
+            infer_every = 1 if self.lockstep else 0
+        self.scheduler = InferenceScheduler(infer_every)
+        self.layers = LayerCache(build_layer)     # parte fixa da tela, por tamanho e estado
+        self.shot_preview = ShotPreview() if preview else None
+        # tempo por etapa (HUD com profile, eventos gravados com trace)
+        self.prof = StageProfiler(enabled=profile or trace is not None, trace=trace is not None)
+        self.queues = []             # filas entre as etapas (Pipeline.queues), para o HUD
+        # adversário (só com --ai): tacadas simuladas num pool de processos, com prazo
+        # (sem prazo com entrada gravada/roteirizada, para o jogo ser o mesmo em toda
+        # execução); os processos sobem em segundo plano enquanto o menu roda
+        self.search = None
+        if ai:
+            self.search = ShotSearch(budget=None if self.lockstep else AI_BUDGET)
+            self.search.warm_up()
+        self.cpu_shots = 0
+        # uma foto do estado por tick de partida (mesa, vez, recargas, mãos e filtros),
+        # num anel pré-alocado: o botão VOLTAR restaura a de rewind segundos atrás
+        self.snaps = SnapshotRing(rewind * SIM_RATE + 1) if rewind > 0 else None
+        self.rewind_held = False     # VOLTAR só de novo depois de soltar o botão
+        self.key = -1                # última tecla (etapa sink)
+
+        self.game_state = "menu"  # "menu", "playing", "gameover"
+        self.balls = new_table()
+        self.color_slot = 0          # cor do primeiro jogador (o outro quiosque usa a do slot dele)
+
+    # --------------------
+    # Entrada
+    # --------------------
+    def capture(self):
+        if self.max_frames is not None and self.frame_id >= self.max_frames:
+            return END
+        ret, frame, frame_time = self.cap.read()
         if not ret:
-            break
-
+            return END
+        self.prof.mark("read")
+        self.frame_id += 1
         frame = cv2.flip(frame, 1)
-        h, w, _ = frame.shape
-
+        self.prof.mark("flip")
+        return FramePacket(self.frame_id, frame, frame_time)
+
+    def inference(self, pkt):
+        # envia o frame se é a vez dele e há buffer livre (senão o worker está ocupado)
+        worker = self.worker
+        if self.scheduler.due(pkt.frame_time, worker.cost):
+            rgb_buf = worker.acquire(pkt.frame.shape)
+            if rgb_buf is not None:
+                cv2.cvtColor(pkt.frame, cv2.COLOR_BGR2RGB, dst=rgb_buf)
+                worker.submit(pkt.frame_id, pkt.frame_time)
+                self.scheduler.submitted()
+        self.prof.mark("cvtColor")
+        pkt.result = worker.poll(wait=self.lockstep)
+        if pkt.result is not None:
+            pkt.infer_cost = worker.last_cost
+        self.prof.mark("poll")
+        return pkt
+
+    def gesture(self, pkt):
+        h, w = pkt.frame.shape[:2]
+        if pkt.result is not None:
+            if pkt.infer_cost:
+                self.prof.add("hands.process", pkt.infer_cost)   # no processo do worker
+            _, result_time, hands, sides = pkt.result
+            if self.record:
+                if self.recorder is None:
+                    self.recorder = LandmarkRecorder(self.record, w, h)
+                self.recorder.write(result_time, hands)
+            self.tracker.observe(result_time, hands, sides)
+            if hands is not None:
+                self.startup.detection()
+
+        # ponta do indicador de cada mão em todo frame, mesmo sem resultado novo (prevista)
+        self.tracker.update(pkt.frame_time, w, h)
+        if self.net is not None:
+            self.net.set_screen(w, h)
+            self.hand_view.refresh(self.net.connected)
+        pkt.hands = HandState(self.hand_view,
+                              hand_arrays(self.tracker) if self.snaps is not None else None)
+        self.prof.mark("tracker")
+        return pkt
+
+    # --------------------
+    # Simulação
+    # --------------------
+    def new_game(self, presser, bounds, pockets):
+        """Mesa nova; quem apertou o botão começa."""
+        self.balls = reset_balls(*bounds)
+        self.game_state = "playing"
+        self.games_started += 1
+        self.turn, self.shot_pending = presser, False
+        self.human = presser
+        self.game_ticks = self.game_shots = 0
+        if self.games_log is not None:
+            self.games_log.begin(self.balls, bounds, pockets, SUBSTEPS)
+        if self.snaps is not None:
+            self.snaps.clear()
+        if self.net is not None:
+            self.net.send_rack(self.balls, bounds, pockets, SUBSTEPS)
+        if self.search is not None:
+            self.search.cancel()
+
+    def shoot(self, push):
+        wi = self.balls.white
+        self.balls.vx[wi], self.balls.vy[wi] = push
+        if self.games_log is not None:
+            self.games_log.shot(self.game_ticks, *push)
+        self.game_shots += 1
+        self.shot_pending = True
+
+    def simulation(self, pkt):
+        h, w = pkt.frame.shape[:2]
+        hands = pkt.hands
         left, top, right, bottom = TABLE_MARGIN_X, TABLE_MARGIN_Y, w - TABLE_MARGIN_X, h - TABLE_MARGIN_Y
+        bounds = (left, top, right, bottom)
         cx = (left + right) // 2
-
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = hands.process(rgb)
-
-        pointing = False
-        avg_ix = avg_iy = None
-        now = time.time()
-
-        if results.multi_hand_landmarks:
-            for hand_landmarks in results.multi_hand_landmarks:
-                index_tip = hand_landmarks.landmark[8]
-                ix = int(index_tip.x * w)
-                iy = int(index_tip.y * h)
-                index_history.append((ix, iy, now))
-                avg_ix = int(sum(p[0] for p in index_history) / len(index_history))
-                avg_iy = int(sum(p[1] for p in index_history) / len(index_history))
-                cv2.circle(frame, (avg_ix, avg_iy), 8, (0, 255, 0), -1)
-
-                pointing_now = is_pointing(hand_landmarks)
-                pointing_hist.append(pointing_now)
-                last_seen_time = now
-                pointing = sum(1 for v in pointing_hist if v) >= POINTING_MIN_TRUE
-        else:
-            if now - last_seen_time > NO_DET_GRACE:
-                index_history.clear()
-                pointing_hist.clear()
+        pockets = [(left, top), (cx, top), (right, top),
+                   (left, bottom), (cx, bottom), (right, bottom)]
+        clock = self.clock
+        ticks = clock.advance(pkt.frame_time)  # instante da captura, não do processamento
+        # tacada do outro quiosque (vale só na vez dele e fora do intervalo
+        # entre toques; a que não for usada neste frame é recusada)
+        remote_push = self.net.take_push() if self.net is not None else None
 
         # --------------------
         # MENU
         # --------------------
-        if game_state == "menu":
-            cv2.putText(frame, "Bilhar com Gestos", (w//2 - 160, 100),
-                        cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255,255,255), 3)
-            btn_rect = draw_button(frame, "  START ", (w//2, h//2))
-            if pointing and avg_ix and point_in_rect(avg_ix, avg_iy, btn_rect):
-                balls = reset_balls(left, top, right, bottom)
-                game_state = "playing"
-
-        # --------------------          
+        if self.game_state == "menu":
+            pkt.layer = self.layers.get(w, h, "menu")
+            presser = pressing(hands, pkt.layer.rects["start"])
+            if presser is not None:
+                self.new_game(presser, bounds, pockets)
+
+        # --------------------
         # PLAYING
         # --------------------
-        elif game_state == "playing":
-            # Atualizar e desenhar mesa
-            cv2.rectangle(frame, (left, top), (right, bottom), (30, 120, 30), 6)
-            pockets = [(left, top), (cx, top), (right, top),
-                       (left, bottom), (cx, bottom), (right, bottom)]
-            for px, py in pockets:
-                cv2.circle(frame, (px, py), POCKET_RADIUS, (0, 0, 0), -1)
-
-            # Empurrar bola branca
-            if pointing and avg_ix:
-                white_ball = [b for b in balls if b.is_white][0]
-                dist = distance_xy(avg_ix, avg_iy, white_ball.x, white_ball.y)
-                if dist <= BALL_RADIUS + 12 and now - last_push_time > TOUCH_COOLDOWN:
-                    dx = white_ball.x - avg_ix
-                    dy = white_ball.y - avg_iy
-                    norm = math.hypot(dx, dy)
-                    if norm != 0:
-                        push_dir_x = dx / norm
-                        push_dir_y = dy / norm
-                        if len(index_history) >= 2:
-                            oldest = index_history[0]
-                            newest = index_history[-1]
-                            frames = max(1, len(index_history)-1)
-                            avg_move = math.hypot(newest[0]-oldest[0], newest[1]-oldest[1]) / frames
-                        else:
-                            avg_move = 0
-                        speed = PUSH_BASE_SPEED + avg_move * PUSH_SPEED_MULT
-                        white_ball.vx = push_dir_x * speed
-                        white_ball.vy = push_dir_y * speed
-                        last_push_time = now
-
-            # Atualiza bolas (agora passando pockets)
-            for b in balls:
-                b.update(left, top, right, bottom, pockets)
-
-            # Colisões
-            for i in range(len(balls)):
-                for j in range(i+1, len(balls)):
-                    handle_ball_collision(balls[i], balls[j])
-
-            # Caçapas (já tratado em update; mantemos checagem para lógica adicional)
-            for b in balls:
-                if not b.alive: continue
-                for px, py in pockets:
-                    if distance_xy(b.x, b.y, px, py) < POCKET_RADIUS:
-                        b.alive = False
+        elif self.game_state == "playing":
+            balls, cpu, search = self.balls, self.cpu, self.search
+            # Empurrar bola branca: só o jogador da vez (qualquer um, se ele saiu de cena)
+            # (ninguém na vez do computador)
+            shooters = [] if self.turn == cpu else [
+                p for p in np.flatnonzero(hands.pointing)
+                if p == self.turn or not (self.shot_pending or hands.active[self.turn])]
+            for p in shooters:
+                if clock.ticks - self.last_push_tick[p] <= TOUCH_COOLDOWN_TICKS:
+                    continue
+                wi = balls.white
+                if self.net is not None and p == self.net.slot:
+                    push = remote_push     # o outro quiosque detecta (e prevê) a própria tacada
+                else:
+                    push = push_velocity(hands.tip[p, 0], hands.tip[p, 1],
+                                         balls.x[wi], balls.y[wi], hands.speed[p],
+                                         BALL_RADIUS + 12, PUSH_BASE_SPEED, PUSH_SPEED_MULT)
+                if push is not None:
+                    self.shoot(push)
+                    self.last_push_tick[p] = clock.ticks
+                    self.turn = self.human = p
+                    if push is remote_push:
+                        self.net.ack_push()
+
+            # Vez do computador: a busca roda nos processos do pool e a etapa só
+            # consulta; a tacada sai quando ela termina ou o prazo acaba
+            if (self.turn == cpu and not self.shot_pending and balls.white_alive()
+                    and not balls.any_moving()):
+                if not search.running:
+                    search.start(balls, bounds, pockets, SUBSTEPS)
+                push = search.poll(wait=search.budget is None)
+                if push is not None:
+                    self.shoot(push)
+                    self.cpu_shots += 1
+            self.prof.mark("ai")
+
+            # Física em passo fixo: quantos ticks couberem no tempo desde o último frame;
+            # para no tick em que a partida acaba (como o replay em lote, game_log.py)
+            for k in range(ticks):
+                if self.snaps is not None:
+                    self.save_snapshot(hands, clock.ticks - ticks + k)
+                balls.step(left, top, right, bottom, pockets, substeps=SUBSTEPS)
+                self.game_ticks += 1
+                if not balls.white_alive() or not balls.any_color_alive():
+                    break
+
+            # bolas paradas depois da tacada: vez do próximo jogador em cena
+            # (com a CPU: humano, CPU, humano, ...)
+            if self.shot_pending and not balls.any_moving():
+                self.shot_pending = False
+                if cpu is None:
+                    self.turn = next_player(hands, self.turn)
+                elif self.turn == cpu:
+                    self.turn = next_player(hands, self.human)
+                else:
+                    self.turn = cpu
+            self.prof.mark("physics")
+
+            # Mesa, caçapas e jogador da vez (camada pronta)
+            if self.turn == cpu:
+                variant = "CPU"
+            else:
+                variant = self.turn if hands.max_hands > 1 or cpu is not None else None
+            pkt.layer = self.layers.get(w, h, "playing", variant, self.snaps is not None)
+
+            if self.snaps is not None:
+                self.rewind(pkt)
+                self.prof.mark("snapshot")
+
+            # Prévia da tacada: dedo apontando perto da branca com a mesa parada
+            if self.shot_preview is not None and balls.white_alive() and not balls.any_moving():
+                wi = balls.white
+                for p in shooters:
+                    if distance_xy(hands.tip[p, 0], hands.tip[p, 1],
+                                   balls.x[wi], balls.y[wi]) > PREVIEW_DIST:
+                        continue
+                    aim = push_aim(hands.tip[p, 0], hands.tip[p, 1], balls.x[wi], balls.y[wi],
+                                   hands.speed[p], PUSH_BASE_SPEED, PUSH_SPEED_MULT)
+                    if aim is not None:
+                        pkt.shot = self.shot_preview.update(balls, bounds, pockets,
+                                                            aim[0], aim[1], SUBSTEPS)
                         break
+            self.prof.mark("preview")
 
-            # Desenhar bolas
-            for b in balls:
-                b.draw(frame)
+            # Bolas a desenhar (interpoladas entre os dois últimos ticks), copiadas
+            xs, ys = balls.render_positions(clock.alpha)
+            pkt.table, pkt.balls = balls, (xs, ys, balls.alive.copy())
 
             # Condição de fim de jogo
-            white_alive = any(b.is_white and b.alive for b in balls)
-            any_color_alive = any((not b.is_white) and b.alive for b in balls)
-            if not white_alive or not any_color_alive:
-                game_state = "gameover"
+            if not balls.white_alive() or not balls.any_color_alive():
+                self.game_state = "gameover"
+                if self.games_log is not None:
+                    self.games_log.end(balls, "gameover", self.game_ticks)
 
         # --------------------
         # GAME OVER
         # --------------------
-        elif game_state == "gameover":
-            msg = "VOCE GANHOU!" if any(b.is_white and b.alive for b in balls) else "VOCE PERDEU!"
-            cv2.putText(frame, msg, (w//2 - 120, 120),
-                        cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255,255,255), 3)
-            btn_rect = draw_button(frame, "RESTART", (w//2, h//2))
-            if pointing and avg_ix and point_in_rect(avg_ix, avg_iy, btn_rect):
-                balls = reset_balls(left, top, right, bottom)
-                game_state = "playing"
-
-        cv2.imshow("Bilhar com Gestos", frame)
-        if cv2.waitKey(1) & 0xFF == ord("q"):
-            break
-
-cap.release()
-cv2.destroyAllWindows()
+        elif self.game_state == "gameover":
+            msg = "VOCE GANHOU!" if self.balls.white_alive() else "VOCE PERDEU!"
+            pkt.layer = self.layers.get(w, h, "gameover", msg)
+            presser = pressing(hands, pkt.layer.rects["restart"])
+            if presser is not None:
+                self.new_game(presser, bounds, pockets)
+        self.prof.mark("state")   # botões, fim de jogo e bolas a desenhar
+
+        net = self.net
+        if net is not None:
+            # uma foto por frame, só com as bolas que mudaram (tick do relógio: sempre cresce)
+            playing = self.game_state == "playing"
+            net.publish(self.balls, clock.ticks, self.game_state, self.turn if playing else None,
+                        self.balls.white_alive())
+            if net.connected:
+                up, down = net.stats.rates()
+                pkt.net_text = f"rede: envia {up / 1000:.1f} kB/s, recebe {down / 1000:.1f} kB/s"
+            self.prof.mark("net")
+        return pkt
+
+    def save_snapshot(self, hands, clock_tick):
+        """Foto do estado antes de simular o tick game_ticks (clock_tick no relógio)."""
+        self.snaps.save(self.game_ticks, sim_arrays(self.balls, self.last_push_tick) | hands.arrays,
+                        {"turn": self.turn, "human": self.human, "shot_pending": self.shot_pending,
+                         "game_shots": self.game_shots, "clock_ticks": clock_tick})
+
+    def rewind(self, pkt):
+        """
+        VOLTAR (botão, uma vez por toque, ou tecla r): restaura a mesa, a vez e
+        as recargas da foto de rewind segundos de partida atrás; mãos e
+        relógio seguem a entrada. O relógio não volta (a rede e o intervalo
+        entre toques contam nele), então as recargas restauradas andam junto:
+        a cada jogador sobra o mesmo intervalo que sobrava na foto.
+        """
+        snaps, clock = self.snaps, self.clock
+        pressed = (pressing(pkt.hands, pkt.layer.rects["rewind"]) is not None
+                   or self.key == ord("r"))
+        if pressed and not self.rewind_held and len(snaps):
+            back = snaps.find(self.game_ticks - self.rewind_seconds * SIM_RATE)
+            state = snaps.rewind(back, sim_arrays(self.balls, self.last_push_tick))
+            self.last_push_tick += clock.ticks - state["clock_ticks"]
+            self.turn, self.human = state["turn"], state["human"]
+            self.shot_pending, self.game_shots = state["shot_pending"], state["game_shots"]
+            self.game_ticks = state["tick"]
+            if self.games_log is not None:
+                self.games_log.rewind(self.game_shots)
+            if self.search is not None:
+                self.search.cancel()
+        self.rewind_held = pressed
+
+    # --------------------
+    # Saída
+    # --------------------
+    def render(self, pkt):
+        frame, hands = pkt.frame, pkt.hands
+        for p in np.flatnonzero(hands.visible):
+            tip = (int(hands.tip[p, 0]), int(hands.tip[p, 1]))
+            color = PLAYER_COLORS[(p + self.color_slot) % len(PLAYER_COLORS)]
+            cv2.circle(frame, tip, 8, color, -1)
+            if hands.max_hands > 1:
+                cv2.putText(frame, f"J{p + 1}", (tip[0] + 10, tip[1] - 10),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+        pkt.layer.blend(frame)
+        if pkt.balls is not None:
+            draw_shot_path(frame, pkt.shot, pkt.table)
+            xs, ys, alive = pkt.balls
+            BALL_SPRITES.draw(frame, xs, ys, pkt.table.color, pkt.table.radius, alive)
+        if not self.worker.ready:
+            draw_loading(frame)
+        if pkt.net_text is not None:
+            draw_net_stats(frame, pkt.net_text)
+        self.prof.mark("draw")
+        if self.profile:
+            self.prof.draw_hud(frame)
+            draw_queues(frame, self.queues)
+            self.prof.mark("hud")
+        return pkt
+
+    def sink(self, pkt):
+        if self.sink_out is not None:
+            self.sink_out.write(pkt.frame)
+            self.prof.mark("output")
+        if not self.headless:
+            cv2.imshow("Bilhar com Gestos", pkt.frame)
+            self.key = cv2.waitKey(1) & 0xFF
+            self.prof.mark("imshow")
+            if self.key == ord("q"):
+                return END
+        self.startup.frame()
+        return pkt
+
+    def stop_capture(self):
+        # no laço, antes de esperar a thread da captura: a câmera em thread
+        # pode estar parada num read (as outras fontes nunca esperam)
+        stop = getattr(self.cap, "stop", None)
+        if stop is not None:
+            stop()
+
+    def close_window(self):
+        # na thread que abriu a janela
+        if not self.headless:
+            cv2.destroyAllWindows()
+
+    def close(self):
+        prof = self.prof
+        if self.trace is not None:
+            prof.export(self.trace)
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.dump_state and self.snaps is not None and len(self.snaps):
+            self.snaps.dump(self.dump_state)
+        if self.games_log is not None:
+            if self.game_state == "playing":
+                self.games_log.end(self.balls, "playing", self.game_ticks)
+            self.games_log.close()
+        if self.sink_out is not None:
+            self.sink_out.release()
+        if self.search is not None:
+            self.search.close()
+        if self.net is not None:
+            self.net.close()
+        self.worker.close()
+        self.cap.release()
+        print(self.startup.report(self.worker.load_time))
+        if self.headless:
+            elapsed = time.perf_counter() - self.started_at
+            print(f"{self.frame_id} frames em {elapsed:.1f} s "
+                  f"({self.frame_id / max(elapsed, 1e-9):.1f} fps), "
+                  f"{self.games_started} partidas iniciadas, estado final: {self.game_state}")
+            if self.net is not None:
+                print(self.net.summary())
+            if self.search is not None and self.cpu_shots:
+                print(f"CPU: {self.cpu_shots} tacadas; última busca {self.search.last_cost:.2f} s, "
+                      f"{self.search.evaluated}/{self.search.searched} candidatas")
+            if prof.enabled:
+                print(f"{'etapa':<14} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+                for name, (p50, p95, p99) in prof.summary().items():
+                    print(f"{name:<14} {p50:>8.2f} {p95:>8.2f} {p99:>8.2f}")
+                print("filas (profundidade na entrada de cada etapa):")
+                for q in self.queues:
+                    print("  " + q.describe())
+
+# --------------------
+# Main Loop
+# --------------------
+def main(**options):
+    """Jogo local (ou o quiosque host, com host=PORTA); options são os de Game."""
+    run(Game(**options))
+
+
+def run(game):
+    """Liga as etapas do jogo num Pipeline e roda até a entrada acabar (ou a tecla q)."""
+    # etapas pesadas numa thread cada (OpenCV, NumPy e a espera pelo worker soltam o GIL);
+    # o rastreador é curto e roda no próprio laço
+    pipe = Pipeline("drop_oldest" if game.paced else "block", profiler=game.prof)
+    pipe.stage("capture", game.capture, executor=True, stop=game.stop_capture)
+    pipe.stage("inference", game.inference, executor=True)
+    pipe.stage("gesture", game.gesture, merge=FramePacket.pass_result)
+    pipe.stage("simulation", game.simulation, executor=True)
+    pipe.stage("render", game.render, executor=True)
+    pipe.stage("sink", game.sink, executor=True, close=game.close_window)
+    game.queues = pipe.queues
+    try:
+        asyncio.run(pipe.run())
+    finally:
+        game.close()
+
+
+# --------------------
+# Outro quiosque (--join): a mesa vem do host
+# --------------------
+class JoinedGame(Game):
+    """
+    O outro quiosque (--join): as etapas de captura, mãos, desenho e saída
+    são as do Game; a simulação vira a do cliente. Só a mão daqui é
+    rastreada; ponta do dedo, gesto e tacadas vão para o host, e a mesa, a
+    vez e o estado do jogo vêm dele (interpolados, com a própria tacada
+    prevista). Os botões são apertados como no jogo local: o host vê o dedo.
+    """
+
+    def __init__(self, address, **options):
+        self.client = NetClient(address).start(SIM_RATE)
+        super().__init__(players=1, rewind=0, preview=False, **options)
+        self.color_slot = self.client.slot   # a cor do jogador daqui no host
+
+    def capture(self):
+        pkt = super().capture()
+        screen = self.client.screen
+        if pkt is not END and screen is not None and pkt.frame.shape[1::-1] != screen:
+            pkt.frame = cv2.resize(pkt.frame, screen)   # mesmas coordenadas da mesa do host
+        return pkt
+
+    def simulation(self, pkt):
+        h, w = pkt.frame.shape[:2]
+        hands, client, clock = pkt.hands, self.client, self.clock
+        clock.advance(pkt.frame_time)
+        view = client.view()
+        balls, turn, won = None, None, False
+        if view is not None:
+            balls, self.game_state, turn, won = view
+
+        # tacada na vez daqui: sai na hora (prevista) e o host confere
+        tip = hands.tip[0]
+        if (self.game_state == "playing" and turn == client.slot and balls is not None
+                and hands.pointing[0] and balls.white_alive()
+                and clock.ticks - self.last_push_tick[0] > TOUCH_COOLDOWN_TICKS):
+            wi = balls.white
+            push = push_velocity(tip[0], tip[1], balls.x[wi], balls.y[wi], hands.speed[0],
+                                 BALL_RADIUS + 12, PUSH_BASE_SPEED, PUSH_SPEED_MULT)
+            if push is not None:
+                client.push(*push)
+                self.last_push_tick[0] = clock.ticks
+        client.send_input(tip, hands.speed[0], hands.visible[0], hands.pointing[0])
+        self.prof.mark("net")
+
+        if self.game_state == "playing":
+            pkt.layer = self.layers.get(w, h, "playing", turn)
+            if balls is not None:
+                # a mesa do cliente muda no próximo view: o desenho leva uma cópia
+                xs, ys = balls.render_positions(1.0)
+                pkt.table, pkt.balls = balls, (xs, ys, balls.alive.copy())
+        elif self.game_state == "gameover":
+            pkt.layer = self.layers.get(w, h, "gameover", "VOCE GANHOU!" if won else "VOCE PERDEU!")
+        else:
+            pkt.layer = self.layers.get(w, h, "menu")
+        if client.connected:
+            up, down = client.stats.rates()
+            rtt = client.stats.p50(client.stats.rtt)
+            pkt.net_text = (f"rede: envia {up / 1000:.1f} kB/s, recebe {down / 1000:.1f} kB/s, "
+                            f"RTT {rtt * 1000:.1f} ms, +{(rtt / 2 + client.interp_delay) * 1000:.0f} ms")
+        else:
+            pkt.net_text = "rede: host desconectado"
+        self.prof.mark("state")
+        return pkt
+
+    def close(self):
+        self.client.close()
+        super().close()
+        if self.headless:
+            print(self.client.summary())
+
+
+def join_game(address, **options):
+    """Joga na mesa de outro quiosque (main com --host); options são os de Game."""
+    run(JoinedGame(address, **options))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bilhar com Gestos")
+    parser.add_argument("--source", default="0",
+                        help="webcam (número), vídeo, pasta de imagens ou 'synthetic[:LxA]'")
+    parser.add_argument("--realtime", action="store_true",
+                        help="vídeo/imagens/sintética no ritmo do FPS (padrão: o mais rápido possível)")
+    parser.add_argument("--record", metavar="ARQ",
+                        help="grava os landmarks de cada frame em ARQ (.hlog)")
+    parser.add_argument("--replay", metavar="ARQ",
+                        help="joga a partir de landmarks gravados, sem câmera nem MediaPipe")
+    parser.add_argument("--headless", action="store_true",
+                        help="sem janela (servidor/CI); mostra a taxa de frames no fim")
+    parser.add_argument("--output", metavar="SAIDA",
+                        help="grava os frames compostos em vídeo (.mp4/.avi) ou pasta de PNGs")
+    parser.add_argument("--script", metavar="ARQ",
+                        help="mão roteirizada em JSON ([t, x, y, gesto], ...) ou 'default'")
+    parser.add_argument("--frames", type=int, metavar="N",
+                        help="para depois de N frames")
+    parser.add_argument("--infer-every", type=int, metavar="N",
+                        help="inferência a cada N frames (0: N pelo custo medido; padrão: 0 na "
+                             "webcam/--realtime, 1 no passo-a-passo)")
+    parser.add_argument("--filter", choices=sorted(FILTERS), default=FINGER_FILTER,
+                        help="filtro da ponta do dedo (padrão: %(default)s)")
+    parser.add_argument("--players", type=int, default=1, metavar="N",
+                        help="até N mãos em cena, cada uma um jogador com sua vez de tacar")
+    parser.add_argument("--full-frame", action="store_true",
+                        help="manda sempre o frame inteiro ao MediaPipe (sem recorte em volta da mão)")
+    parser.add_argument("--profile", action="store_true",
+                        help="mostra FPS e p50/p95/p99 de cada etapa do loop no frame")
+    parser.add_argument("--trace", metavar="ARQ",
+                        help="grava o tempo de cada etapa em ARQ (.json: Chrome trace, .csv)")
+    parser.add_argument("--no-preview", action="store_true",
+                        help="não desenha a trajetória prevista da tacada")
+    parser.add_argument("--log-games", metavar="ARQ",
+                        help="grava tacadas e resultado de cada partida em ARQ (.jsonl, ver game_log.py)")
+    parser.add_argument("--ai", action="store_true",
+                        help="joga contra o computador (vez da CPU depois de cada tacada)")
+    parser.add_argument("--rewind", type=int, default=REWIND_SECONDS, metavar="S",
+                        help="segundos que o botão VOLTAR (ou a tecla r) volta na partida "
+                             "(0 desliga; padrão: %(default)s)")
+    parser.add_argument("--dump-state", metavar="ARQ",
+                        help="grava no fim as fotos do estado dos últimos segundos em ARQ (.npy)")
+    parser.add_argument("--host", type=int, nargs="?", const=NET_PORT, metavar="PORTA",
+                        help="simula a mesa e espera outro quiosque (--join) na PORTA "
+                             "(padrão: %(const)s; TCP e UDP)")
+    parser.add_argument("--join", metavar="IP:PORTA",
+                        help="joga na mesa de outro quiosque (--host): manda a mão, recebe a mesa")
+    args = parser.parse_args()
+    if args.host is not None and (args.ai or args.join):
+        parser.error("--host não combina com --ai nem --join")
+    inputs = dict(source=args.source, realtime=args.realtime, replay=args.replay,
+                  headless=args.headless, output=args.output, script=args.script,
+                  max_frames=args.frames, roi=not args.full_frame,
+                  infer_every=args.infer_every, finger_filter=args.filter)
+    if args.join:
+        join_game(args.join, **inputs)
+    else:
+        main(**inputs, record=args.record, players=args.players, profile=args.profile,
+             trace=args.trace, preview=not args.no_preview, ai=args.ai,
+             log_games=args.log_games, rewind=args.rewind, dump_state=args.dump_state,
+             host=args.host)
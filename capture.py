@@ -0,0 +1,104 @@
+import threading
+import time
+
+import cv2
+
+READ_POLL = 0.1   # s entre conferências de _running enquanto read espera
+
+# --------------------
+# Captura em thread separada
+# --------------------
+class ThreadedCapture:
+    """
+    Lê a câmera (cv2.VideoCapture) numa thread própria e guarda os frames num
+    anel pequeno de buffers. O jogo sempre recebe o frame mais novo, com o
+    instante em que foi capturado; frames que ninguém leu a tempo são
+    descartados (e contados em dropped) em vez de acumular atraso no driver.
+
+    Uso:
+        cap = ThreadedCapture(0).start()
+        ret, frame, t = cap.read()
+        cap.release()
+    """
+
+    def __init__(self, source=0, slots=3):
+        self.cap = cv2.VideoCapture(source)
+        # pede ao driver para não enfileirar frames (nem todo backend respeita)
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        # anel: o slot emprestado ao consumidor nunca é sobrescrito
+        self._frames = [None] * slots
+        self._times = [0.0] * slots
+        self._seqs = [0] * slots
+        self._latest = -1          # slot com o frame mais novo
+        self._lent = -1            # slot que o consumidor está usando
+        self._seq = 0              # frames capturados até agora
+        self._read_seq = 0         # último frame entregue
+        self.dropped = 0
+
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while self._running:
+            with self._cond:
+                slot = next(i for i in range(len(self._frames))
+                            if i != self._latest and i != self._lent)
+            # a leitura (USB) acontece fora do lock
+            ok, frame = self.cap.read(self._frames[slot])
+            t = time.time()
+            with self._cond:
+                if not ok:
+                    self._running = False
+                    self._cond.notify_all()
+                    break
+                self._seq += 1
+                self._frames[slot] = frame
+                self._times[slot] = t
+                self._seqs[slot] = self._seq
+                self._latest = slot
+                self._cond.notify_all()
+
+    def read(self, wait_new=True):
+        """
+        Devolve (ret, frame, timestamp) com o frame mais novo.
+        Com wait_new=True espera se o frame mais novo já foi entregue, o
+        quanto for preciso (câmera demorando a abrir, USB engasgando), em
+        esperas curtas que conferem _running: ret=False só quando a captura
+        acabou (fim da fonte, stop ou release). Com wait_new=False devolve na
+        hora, mesmo que repetido.
+        O frame entregue continua válido até a próxima chamada de read.
+        """
+        with self._cond:
+            if wait_new:
+                while self._seq == self._read_seq and self._running:
+                    self._cond.wait(READ_POLL)
+            if self._latest < 0 or (wait_new and self._seq == self._read_seq):
+                return False, None, 0.0
+            slot = self._latest
+            self.dropped += max(0, self._seqs[slot] - self._read_seq - 1)
+            self._read_seq = self._seqs[slot]
+            self._lent = slot
+            return True, self._frames[slot], self._times[slot]
+
+    def stop(self):
+        """Para a captura e acorda um read esperando (pode vir de outra thread)."""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+    def release(self):
+        self.stop()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+        self.cap.release()
@@ -0,0 +1,337 @@
+import math
+
+import numpy as np
+
+# --------------------
+# Filtros da ponta do dedo (streaming)
+# --------------------
+# Todos têm a mesma interface:
+#   x, y = f.update(x, y, t)    # nova amostra (px, s); devolve a posição filtrada
+#   f.vx, f.vy, f.speed         # velocidade filtrada em px/s (usa os timestamps)
+#   f.reset()                   # mão perdida
+# Cada update é O(1), independente do tamanho da janela, e a velocidade não
+# depende do FPS (é por segundo, não por frame).
+
+
+class MovingAverage:
+    """
+    Média das últimas n amostras, com somas correntes num anel fixo.
+    A velocidade é (mais nova - mais velha) / (t mais nova - t mais velha).
+    Com compensate=True a média é levada do instante médio da janela até o
+    instante da última amostra (média + velocidade * atraso), tirando o
+    atraso de ~(n-1)/2 frames da média simples.
+    """
+
+    def __init__(self, n=7, compensate=True):
+        self.n = n
+        self.compensate = compensate
+        self._xs = [0.0] * n
+        self._ys = [0.0] * n
+        self._ts = [0.0] * n
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self._head = 0            # próxima posição do anel
+        self._sx = self._sy = self._st = 0.0
+        self.x = self.y = None
+        self.vx = self.vy = 0.0
+
+    @property
+    def speed(self):
+        return math.hypot(self.vx, self.vy)
+
+    def update(self, x, y, t):
+        k = self._head
+        if self.count == self.n:
+            self._sx -= self._xs[k]
+            self._sy -= self._ys[k]
+            self._st -= self._ts[k]
+        else:
+            self.count += 1
+        self._xs[k] = x
+        self._ys[k] = y
+        self._ts[k] = t
+        self._sx += x
+        self._sy += y
+        self._st += t
+        self._head = (k + 1) % self.n
+
+        oldest = (self._head if self.count == self.n else 0)
+        span = t - self._ts[oldest]
+        if span > 0:
+            self.vx = (x - self._xs[oldest]) / span
+            self.vy = (y - self._ys[oldest]) / span
+        else:
+            self.vx = self.vy = 0.0
+
+        self.x = self._sx / self.count
+        self.y = self._sy / self.count
+        if self.compensate:
+            lag = t - self._st / self.count
+            self.x += self.vx * lag
+            self.y += self.vy * lag
+        return self.x, self.y
+
+
+class ExponentialFilter:
+    """
+    Suavização exponencial com constante de tempo tau (s): o peso de cada
+    amostra vem do dt real, então o resultado não muda com o FPS.
+    A velocidade é a derivada entre amostras, suavizada do mesmo jeito.
+    Com compensate=True soma velocidade * tau (o atraso do filtro numa rampa).
+    """
+
+    def __init__(self, tau=0.08, compensate=True):
+        self.tau = tau
+        self.compensate = compensate
+        self.reset()
+
+    def reset(self):
+        self.x = self.y = None
+        self.vx = self.vy = 0.0
+        self._x = self._y = 0.0
+        self._rx = self._ry = 0.0
+        self._t = None
+
+    @property
+    def speed(self):
+        return math.hypot(self.vx, self.vy)
+
+    def update(self, x, y, t):
+        if self._t is None:
+            self._x, self._y = x, y
+            self._rx, self._ry = x, y
+        elif t > self._t:
+            dt = t - self._t
+            a = 1.0 - math.exp(-dt / self.tau)
+            self.vx += a * ((x - self._rx) / dt - self.vx)
+            self.vy += a * ((y - self._ry) / dt - self.vy)
+            self._x += a * (x - self._x)
+            self._y += a * (y - self._y)
+            self._rx, self._ry = x, y
+        self._t = t
+        self.x, self.y = self._x, self._y
+        if self.compensate:
+            self.x += self.vx * self.tau
+            self.y += self.vy * self.tau
+        return self.x, self.y
+
+
+def _smoothing(dt, cutoff):
+    r = 2.0 * math.pi * cutoff * dt
+    return r / (r + 1.0)
+
+
+class OneEuroFilter:
+    """
+    Filtro One-Euro (Casiez et al.): passa-baixa cuja frequência de corte
+    sobe com a velocidade do dedo. Parado, corta forte o tremor; rápido,
+    quase não atrasa. min_cutoff (Hz) controla o tremor, beta o atraso em
+    movimento (por px/s), d_cutoff (Hz) a suavização da velocidade. Como no
+    artigo, a velocidade é a derivada das amostras brutas (não da posição
+    filtrada, que numa rampa fica para trás e some com a velocidade).
+    """
+
+    def __init__(self, min_cutoff=1.0, beta=0.02, d_cutoff=1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self):
+        self.x = self.y = None
+        self.vx = self.vy = 0.0
+        self._rx = self._ry = 0.0
+        self._t = None
+
+    @property
+    def speed(self):
+        return math.hypot(self.vx, self.vy)
+
+    def update(self, x, y, t):
+        if self._t is None:
+            self.x, self.y = x, y
+            self._rx, self._ry = x, y
+        elif t > self._t:
+            dt = t - self._t
+            a_d = _smoothing(dt, self.d_cutoff)
+            self.vx += a_d * ((x - self._rx) / dt - self.vx)
+            self.vy += a_d * ((y - self._ry) / dt - self.vy)
+            a = _smoothing(dt, self.min_cutoff + self.beta * self.speed)
+            self.x += a * (x - self.x)
+            self.y += a * (y - self.y)
+            self._rx, self._ry = x, y
+        self._t = t
+        return self.x, self.y
+
+
+# --------------------
+# Bancos de filtros (várias mãos, arrays com uma linha por mão)
+# --------------------
+# Mesmas contas dos filtros acima, para n mãos sem um objeto por mão.
+# update(points (n, 2), t, mask (n,)) atualiza só as linhas com amostra
+# nova; x (n, 2) é a posição filtrada, v (n, 2) a velocidade e speed (n,)
+# a velocidade em px/s. reset(linhas) esquece as linhas dadas.
+
+
+class MovingAverageBank:
+    """n MovingAverage: anel (n, janela) e somas correntes por linha."""
+
+    def __init__(self, n, window=7, compensate=True):
+        self.window = window
+        self.compensate = compensate
+        self._pts = np.zeros((n, window, 2))
+        self._ts = np.zeros((n, window))
+        self._sum = np.zeros((n, 2))
+        self._st = np.zeros(n)
+        self._count = np.zeros(n, dtype=np.int64)
+        self._head = np.zeros(n, dtype=np.int64)
+        self.x = np.zeros((n, 2))
+        self.v = np.zeros((n, 2))
+        self.speed = np.zeros(n)
+
+    def reset(self, rows):
+        self._sum[rows] = 0.0
+        self._st[rows] = 0.0
+        self._count[rows] = 0
+        self._head[rows] = 0
+        self.v[rows] = 0.0
+        self.speed[rows] = 0.0
+
+    def update(self, points, t, mask):
+        rows = np.flatnonzero(mask)
+        if not len(rows):
+            return self.x
+        head = self._head[rows]
+        full = self._count[rows] == self.window
+        self._sum[rows] -= np.where(full[:, None], self._pts[rows, head], 0.0)
+        self._st[rows] -= np.where(full, self._ts[rows, head], 0.0)
+        self._count[rows] += ~full
+        self._pts[rows, head] = points[rows]
+        self._ts[rows, head] = t
+        self._sum[rows] += points[rows]
+        self._st[rows] += t
+        self._head[rows] = (head + 1) % self.window
+
+        count = self._count[rows]
+        oldest = np.where(count == self.window, self._head[rows], 0)
+        span = t - self._ts[rows, oldest]
+        moved = span > 0
+        delta = points[rows] - self._pts[rows, oldest]
+        self.v[rows] = np.where(moved[:, None], delta / np.where(moved, span, 1.0)[:, None], 0.0)
+        self.speed[rows] = np.hypot(self.v[rows, 0], self.v[rows, 1])
+        x = self._sum[rows] / count[:, None]
+        if self.compensate:
+            x += self.v[rows] * (t - self._st[rows] / count)[:, None]
+        self.x[rows] = x
+        return self.x
+
+
+class ExponentialBank:
+    """n ExponentialFilter com constante de tempo tau (s)."""
+
+    def __init__(self, n, tau=0.08, compensate=True):
+        self.tau = tau
+        self.compensate = compensate
+        self._s = np.zeros((n, 2))          # média exponencial
+        self._raw = np.zeros((n, 2))        # última amostra
+        self._t = np.zeros(n)
+        self._started = np.zeros(n, dtype=bool)
+        self.x = np.zeros((n, 2))
+        self.v = np.zeros((n, 2))
+        self.speed = np.zeros(n)
+
+    def reset(self, rows):
+        self._started[rows] = False
+        self.v[rows] = 0.0
+        self.speed[rows] = 0.0
+
+    def update(self, points, t, mask):
+        new = mask & ~self._started
+        self._s[new] = points[new]
+        self._raw[new] = points[new]
+        self._t[new] = t
+        self._started[new] = True
+
+        rows = mask & ~new & (t > self._t)
+        if rows.any():
+            dt = (t - self._t[rows])[:, None]
+            a = 1.0 - np.exp(-dt / self.tau)
+            self.v[rows] += a * ((points[rows] - self._raw[rows]) / dt - self.v[rows])
+            self._s[rows] += a * (points[rows] - self._s[rows])
+            self._raw[rows] = points[rows]
+            self._t[rows] = t
+            self.speed[rows] = np.hypot(self.v[rows, 0], self.v[rows, 1])
+        rows = mask
+        self.x[rows] = self._s[rows]
+        if self.compensate:
+            self.x[rows] += self.v[rows] * self.tau
+        return self.x
+
+
+class OneEuroBank:
+    """n OneEuroFilter (corte adaptativo pela velocidade de cada mão)."""
+
+    def __init__(self, n, min_cutoff=1.0, beta=0.02, d_cutoff=1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.x = np.zeros((n, 2))
+        self.v = np.zeros((n, 2))
+        self.speed = np.zeros(n)
+        self._raw = np.zeros((n, 2))        # última amostra
+        self._t = np.zeros(n)
+        self._started = np.zeros(n, dtype=bool)
+
+    def reset(self, rows):
+        self._started[rows] = False
+        self.v[rows] = 0.0
+        self.speed[rows] = 0.0
+
+    def update(self, points, t, mask):
+        """points (n, 2) em px; só as linhas com mask True são atualizadas."""
+        new = mask & ~self._started
+        self.x[new] = points[new]
+        self._raw[new] = points[new]
+        self._t[new] = t
+        self._started[new] = True
+
+        rows = mask & ~new & (t > self._t)
+        if rows.any():
+            dt = (t - self._t[rows])[:, None]
+            r = 2.0 * np.pi * self.d_cutoff * dt
+            a_d = r / (r + 1.0)
+            x = self.x[rows]
+            self.v[rows] += a_d * ((points[rows] - self._raw[rows]) / dt - self.v[rows])
+            speed = np.hypot(self.v[rows, 0], self.v[rows, 1])
+            r = 2.0 * np.pi * (self.min_cutoff + self.beta * speed)[:, None] * dt
+            self.x[rows] = x + r / (r + 1.0) * (points[rows] - x)
+            self.speed[rows] = speed
+            self._raw[rows] = points[rows]
+            self._t[rows] = t
+        return self.x
+
+
+FILTERS = {
+    "average": MovingAverage,
+    "exponential": ExponentialFilter,
+    "one_euro": OneEuroFilter,
+}
+
+
+BANKS = {
+    "average": MovingAverageBank,
+    "exponential": ExponentialBank,
+    "one_euro": OneEuroBank,
+}
+
+
+def make_filter(kind="one_euro", **kwargs):
+    """Cria um filtro pelo nome ("average", "exponential" ou "one_euro")."""
+    return FILTERS[kind](**kwargs)
+
+
+def make_bank(kind, n, **kwargs):
+    """Banco de n filtros do tipo dado (uma linha por mão)."""
+    return BANKS[kind](n, **kwargs)
@@ -0,0 +1,219 @@
+import math
+import os
+import time
+
+import cv2
+import numpy as np
+
+from capture import ThreadedCapture
+
+# --------------------
+# Fontes de frames
+# --------------------
+# Todas têm a mesma interface da ThreadedCapture:
+#   ret, frame, timestamp = source.read()
+#   source.release()
+# Fontes que não são câmera usam o tempo do vídeo (i / fps) como timestamp,
+# então a mesma entrada sempre gera a mesma sequência de tempos.
+# realtime=True espera entre frames para imitar uma câmera; False roda o
+# mais rápido possível (carga, profiling, testes).
+
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".bmp")
+
+
+class _PacedSource:
+    def __init__(self, fps, realtime):
+        self.fps = fps
+        self.realtime = realtime
+        self.index = 0
+        self._t0 = None
+
+    def _timestamp(self):
+        """Tempo do frame atual e, em modo realtime, espera até a hora dele."""
+        t = self.index / self.fps
+        if self.realtime:
+            if self._t0 is None:
+                self._t0 = time.perf_counter()
+            delay = self._t0 + t - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        self.index += 1
+        return t
+
+    def isOpened(self):
+        return True
+
+    def release(self):
+        pass
+
+
+class VideoFileSource(_PacedSource):
+    """Frames de um arquivo de vídeo (lidos em ordem, sem descartar nenhum)."""
+
+    def __init__(self, path, realtime=False, fps=None):
+        self.cap = cv2.VideoCapture(path)
+        fps = fps or self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        super().__init__(fps, realtime)
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self):
+        ok, frame = self.cap.read()
+        if not ok:
+            return False, None, 0.0
+        return True, frame, self._timestamp()
+
+    def release(self):
+        self.cap.release()
+
+
+class ImageFolderSource(_PacedSource):
+    """Frames de uma pasta de imagens, em ordem alfabética."""
+
+    def __init__(self, folder, fps=30.0, realtime=False, loop=False):
+        super().__init__(fps, realtime)
+        self.files = sorted(os.path.join(folder, f) for f in os.listdir(folder)
+                            if f.lower().endswith(IMAGE_EXTS))
+        self.loop = loop
+
+    def read(self):
+        if not self.files or (self.index >= len(self.files) and not self.loop):
+            return False, None, 0.0
+        frame = cv2.imread(self.files[self.index % len(self.files)])
+        if frame is None:
+            return False, None, 0.0
+        return True, frame, self._timestamp()
+
+
+# Mão "apontando" em coordenadas da mão (punho em 0,0; y para baixo; altura ~1).
+# Indicador esticado, outros dedos dobrados: is_pointing dá True.
+POINTING_HAND = np.array([
+    (0.00, 0.00),                                                   # punho
+    (-0.25, -0.10), (-0.40, -0.25), (-0.45, -0.40), (-0.45, -0.52),  # polegar
+    (-0.15, -0.55), (-0.15, -0.80), (-0.15, -0.95), (-0.15, -1.10),  # indicador
+    (0.00, -0.58), (0.02, -0.78), (0.05, -0.70), (0.05, -0.60),      # médio
+    (0.13, -0.55), (0.15, -0.72), (0.17, -0.64), (0.17, -0.55),      # anelar
+    (0.25, -0.48), (0.27, -0.62), (0.29, -0.56), (0.29, -0.48),      # mínimo
+])
+
+HAND_BONES = [(0, 1), (1, 2), (2, 3), (3, 4), (0, 5), (5, 6), (6, 7), (7, 8),
+              (5, 9), (9, 10), (10, 11), (11, 12), (9, 13), (13, 14), (14, 15),
+              (15, 16), (13, 17), (0, 17), (17, 18), (18, 19), (19, 20)]
+
+
+class SyntheticSource(_PacedSource):
+    """
+    Gera frames sem câmera: fundo fixo e uma mão apontando cuja ponta do
+    indicador percorre uma curva de Lissajous pela imagem. Os landmarks
+    "verdadeiros" do frame ficam em last_landmarks (21, 3), normalizados
+    como os do MediaPipe, para testes e replay.
+
+    O frame é espelhado (como a câmera crua), já que os jogos aplicam flip.
+    """
+
+    def __init__(self, width=640, height=480, fps=30.0, frames=None, realtime=False,
+                 hand_size=0.3, seed=0):
+        super().__init__(fps, realtime)
+        self.width = width
+        self.height = height
+        self.frames = frames
+        self.hand_size = hand_size
+        rng = np.random.default_rng(seed)
+        self.background = rng.integers(40, 90, (height, width, 3), dtype=np.uint8)
+        self.last_landmarks = None
+
+    def fingertip(self, t):
+        """Posição normalizada (0..1, já no sentido espelhado do jogo) da ponta do indicador."""
+        return (0.5 + 0.35 * math.sin(0.7 * t), 0.4 + 0.2 * math.sin(1.1 * t + 0.5))
+
+    def read(self):
+        if self.frames is not None and self.index >= self.frames:
+            return False, None, 0.0
+        t = self._timestamp()
+        tip_x, tip_y = self.fingertip(t)
+
+        scale = np.array([self.hand_size * self.height / self.width, self.hand_size])
+        pts = POINTING_HAND * scale
+        pts = pts - pts[8] + (tip_x, tip_y)
+        self.last_landmarks = np.zeros((21, 3), dtype=np.float32)
+        self.last_landmarks[:, :2] = pts
+
+        frame = self.background.copy()
+        px = (pts * (self.width, self.height)).astype(int)
+        for a, b in HAND_BONES:
+            cv2.line(frame, tuple(px[a]), tuple(px[b]), (150, 180, 220), 6)
+        for p in px:
+            cv2.circle(frame, tuple(p), 5, (120, 150, 200), -1)
+        return True, cv2.flip(frame, 1), t
+
+
+def open_source(spec=0, realtime=False):
+    """
+    Escolhe a fonte a partir de um texto (ex.: argumento de linha de comando):
+    - número ("0", 1)           -> webcam, lida em thread (ThreadedCapture)
+    - "synthetic" ou "synthetic:LxA" -> SyntheticSource
+    - pasta                     -> ImageFolderSource
+    - outro caminho             -> VideoFileSource
+    """
+    if isinstance(spec, int) or str(spec).isdigit():
+        return ThreadedCapture(int(spec)).start()
+    spec = str(spec)
+    if spec.startswith("synthetic"):
+        width, height = 640, 480
+        if ":" in spec:
+            width, height = (int(v) for v in spec.split(":", 1)[1].lower().split("x"))
+        return SyntheticSource(width, height, realtime=realtime)
+    if os.path.isdir(spec):
+        return ImageFolderSource(spec, realtime=realtime)
+    return VideoFileSource(spec, realtime=realtime)
+
+
+# --------------------
+# Saídas (modo headless)
+# --------------------
+VIDEO_EXTS = (".mp4", ".avi", ".mkv", ".mov")
+
+
+class VideoFileSink:
+    """Escreve os frames compostos num arquivo de vídeo (tamanho fixado no 1º frame)."""
+
+    def __init__(self, path, fps=30.0, fourcc="mp4v"):
+        self.path = path
+        self.fps = fps
+        self.fourcc = cv2.VideoWriter_fourcc(*fourcc)
+        self.writer = None
+
+    def write(self, frame):
+        if self.writer is None:
+            h, w = frame.shape[:2]
+            self.writer = cv2.VideoWriter(self.path, self.fourcc, self.fps, (w, h))
+        self.writer.write(frame)
+
+    def release(self):
+        if self.writer is not None:
+            self.writer.release()
+
+
+class ImageFolderSink:
+    """Escreve cada frame como PNG numerado numa pasta."""
+
+    def __init__(self, folder, pattern="frame_%06d.png"):
+        os.makedirs(folder, exist_ok=True)
+        self.folder = folder
+        self.pattern = pattern
+        self.index = 0
+
+    def write(self, frame):
+        cv2.imwrite(os.path.join(self.folder, self.pattern % self.index), frame)
+        self.index += 1
+
+    def release(self):
+        pass
+
+
+def open_sink(path, fps=30.0):
+    """Vídeo se o caminho tem extensão de vídeo; senão, pasta de PNGs."""
+    if path.lower().endswith(VIDEO_EXTS):
+        return VideoFileSink(path, fps)
+    return ImageFolderSink(path)
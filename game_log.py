@@ -0,0 +1,178 @@
+import argparse
+import json
+import time
+
+import numpy as np
+
+from batch_physics import STATES, BatchGame, ExactBatchTable
+from physics import BallTable
+
+# --------------------
+# Formato do arquivo (.jsonl)
+# --------------------
+# Uma partida por linha: parâmetros da mesa, bordas, caçapas e subpassos,
+# posições iniciais, as tacadas [tick, vx, vy] (tick = ticks de física já
+# rodados na partida quando o empurrão foi dado) e o resultado no fim:
+# estado ("gameover" ou "playing", se o jogo fechou no meio), se ganhou,
+# ticks jogados, bolas vivas e posições finais.
+# Floats vão pelo repr do JSON, que volta exatamente o mesmo valor.
+
+
+class GameRecorder:
+    """
+    Grava as partidas do jogo para reproduzir depois em lote:
+
+        log.begin(balls, bounds, pockets, substeps)   # ao começar
+        log.shot(tick, vx, vy)                        # a cada empurrão
+        log.end(balls, "gameover", ticks)             # ao terminar
+
+    Com o rewind do jogo, log.rewind(n) esquece as tacadas depois das n primeiras.
+    """
+
+    def __init__(self, path):
+        self.f = open(path, "a")
+        self.count = 0
+        self._game = None
+
+    def begin(self, balls, bounds, pockets, substeps):
+        self._game = {
+            "params": [balls.radius, balls.friction, balls.restitution, balls.col_restitution,
+                       balls.pocket_radius, balls.stop_speed, balls.pocket_on_move, balls.ccd,
+                       balls.sleep_ticks],
+            "bounds": [float(v) for v in bounds],
+            "pockets": [[float(px), float(py)] for px, py in pockets],
+            "substeps": substeps,
+            "x": balls.x.tolist(), "y": balls.y.tolist(),
+            "is_white": balls.is_white.tolist(),
+            "shots": [],
+        }
+
+    def shot(self, tick, vx, vy):
+        if self._game is not None:
+            self._game["shots"].append([int(tick), float(vx), float(vy)])
+
+    def rewind(self, shots):
+        if self._game is not None:
+            del self._game["shots"][shots:]
+
+    def end(self, balls, state, ticks):
+        if self._game is None:
+            return
+        self._game["result"] = {"state": state, "won": balls.white_alive(), "ticks": int(ticks),
+                                "alive": balls.alive.tolist(),
+                                "x": balls.x.tolist(), "y": balls.y.tolist()}
+        self.f.write(json.dumps(self._game) + "\n")
+        self.f.flush()
+        self.count += 1
+        self._game = None
+
+    def close(self):
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def load_games(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# --------------------
+# Replay em lote
+# --------------------
+def _group_key(game):
+    return (tuple(game["params"]), tuple(game["bounds"]),
+            tuple(map(tuple, game["pockets"])), game["substeps"], len(game["x"]))
+
+
+def replay_batch(games):
+    """
+    Reproduz partidas com a mesma mesa (parâmetros, bordas, caçapas, nº de
+    bolas) numa ExactBatchTable, cada uma até os ticks gravados, aplicando
+    as tacadas no tick em que foram dadas. Devolve o BatchGame no fim.
+    """
+    first = games[0]
+    table = BallTable(*first["params"])
+    for x, y, white in zip(first["x"], first["y"], first["is_white"]):
+        table.add_ball(x, y, (255, 255, 255), is_white=white)
+    tables = ExactBatchTable.from_table(table, len(games))
+    tables.x[:] = [g["x"] for g in games]
+    tables.y[:] = [g["y"] for g in games]
+    tables.is_white[:] = [g["is_white"] for g in games]
+    game = BatchGame(tables, first["bounds"], first["pockets"], first["substeps"])
+
+    # tacadas de todas as partidas, em ordem de tick (estável: mesma ordem do jogo)
+    shots = [(s[0], k, s[1], s[2]) for k, g in enumerate(games) for s in g["shots"]]
+    shots.sort(key=lambda s: s[0])
+    shot_tick = np.array([s[0] for s in shots], dtype=np.int64)
+    shot_row = np.array([s[1] for s in shots], dtype=np.intp)
+    shot_v = np.array([s[2:] for s in shots], dtype=float).reshape(-1, 2)
+    end = np.array([g["result"]["ticks"] for g in games], dtype=np.int64)
+
+    tick = 0
+    while True:
+        active = game.playing & (tick < end)
+        if not active.any():
+            break
+        lo, hi = np.searchsorted(shot_tick, [tick, tick + 1])
+        for s in range(lo, hi):        # um por vez: dois no mesmo tick, vale o último
+            if active[shot_row[s]]:
+                game.shoot([shot_row[s]], shot_v[s, 0], shot_v[s, 1])
+        game.step(active)
+        tick += 1
+    return game
+
+
+def validate_games(games, batch=1024, tol=1e-6):
+    """
+    Reproduz as partidas em lotes de até batch mesas e compara com o
+    resultado gravado. Devolve uma lista com, por partida, None (igual) ou
+    o motivo da diferença.
+    """
+    groups = {}
+    for k, g in enumerate(games):
+        groups.setdefault(_group_key(g), []).append(k)
+    out = [None] * len(games)
+    for idx in groups.values():
+        for start in range(0, len(idx), batch):
+            rows = idx[start:start + batch]
+            game = replay_batch([games[k] for k in rows])
+            t = game.tables
+            for r, k in enumerate(rows):
+                res = games[k]["result"]
+                if STATES[game.state[r]] != res["state"]:
+                    out[k] = f"estado {STATES[game.state[r]]} (gravado {res['state']})"
+                elif game.ticks[r] != res["ticks"]:
+                    out[k] = f"{game.ticks[r]} ticks (gravado {res['ticks']})"
+                elif bool(game.won[r]) != res["won"] and res["state"] == "gameover":
+                    out[k] = "vencedor diferente"
+                elif t.alive[r].tolist() != res["alive"]:
+                    out[k] = "bolas vivas diferentes"
+                else:
+                    err = max(np.abs(t.x[r] - res["x"]).max(), np.abs(t.y[r] - res["y"]).max())
+                    if err > tol:
+                        out[k] = f"posições diferem em {err:.3g} px"
+    return out
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reproduz e confere partidas gravadas (--log-games)")
+    parser.add_argument("log", help="arquivo .jsonl gravado pelo jogo")
+    parser.add_argument("--batch", type=int, default=1024, metavar="K",
+                        help="mesas simuladas de uma vez (padrão: %(default)s)")
+    args = parser.parse_args()
+    games = load_games(args.log)
+    t0 = time.perf_counter()
+    errors = validate_games(games, args.batch)
+    elapsed = time.perf_counter() - t0
+    ticks = sum(g["result"]["ticks"] for g in games)
+    bad = [(k, e) for k, e in enumerate(errors) if e is not None]
+    print(f"{len(games)} partidas, {ticks} ticks em {elapsed:.1f} s "
+          f"({len(games) / max(elapsed, 1e-9):.1f} partidas/s, {ticks / max(elapsed, 1e-9):.0f} ticks/s)")
+    print(f"{len(games) - len(bad)} iguais ao gravado, {len(bad)} diferentes")
+    for k, e in bad[:20]:
+        print(f"  partida {k}: {e}")
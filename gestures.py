@@ -0,0 +1,176 @@
+import math
+
+import numpy as np
+
+from hand_worker import LandmarkList, landmarks_to_array
+
+# --------------------
+# Gestos (landmarks em array (21, 3) ou em lote (B, 21, 3))
+# --------------------
+# Os landmarks viram um array uma vez por frame. Cada gesto é um conjunto de
+# regras "a < b + c * tamanho_da_mão" sobre as coordenadas y e algumas
+# distâncias; todas as regras de todos os gestos do registro (GESTURES) são
+# avaliadas numa comparação vetorizada só, e cada gesto exige as suas.
+# As folgas são medidas em "tamanhos de mão" (punho -> base do dedo médio),
+# então o mesmo gesto vale com a mão perto ou longe da câmera.
+
+WRIST = 0
+THUMB_MCP, THUMB_IP, THUMB_TIP = 2, 3, 4
+MIDDLE_MCP = 9
+FINGER_TIPS = [8, 12, 16, 20]     # indicador, médio, anelar, mínimo
+FINGER_PIPS = [6, 10, 14, 18]
+FINGER_MCPS = [5, 9, 13, 17]
+FINGER_NAMES = ["index", "middle", "ring", "pinky"]
+
+# folgas em tamanhos de mão (~0.17 em coordenadas normalizadas com a mão a
+# meio metro da câmera; os valores antigos em coordenadas estão ao lado)
+UP_EPS = 0.12          # indicador "acima" no gesto relaxado (antes 0.02)
+DOWN_EPS = 0.03        # tolerância do dedo "abaixo" no relaxado (antes 0.005)
+THUMB_EXTENDED = 0.5   # ponta do polegar longe da base (antes 0.1)
+PINCH_DIST = 0.25      # ponta do polegar encostando na do indicador
+
+# Colunas de valores por mão: y dos 21 pontos, depois as distâncias e um zero
+_PAIR_A = np.array([MIDDLE_MCP, THUMB_TIP, THUMB_TIP])
+_PAIR_B = np.array([WRIST, THUMB_MCP, FINGER_TIPS[0]])
+SCALE, THUMB, PINCH, ZERO = 21, 22, 23, 24
+
+# Regras: nome -> (a, b, c) para  valor[a] < valor[b] + c * tamanho_da_mão
+RULES = {"thumb_extended": (ZERO, THUMB, -THUMB_EXTENDED),
+         "pinch": (PINCH, ZERO, PINCH_DIST)}
+for _name, _tip, _pip, _mcp in zip(FINGER_NAMES, FINGER_TIPS, FINGER_PIPS, FINGER_MCPS):
+    RULES[_name + "_up"] = (_tip, _pip, 0.0)                # ponta acima do PIP
+    RULES[_name + "_straight"] = (_pip, _mcp, 0.0)          # PIP acima do MCP
+    RULES[_name + "_down"] = (_pip, _tip, 0.0)              # ponta abaixo do PIP
+    RULES[_name + "_up_relaxed"] = (_tip, _pip, -UP_EPS)
+    RULES[_name + "_down_relaxed"] = (_pip, _tip, DOWN_EPS)
+RULE_NAMES = list(RULES)
+_RULE_A = np.array([RULES[r][0] for r in RULE_NAMES])
+_RULE_B = np.array([RULES[r][1] for r in RULE_NAMES])
+_RULE_C = np.array([RULES[r][2] for r in RULE_NAMES], dtype=np.float32)
+
+GESTURES = {}
+_MASKS = np.zeros((0, len(RULE_NAMES)), dtype=bool)     # regras exigidas por gesto
+
+
+def register_gesture(name, rules):
+    """Registra um gesto: verdadeiro quando todas as regras (nomes de RULES) valem."""
+    global _MASKS
+    mask = np.isin(RULE_NAMES, rules)
+    if mask.sum() != len(set(rules)):
+        raise ValueError(f"regra desconhecida em {name}: {rules}")
+    GESTURES[name] = list(rules)
+    _MASKS = np.vstack([_MASKS, ~mask])   # guardado invertido: regra não exigida conta como ok
+
+
+_OTHERS_DOWN = ["middle_down", "ring_down", "pinky_down"]
+# só o indicador esticado (ponta acima do PIP acima do MCP), outros dobrados
+# (a regra de billiards_with_buttons.py)
+register_gesture("pointing", ["index_up", "index_straight"] + _OTHERS_DOWN)
+# só a ponta do indicador acima do PIP, outros dobrados; o indicador pode
+# estar curvado (a regra de ball_gameV1.py)
+register_gesture("index_up", ["index_up"] + _OTHERS_DOWN)
+# indicador acima do PIP com folga; os outros abaixo, com pequena tolerância
+register_gesture("relaxed", ["index_up_relaxed", "middle_down_relaxed",
+                             "ring_down_relaxed", "pinky_down_relaxed"])
+# polegar e indicador esticados, outros dobrados
+register_gesture("gun", ["thumb_extended", "index_up"] + _OTHERS_DOWN)
+register_gesture("open_palm", ["thumb_extended"] + [f + s for f in FINGER_NAMES
+                                                    for s in ("_up", "_straight")])
+register_gesture("pinch", ["pinch"])
+
+
+def landmark_array(hand_landmarks):
+    """(21, 3) float32 a partir de um array, de uma LandmarkList ou do hand_landmarks do MediaPipe."""
+    if isinstance(hand_landmarks, np.ndarray):
+        return hand_landmarks
+    if isinstance(hand_landmarks, LandmarkList):
+        return np.asarray(hand_landmarks.array, dtype=np.float32)
+    return landmarks_to_array(hand_landmarks)
+
+
+def evaluate_rules(lm):
+    """Todas as regras para o lote (B, 21, 3): bool (B, len(RULES))."""
+    values = np.empty((len(lm), ZERO + 1), dtype=np.float32)
+    values[:, :21] = lm[:, :, 1]
+    d = lm[:, _PAIR_A, :2] - lm[:, _PAIR_B, :2]
+    np.hypot(d[:, :, 0], d[:, :, 1], out=values[:, SCALE:ZERO])
+    values[:, ZERO] = 0.0
+    scale = np.maximum(values[:, SCALE:SCALE + 1], 1e-6)
+    return values[:, _RULE_A] < values[:, _RULE_B] + _RULE_C * scale
+
+
+def _gesture_matrix(lm):
+    """bool (B, len(GESTURES)): gesto vale se nenhuma regra exigida falhou."""
+    rules = evaluate_rules(lm)
+    return (rules[:, None, :] | _MASKS).all(axis=2)
+
+
+def classify_batch(landmarks):
+    """
+    Classifica um lote (B, 21, 3) de uma vez (avaliação offline, replay).
+    Devolve um array estruturado (B,) com um campo booleano por gesto.
+    """
+    lm = np.asarray(landmarks, dtype=np.float32)
+    hits = _gesture_matrix(lm)
+    out = np.zeros(len(lm), dtype=[(name, "?") for name in GESTURES])
+    for k, name in enumerate(GESTURES):
+        out[name] = hits[:, k]
+    return out
+
+
+def classify(hand_landmarks):
+    """Todos os gestos de uma mão: {"pointing": bool, "relaxed": bool, ...}."""
+    hits = _gesture_matrix(landmark_array(hand_landmarks)[None])[0].tolist()
+    return dict(zip(GESTURES, hits))
+
+
+# Atalhos com a interface antiga (um gesto, hand_landmarks de qualquer tipo)
+def is_pointing(hand_landmarks):
+    """Retorna True se apenas o indicador estiver levantado."""
+    return classify(hand_landmarks)["pointing"]
+
+def is_pointing_relaxed(hand_landmarks):
+    """Gesto de "apontar" mais tolerante (folgas em tamanhos de mão)."""
+    return classify(hand_landmarks)["relaxed"]
+
+def is_gun_gesture(hand_landmarks):
+    """Retorna True se a mão estiver no gesto de 'arma' (indicador e polegar esticados)."""
+    return classify(hand_landmarks)["gun"]
+
+
+# --------------------
+# Empurrão com o dedo
+# --------------------
+PUSH_REF_RATE = 30.0   # FPS em que base_speed/speed_mult foram ajustados (px por frame)
+
+def push_velocity(finger_x, finger_y, ball_x, ball_y, finger_speed,
+                  touch_dist, base_speed, speed_mult, fallback=None):
+    """
+    Velocidade (vx, vy) que o dedo (posição filtrada, em px) dá à bola,
+    ou None se o dedo não está encostando nela.
+    Direção: do dedo para o centro da bola. Força: base + velocidade do
+    dedo (px/s, do filtro) convertida para px por frame a PUSH_REF_RATE
+    * multiplicador, então a força não muda com o FPS da câmera.
+    Dedo exatamente no centro: direção fallback ((1.0, 0.0) em billiards.py
+    e ball_gameV1.py) ou, sem ela, nenhum empurrão (billiards_with_buttons.py).
+    """
+    if math.hypot(finger_x - ball_x, finger_y - ball_y) > touch_dist:
+        return None
+    return push_aim(finger_x, finger_y, ball_x, ball_y, finger_speed, base_speed, speed_mult,
+                    fallback)
+
+
+def push_aim(finger_x, finger_y, ball_x, ball_y, finger_speed, base_speed, speed_mult,
+             fallback=None):
+    """A velocidade de push_velocity sem exigir o toque (prévia da tacada)."""
+    dx = ball_x - finger_x
+    dy = ball_y - finger_y
+    norm = math.hypot(dx, dy)
+    if norm == 0:
+        if fallback is None:
+            return None
+        dx, dy = fallback
+        norm = math.hypot(dx, dy)
+    avg_move = finger_speed / PUSH_REF_RATE
+    speed = base_speed + avg_move * speed_mult
+    return dx / norm * speed, dy / norm * speed
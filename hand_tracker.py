@@ -0,0 +1,127 @@
+import numpy as np
+
+from filters import make_bank
+from gestures import classify_batch
+from hand_worker import UNKNOWN_HAND
+from prediction import LandmarkPredictor
+
+# --------------------
+# Configurações
+# --------------------
+MAX_HANDS = 4
+LOST_GRACE = 0.25         # s sem ver a mão antes de liberar o slot (e o jogador)
+MATCH_DIST = 0.2          # distância máx. (normalizada) para casar com uma mão conhecida
+SIDE_PENALTY = 0.1        # custo extra se o lado (esquerda/direita) não bate
+POINTING_WINDOW = 6       # janela temporal do gesto
+POINTING_MIN_TRUE = 4     # precisa ser True em >= 4/6
+
+
+# --------------------
+# Várias mãos com identidade (um slot por jogador)
+# --------------------
+class HandTracker:
+    """
+    Dá a cada mão detectada um slot fixo (o jogador) enquanto ela está em
+    cena: cada resultado novo é casado com os slots ativos pelo vizinho mais
+    próximo (centro da mão prevista para o instante do resultado), com
+    penalidade se o lado da mão mudou. Mão nova ocupa um slot livre; slot sem
+    mão por mais de LOST_GRACE é liberado.
+
+    Todo o estado por mão fica em arrays pré-alocados com uma linha por slot:
+    previsão dos landmarks, filtro da ponta do indicador, janela do gesto.
+
+    Uso:
+        tracker.observe(result_time, mãos, lados)  # quando chega resultado
+        tracker.update(now, w, h)                  # todo frame
+        tracker.visible, tracker.tip, tracker.speed, tracker.pointing
+    """
+
+    def __init__(self, max_hands=MAX_HANDS, gesture="pointing", finger_filter="one_euro",
+                 window=POINTING_WINDOW, min_true=POINTING_MIN_TRUE, grace=LOST_GRACE):
+        self.max_hands = max_hands
+        self.gesture = gesture
+        self.min_true = min_true
+        self.grace = grace
+        self.active = np.zeros(max_hands, dtype=bool)     # slot ocupado por uma mão
+        self.visible = np.zeros(max_hands, dtype=bool)    # mão no último resultado
+        self.side = np.full(max_hands, UNKNOWN_HAND, dtype=np.int8)
+        self.last_seen = np.zeros(max_hands)
+        self.predictor = LandmarkPredictor(max_hands)
+        self.finger = make_bank(finger_filter, max_hands)
+        self.gesture_hist = np.zeros((max_hands, window), dtype=bool)
+        self._hist_head = np.zeros(max_hands, dtype=np.int64)
+        self.pointing = np.zeros(max_hands, dtype=bool)
+        self.tip = self.finger.x                          # (max_hands, 2) px, filtrado
+        self.speed = self.finger.speed                    # (max_hands,) px/s
+        self._tips = np.zeros((max_hands, 2))
+
+    def _associate(self, t, centers, sides):
+        """Slot de cada mão detectada (vizinho mais próximo, guloso)."""
+        n = len(centers)
+        slots = np.full(n, -1)
+        known = np.flatnonzero(self.active)
+        if len(known):
+            predicted = self.predictor.predict_all(t)[known, :, :2].mean(axis=1)
+            cost = np.linalg.norm(centers[:, None, :] - predicted[None], axis=2)
+            cost += SIDE_PENALTY * ((sides[:, None] != self.side[known][None])
+                                    & (sides[:, None] != UNKNOWN_HAND))
+            for _ in range(min(n, len(known))):
+                d, k = np.unravel_index(np.argmin(cost), cost.shape)
+                if cost[d, k] > MATCH_DIST:
+                    break
+                slots[d] = known[k]
+                cost[d, :] = np.inf
+                cost[:, k] = np.inf
+        free = [s for s in np.flatnonzero(~self.active) if s not in slots]
+        for d in np.flatnonzero(slots < 0):
+            if not free:
+                break
+            slots[d] = free.pop(0)
+        return slots
+
+    def observe(self, t, hands, sides=None):
+        """Resultado novo da inferência: mãos (n, 21, 3) ou None, lados (n,)."""
+        self.visible[:] = False
+        self.pointing[:] = False
+        if hands is not None and len(hands):
+            hands = hands[:self.max_hands]
+            if sides is None:
+                sides = np.full(len(hands), UNKNOWN_HAND, dtype=np.int8)
+            sides = sides[:len(hands)]
+            slots = self._associate(t, hands[:, :, :2].mean(axis=1), sides)
+            ok = slots >= 0
+            hands, sides, slots = hands[ok], sides[ok], slots[ok]
+
+            # mão que chegou agora num slot: começa sem histórico
+            fresh = slots[~self.active[slots]]
+            self.predictor.reset(fresh)
+            self.finger.reset(fresh)
+            self.gesture_hist[fresh] = False
+            self._hist_head[fresh] = 0
+
+            self.predictor.update(t, hands, slots)
+            self.active[slots] = True
+            self.visible[slots] = True
+            self.side[slots] = np.where(sides != UNKNOWN_HAND, sides, self.side[slots])
+            self.last_seen[slots] = t
+
+            # gestos de todas as mãos numa passada; janela temporal por slot
+            self.gesture_hist[slots, self._hist_head[slots]] = classify_batch(hands)[self.gesture]
+            self._hist_head[slots] = (self._hist_head[slots] + 1) % self.gesture_hist.shape[1]
+            self.pointing[:] = self.visible & (self.gesture_hist.sum(axis=1) >= self.min_true)
+
+        lost = self.active & ~self.visible & (t - self.last_seen > self.grace)
+        if lost.any():
+            self.active[lost] = False
+            self.side[lost] = UNKNOWN_HAND
+            self.predictor.reset(lost)
+            self.finger.reset(lost)
+            self.gesture_hist[lost] = False
+
+    def update(self, now, width, height):
+        """Ponta do indicador prevista para agora e filtrada, em px, para cada mão visível."""
+        predicted = self.predictor.predict_all(now)
+        self._tips[:, 0] = predicted[:, 8, 0] * width
+        self._tips[:, 1] = predicted[:, 8, 1] * height
+        self.finger.update(self._tips, now, self.visible)
+        return self.tip
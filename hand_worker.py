@@ -0,0 +1,440 @@
+import collections
+import multiprocessing as mp_proc
+import queue
+import threading
+import time
+import traceback
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+NUM_LANDMARKS = 21
+LEFT_HAND, RIGHT_HAND, UNKNOWN_HAND = 0, 1, -1   # lado da mão (handedness do MediaPipe)
+RESULT_TIMEOUT = 30.0     # seg. esperando o worker no modo síncrono (inclui subir o modelo)
+ALIVE_CHECK = 0.1         # seg. entre conferências de que o worker ainda está vivo, na espera
+
+ROI_SIZE = 256            # lado (px) do recorte em volta da mão que vai para o modelo
+ROI_PAD = 0.6             # margem do recorte, em fração do maior lado da caixa da mão
+DETECT_MAX_SIDE = 640     # frame inteiro maior que isso é reduzido antes da detecção
+WARM_UP_SHAPE = (480, 640, 3)   # frame preto do aquecimento (o 1º process monta o grafo)
+
+# --------------------
+# Landmarks em array <-> formato do MediaPipe
+# --------------------
+Landmark = collections.namedtuple("Landmark", "x y z")
+
+
+class LandmarkList:
+    """
+    Embrulha um array (21, 3) para ter a mesma cara de hand_landmarks do
+    MediaPipe (hand_landmarks.landmark[i].x / .y / .z), assim is_pointing e
+    companhia funcionam sem mudança com landmarks vindos de outro processo.
+    """
+
+    def __init__(self, arr):
+        self.array = arr
+        rows = arr.tolist() if isinstance(arr, np.ndarray) else arr
+        self.landmark = [Landmark._make(p) for p in rows]
+
+
+def landmarks_to_array(hand_landmarks, out=None):
+    """Copia os 21 pontos (x, y, z normalizados) de um hand_landmarks para float32 (21, 3)."""
+    if out is None:
+        out = np.empty((NUM_LANDMARKS, 3), dtype=np.float32)
+    for i, p in enumerate(hand_landmarks.landmark):
+        out[i, 0] = p.x
+        out[i, 1] = p.y
+        out[i, 2] = p.z
+    return out
+
+
+# --------------------
+# Recorte em volta da mão (ROI)
+# --------------------
+def hand_roi(landmarks, width, height, pad=ROI_PAD):
+    """
+    Quadrado (x0, y0, lado) em pixels em volta dos landmarks normalizados
+    ((21, 3) ou (n, 21, 3)),
+    com margem pad e deslocado para caber no frame. None se a mão está
+    grande demais para o recorte valer a pena (lado >= menor lado do frame).
+    """
+    xs = landmarks[..., 0] * width
+    ys = landmarks[..., 1] * height
+    x_min, x_max = float(xs.min()), float(xs.max())
+    y_min, y_max = float(ys.min()), float(ys.max())
+    side = int(max(x_max - x_min, y_max - y_min) * (1.0 + 2.0 * pad))
+    if side >= min(width, height):
+        return None
+    side = max(side, 1)
+    x0 = int((x_min + x_max) / 2 - side / 2)
+    y0 = int((y_min + y_max) / 2 - side / 2)
+    x0 = min(max(x0, 0), width - side)
+    y0 = min(max(y0, 0), height - side)
+    return x0, y0, side
+
+
+def roi_to_frame(landmarks, roi, width, height):
+    """Leva landmarks normalizados no recorte de volta para o frame inteiro (no lugar)."""
+    x0, y0, side = roi
+    landmarks[..., 0] = (x0 + landmarks[..., 0] * side) / width
+    landmarks[..., 1] = (y0 + landmarks[..., 1] * side) / height
+    landmarks[..., 2] *= side / width    # z do MediaPipe tem a escala da largura da imagem
+    return landmarks
+
+
+def detection_scale(width, height, max_side=DETECT_MAX_SIDE):
+    """Fator (<= 1) para reduzir o frame inteiro antes da detecção."""
+    return min(1.0, max_side / max(width, height))
+
+
+# --------------------
+# Carregar o modelo
+# --------------------
+def load_hands(warm_shape=WARM_UP_SHAPE, **hands_kwargs):
+    """
+    Importa o MediaPipe (só aqui: o import leva segundos), monta Hands e
+    processa um frame preto de warm_shape, que paga a inicialização do
+    grafo. Devolve (mp.solutions, hands); hands.close() no fim.
+    """
+    import mediapipe as mp
+
+    hands = mp.solutions.hands.Hands(**hands_kwargs)
+    hands.process(np.zeros(warm_shape, dtype=np.uint8))
+    return mp.solutions, hands
+
+
+class BackgroundHands:
+    """
+    Hands no próprio processo, carregado e aquecido (load_hands) numa thread
+    enquanto o script já mostra a câmera. process(rgb) devolve None até o
+    modelo ficar pronto (wait=True espera por ele); depois, solutions é
+    mp.solutions (drawing_utils, hands.HAND_CONNECTIONS) e load_time o
+    tempo de import + montagem + aquecimento, em s.
+
+        with BackgroundHands(max_num_hands=1) as hands:
+            results = hands.process(rgb)     # None enquanto carrega
+    """
+
+    def __init__(self, warm_shape=WARM_UP_SHAPE, **hands_kwargs):
+        self.solutions = None
+        self.load_time = None
+        self._hands = None
+        self._error = None
+        self._closed = False
+        self._lock = threading.Lock()
+        self._loaded = threading.Event()
+        self._thread = threading.Thread(target=self._load, args=(warm_shape, hands_kwargs),
+                                        daemon=True)
+        self._thread.start()
+
+    def _load(self, warm_shape, hands_kwargs):
+        started = time.perf_counter()
+        try:
+            solutions, hands = load_hands(warm_shape, **hands_kwargs)
+        except Exception as exc:   # sobe no próximo process, na thread do script
+            self._error = exc
+        else:
+            with self._lock:
+                if self._closed:
+                    hands.close()
+                else:
+                    self.solutions, self._hands = solutions, hands
+                    self.load_time = time.perf_counter() - started
+        self._loaded.set()
+
+    @property
+    def ready(self):
+        return self._loaded.is_set() and self._hands is not None
+
+    def process(self, rgb, wait=False):
+        if wait:
+            self._loaded.wait()
+        if not self._loaded.is_set():
+            return None
+        if self._error is not None:
+            raise self._error
+        return self._hands.process(rgb)
+
+    def close(self):
+        """Fecha o modelo; se ele ainda está carregando, a thread fecha ao terminar."""
+        with self._lock:
+            self._closed = True
+            hands, self._hands = self._hands, None
+        if hands is not None:
+            hands.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# --------------------
+# Processo de inferência
+# --------------------
+def _worker_main(shm_name, shape, requests, results, hands_kwargs, roi_size):
+    started = time.perf_counter()
+    shm = shared_memory.SharedMemory(name=shm_name)
+    frames = np.ndarray((2,) + shape, dtype=np.uint8, buffer=shm.buf)
+    height, width = shape[:2]
+    scale = detection_scale(width, height)
+    small = None
+    if scale < 1.0:
+        small = np.empty((round(height * scale), round(width * scale), 3), dtype=np.uint8)
+    # o recorte só acompanha uma mão; com várias, a detecção é sempre no frame inteiro
+    if hands_kwargs.get("max_num_hands", 2) != 1:
+        roi_size = None
+    crop = np.empty((roi_size, roi_size, 3), dtype=np.uint8) if roi_size else None
+    prev = None                # landmarks do último frame com mão (para o recorte)
+    crop_hands = None
+
+    def detect(model, image):
+        res = model.process(image)
+        if not res.multi_hand_landmarks:
+            return None, None
+        found = np.stack([landmarks_to_array(h) for h in res.multi_hand_landmarks])
+        side = np.full(len(found), UNKNOWN_HAND, dtype=np.int8)
+        for i, c in enumerate(res.multi_handedness or []):
+            side[i] = RIGHT_HAND if c.classification[0].label == "Right" else LEFT_HAND
+        return found, side
+
+    try:
+        # o primeiro frame é sempre o inteiro (ainda sem mão para o recorte)
+        _, hands = load_hands(small.shape if small is not None else shape, **hands_kwargs)
+        # os recortes têm um grafo só deles: no modo vídeo o MediaPipe procura
+        # a mão perto de onde ela estava na imagem anterior, e um recorte
+        # (sempre centrado na mão) e o frame inteiro alternados no mesmo
+        # grafo mandariam essa busca para o lugar errado a cada troca
+        if crop is not None:
+            _, crop_hands = load_hands(crop.shape, **hands_kwargs)
+        results.put(("ready", time.perf_counter() - started))
+        with hands:
+            while True:
+                msg = requests.get()
+                if msg is None:
+                    break
+                slot, frame_id, frame_time = msg
+                started = time.perf_counter()
+                frame = frames[slot]
+                lm = side = None
+                # modo rastreio: só a região em volta da mão anterior, em tamanho fixo
+                roi = hand_roi(prev, width, height) if crop is not None and prev is not None else None
+                if roi is not None:
+                    x0, y0, sq = roi
+                    cv2.resize(frame[y0:y0 + sq, x0:x0 + sq], (roi_size, roi_size),
+                               dst=crop, interpolation=cv2.INTER_AREA)
+                    lm, side = detect(crop_hands, crop)
+                    if lm is not None:
+                        roi_to_frame(lm, roi, width, height)
+                # mão perdida (ou sem recorte): detecção no frame inteiro, reduzido se grande
+                if lm is None:
+                    if small is not None:
+                        cv2.resize(frame, (small.shape[1], small.shape[0]), dst=small,
+                                   interpolation=cv2.INTER_AREA)
+                        lm, side = detect(hands, small)
+                    else:
+                        lm, side = detect(hands, frame)
+                prev = lm
+                results.put((slot, frame_id, frame_time, lm, side,
+                             time.perf_counter() - started))
+    except Exception:
+        # o jogo relança em poll (a exceção em si pode não ser picklável)
+        results.put(("error", traceback.format_exc()))
+    finally:
+        if crop_hands is not None:
+            crop_hands.close()
+        del frames
+        shm.close()
+
+
+class HandWorker:
+    """
+    Roda mp.solutions.hands.Hands em outro processo.
+
+    Os frames RGB vão por memória compartilhada com dois buffers (double
+    buffer): enquanto o worker processa um, o jogo escreve o próximo no outro.
+    Só o índice do buffer e o id do frame passam pela fila; a resposta traz
+    o mesmo id, as mãos achadas em float32 (n, 21, 3) (ou None se nenhuma) e
+    o lado de cada uma (int8 (n,): LEFT_HAND, RIGHT_HAND ou UNKNOWN_HAND).
+
+    Com roi_size (padrão ROI_SIZE) o worker rastreia: enquanto acha a mão,
+    manda ao modelo só um quadrado em volta dos últimos landmarks, reduzido
+    para roi_size x roi_size, e devolve os pontos já no frame inteiro. Sem
+    mão, volta a detectar no frame inteiro (reduzido a DETECT_MAX_SIDE).
+    Recortes e frames inteiros vão para dois Hands separados, cada um com o
+    seu rastreio entre frames. roi_size=None desliga o recorte; com
+    max_num_hands > 1 ele não é usado.
+
+    cost é a média (exponencial) do tempo de inferência por frame, em s;
+    last_cost é o tempo do último resultado devolvido por poll. O processo
+    sobe no primeiro acquire e já aquece o modelo com um frame preto antes
+    do primeiro pedido; ready fica True (e load_time, o tempo disso no
+    processo, em s) quando poll vê o aviso dele. Se o worker falha (ou
+    morre), poll e acquire levantam RuntimeError em vez de esperar.
+
+    Uso:
+        worker = HandWorker(max_num_hands=1, ...)
+        buf = worker.acquire(frame.shape)
+        if buf is not None:
+            cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=buf)
+            worker.submit(frame_id, frame_time)
+        result = worker.poll()   # (frame_id, frame_time, mãos, lados) ou None
+    """
+
+    def __init__(self, roi_size=ROI_SIZE, **hands_kwargs):
+        self.hands_kwargs = hands_kwargs
+        self.roi_size = roi_size
+        self.cost = 0.0
+        self.last_cost = 0.0
+        self.ready = False
+        self.load_time = None
+        self.shape = None
+        self._shm = None
+        self._frames = None
+        self._proc = None
+        self._requests = None
+        self._results = None
+        self._busy = [False, False]
+        self._slot = None          # buffer entregue por acquire, ainda sem submit
+        self._next = 0
+        self._pending = collections.deque()   # lidos da fila por _check_alive, ainda não entregues
+
+    def _start(self, shape):
+        self.close()
+        self.shape = tuple(shape)
+        size = int(np.prod(self.shape)) * 2
+        self._shm = shared_memory.SharedMemory(create=True, size=size)
+        self._frames = np.ndarray((2,) + self.shape, dtype=np.uint8, buffer=self._shm.buf)
+        ctx = mp_proc.get_context("spawn")
+        self._requests = ctx.Queue()
+        self._results = ctx.Queue()
+        self._proc = ctx.Process(target=_worker_main,
+                                 args=(self._shm.name, self.shape, self._requests,
+                                       self._results, self.hands_kwargs, self.roi_size),
+                                 daemon=True)
+        self._proc.start()
+        self._busy = [False, False]
+        self._pending.clear()
+        self.ready = False
+
+    def acquire(self, shape):
+        """
+        Devolve um buffer livre (view em memória compartilhada) para escrever o
+        próximo frame RGB, ou None se os dois estão ocupados no worker.
+        """
+        if tuple(shape) != self.shape:
+            self._start(shape)
+        for k in range(2):
+            slot = (self._next + k) % 2
+            if not self._busy[slot]:
+                self._slot = slot
+                return self._frames[slot]
+        self._check_alive()   # ocupados para sempre se o worker morreu
+        return None
+
+    def submit(self, frame_id, frame_time=0.0):
+        """Manda processar o buffer devolvido pelo último acquire."""
+        slot = self._slot
+        self._slot = None
+        self._busy[slot] = True
+        self._next = 1 - slot
+        self._requests.put((slot, frame_id, frame_time))
+
+    def poll(self, wait=False):
+        """
+        Resultado mais novo já pronto: (frame_id, frame_time, mãos float32
+        (n, 21, 3) ou None, lados int8 (n,) ou None). None se nada novo chegou.
+        Com wait=True bloqueia até chegar um resultado se há frame em
+        processamento (modo passo-a-passo, determinístico). Erro no worker
+        (ou worker morto) vira RuntimeError aqui.
+        """
+        latest = None
+        while self._results is not None:
+            try:
+                if wait and latest is None and any(self._busy):
+                    item = self._wait_result()
+                else:
+                    item = self._get()
+            except queue.Empty:
+                if latest is not None:
+                    break         # entrega o que chegou; um worker morto aparece no próximo poll
+                self._check_alive()
+                if not self._pending:
+                    break
+                continue
+            if item[0] == "ready":
+                self.ready, self.load_time = True, item[1]
+                continue
+            if item[0] == "error":
+                raise RuntimeError(f"erro no worker das mãos:\n{item[1]}")
+            slot, frame_id, frame_time, lm, side, cost = item
+            self._busy[slot] = False
+            self.cost = cost if self.cost == 0.0 else 0.9 * self.cost + 0.1 * cost
+            if latest is None or frame_id > latest[0]:
+                latest = (frame_id, frame_time, lm, side)
+                self.last_cost = cost
+        return latest
+
+    def _wait_result(self):
+        """Próximo item da fila, conferindo o processo enquanto espera (até RESULT_TIMEOUT)."""
+        deadline = time.perf_counter() + RESULT_TIMEOUT
+        while True:
+            try:
+                return self._get(ALIVE_CHECK)
+            except queue.Empty:
+                self._check_alive()
+                if time.perf_counter() > deadline:
+                    raise
+
+    def _get(self, timeout=None):
+        """Próximo item: os guardados por _check_alive primeiro, depois a fila."""
+        if self._pending:
+            return self._pending.popleft()
+        if timeout is None:
+            return self._results.get_nowait()
+        return self._results.get(timeout=timeout)
+
+    def _check_alive(self):
+        """
+        Worker morto: o que ele mandou antes de morrer (resultados, o aviso de
+        erro, se deu tempo) vai para _pending e é entregue antes; o erro
+        levanta na hora, e sem nada a entregar levanta que ele terminou.
+        """
+        if self._proc is None or self._proc.is_alive():
+            return
+        try:
+            while True:
+                self._pending.append(self._results.get(timeout=ALIVE_CHECK))
+        except queue.Empty:
+            pass
+        for item in self._pending:
+            if item[0] == "error":
+                raise RuntimeError(f"erro no worker das mãos:\n{item[1]}")
+        if not self._pending:
+            raise RuntimeError(f"o worker das mãos terminou (código de saída {self._proc.exitcode})")
+
+    def close(self):
+        if self._proc is not None:
+            self._requests.put(None)
+            self._proc.join(timeout=2.0)
+            if self._proc.is_alive():
+                self._proc.terminate()
+            self._proc = None
+        if self._shm is not None:
+            self._frames = None
+            try:
+                self._shm.close()
+            except BufferError:
+                pass  # o jogo ainda segura uma view; a memória sai com o GC
+            self._shm.unlink()
+            self._shm = None
+        self._pending.clear()
+        self.shape = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,198 @@
+import collections
+import math
+import os
+import struct
+import sys
+import time
+
+import numpy as np
+
+from filters import make_filter
+from gestures import GESTURES, classify_batch, push_aim
+from hand_worker import NUM_LANDMARKS, UNKNOWN_HAND
+
+# --------------------
+# Formato do arquivo (.hlog)
+# --------------------
+# Cabeçalho de 16 bytes: b"HLOG", versão (u16), largura e altura do frame
+# (u16, u16) e 6 bytes livres. Depois, um registro por frame com tamanho
+# fixo, para abrir o arquivo inteiro com np.memmap como array estruturado.
+MAGIC = b"HLOG"
+VERSION = 1
+HEADER = struct.Struct("<4sHHH6x")
+
+RECORD_DTYPE = np.dtype([
+    ("t", "<f8"),                                  # instante da captura (s)
+    ("detected", "u1"),                            # 1 se achou mão
+    ("landmarks", "<f4", (NUM_LANDMARKS, 3)),      # x, y, z normalizados
+], align=True)
+
+
+class LandmarkRecorder:
+    """
+    Grava (t, achou mão?, 21x3 landmarks) de cada frame processado.
+    O formato guarda uma mão por frame: com várias, fica a primeira.
+    """
+
+    def __init__(self, path, width, height):
+        self.f = open(path, "wb")
+        self.f.write(HEADER.pack(MAGIC, VERSION, width, height))
+        self._rec = np.zeros(1, dtype=RECORD_DTYPE)
+        self.count = 0
+
+    def write(self, t, landmarks):
+        rec = self._rec
+        rec["t"] = t
+        if landmarks is None:
+            rec["detected"] = 0
+            rec["landmarks"] = 0.0
+        else:
+            rec["detected"] = 1
+            rec["landmarks"] = landmarks if landmarks.ndim == 2 else landmarks[0]
+        self.f.write(rec.tobytes())
+        self.count += 1
+
+    def close(self):
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def load_log(path):
+    """
+    Abre um .hlog sem copiar: devolve (registros memmap, largura, altura).
+    Só com o cabeçalho (gravação sem nenhum frame) os registros vêm vazios;
+    um registro cortado no fim (gravação interrompida) fica de fora.
+    """
+    with open(path, "rb") as f:
+        magic, version, width, height = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path}: não é um log de landmarks (v{VERSION})")
+    count = (os.path.getsize(path) - HEADER.size) // RECORD_DTYPE.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=RECORD_DTYPE), width, height   # memmap não abre 0 bytes
+    records = np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER.size, shape=(count,))
+    return records, width, height
+
+
+# --------------------
+# Replay no jogo
+# --------------------
+class LogReplayer:
+    """
+    Faz o papel da fonte de frames *e* do HandWorker ao mesmo tempo:
+    read() entrega um frame de fundo do tamanho gravado, com o tempo do
+    registro, e poll() devolve os landmarks gravados daquele frame (uma mão,
+    lado desconhecido), um resultado por read e na ordem dos frames.
+    O MediaPipe não roda; acquire() sempre devolve None (nada a processar).
+    """
+
+    def __init__(self, path, background=(40, 40, 40)):
+        self.records, self.width, self.height = load_log(path)
+        self._background = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        self._background[:] = background
+        self.index = -1
+        self.cost = 0.0            # sem inferência de verdade (ver HandWorker.cost)
+        self.last_cost = 0.0
+        self.ready = True          # nenhum modelo a carregar
+        self.load_time = None
+        self._pending = collections.deque()
+
+    def isOpened(self):
+        return True
+
+    def read(self):
+        if self.index + 1 >= len(self.records):
+            return False, None, 0.0
+        self.index += 1
+        self._pending.append(self.index)
+        return True, self._background.copy(), float(self.records["t"][self.index])
+
+    def acquire(self, shape):
+        return None
+
+    def submit(self, frame_id, frame_time=0.0):
+        pass
+
+    def poll(self, wait=False):
+        if not self._pending:
+            return None
+        index = self._pending.popleft()
+        rec = self.records[index]
+        if not rec["detected"]:
+            return index, float(rec["t"]), None, None
+        lm = np.array(rec["landmarks"])[None]
+        return index, float(rec["t"]), lm, np.array([UNKNOWN_HAND], dtype=np.int8)
+
+    def release(self):
+        pass
+
+    def close(self):
+        pass
+
+
+# --------------------
+# Replay rápido (sem vídeo, sem física)
+# --------------------
+def replay_gestures(records, width, height, finger_filter="one_euro",
+                    base_speed=8.0, speed_mult=1.3):
+    """
+    Classifica todos os registros de uma vez (classify_batch) e passa a ponta
+    do indicador pelo filtro, como o jogo faria. Devolve um array
+    estruturado com o resultado por frame: um campo por gesto, x, y e
+    push_speed. O log não guarda a mesa nem as tacadas, então push_speed é
+    a força (px/frame) que o empurrão teria se o dedo encostasse na branca
+    naquele frame (push_aim), com ou sem gesto: mede o dedo, não o jogo.
+    """
+    n = len(records)
+    # sai do memmap uma vez só: indexar o memmap registro a registro é caro
+    detected = np.asarray(records["detected"]).astype(bool)
+    landmarks = np.asarray(records["landmarks"])
+    gestures = classify_batch(landmarks)
+    gestures[~detected] = np.zeros(1, dtype=gestures.dtype)
+
+    xs = [0.0] * n
+    ys = [0.0] * n
+    push_speed = [0.0] * n
+    finger = make_filter(finger_filter)
+    tips = (landmarks[:, 8, :2] * (width, height)).tolist()
+    times = np.asarray(records["t"]).tolist()
+    for k, found in enumerate(detected.tolist()):
+        if not found:
+            finger.reset()
+            continue
+        avg_x, avg_y = finger.update(tips[k][0], tips[k][1], times[k])
+        xs[k] = avg_x
+        ys[k] = avg_y
+        # a direção não importa para a força: a da branca sob o dedo é a fallback
+        push = push_aim(avg_x, avg_y, avg_x, avg_y, finger.speed, base_speed, speed_mult,
+                        fallback=(1.0, 0.0))
+        push_speed[k] = math.hypot(*push)
+
+    out = np.zeros(n, dtype=gestures.dtype.descr + [("x", "<f4"), ("y", "<f4"),
+                                                   ("push_speed", "<f4")])
+    for name in gestures.dtype.names:
+        out[name] = gestures[name]
+    out["x"] = xs
+    out["y"] = ys
+    out["push_speed"] = push_speed
+    return out
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("uso: python landmark_log.py sessao.hlog")
+        sys.exit(1)
+    records, width, height = load_log(sys.argv[1])
+    t0 = time.perf_counter()
+    result = replay_gestures(records, width, height)
+    elapsed = time.perf_counter() - t0
+    live = float(records["t"][-1] - records["t"][0]) if len(records) > 1 else 0.0
+    print(f"{len(records)} frames ({width}x{height}), {int(records['detected'].sum())} com mão")
+    print("  ".join(f"{name}: {int(result[name].sum())}" for name in GESTURES))
+    print(f"replay: {elapsed * 1000:.1f} ms para {live:.1f} s gravados "
+          f"({live / max(elapsed, 1e-9):.0f}x mais rápido que ao vivo)")
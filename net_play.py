@@ -0,0 +1,663 @@
+import asyncio
+import collections
+import json
+import struct
+import threading
+import time
+
+import numpy as np
+
+from physics import BallTable
+
+# --------------------
+# Configurações
+# --------------------
+NET_PORT = 47800
+POS_SCALE = 8.0           # posições em 1/8 px (int16: até 4095 px)
+VEL_SCALE = 256.0         # velocidades em 1/256 px/tick (int16: até 128 px/tick)
+HISTORY = 64              # fotos enviadas guardadas como base do delta
+INTERP_DELAY = 0.1        # s; o cliente mostra a mesa esse tempo atrás da última foto
+ERROR_DECAY = 0.8         # por frame: diferença da previsão some em ~10 frames
+STATS_WINDOW = 1.0        # s; janela da banda por segundo
+CONNECT_TIMEOUT = 5.0
+
+STATES = ("menu", "playing", "gameover")
+
+# --------------------
+# Pacotes UDP (little-endian, primeiro byte = tipo)
+# --------------------
+# Foto do host: cabeçalho, máscara das bolas que mudaram em relação à base
+# (a última foto que o cliente confirmou), bits de bola viva e, para cada
+# bola que mudou, x, y, vx, vy em int16. base 0 = foto cheia.
+# Entrada do cliente: ponta do dedo, velocidade, visível/apontando e a
+# última tacada (reenviada até o host responder). push_seen é a última
+# tacada que o host viu; push_ack a última que ele usou: vista e não usada
+# (fora da vez, no intervalo entre toques) foi recusada.
+SNAPSHOT = 1
+INPUT = 2
+SNAP_HEADER = struct.Struct("<BIIIIIdfBbBH")  # tipo, seq, base, tick, push_ack, push_seen, eco, espera, estado, vez, venceu, n
+INPUT_PACKET = struct.Struct("<BIIdfffBIff")  # tipo, seq, ack, t, x, y, speed, flags, push_id, vx, vy
+
+
+def quantize(table):
+    """(n, 4) int16 com x, y (1/POS_SCALE px) e vx, vy (1/VEL_SCALE px/tick) de cada bola."""
+    q = np.stack([table.x * POS_SCALE, table.y * POS_SCALE,
+                  table.vx * VEL_SCALE, table.vy * VEL_SCALE], axis=1)
+    return np.clip(np.rint(q), -32768, 32767).astype("<i2")
+
+
+def encode_snapshot(seq, tick, q, alive, base=0, base_q=None, push_ack=0, push_seen=0, echo=0.0,
+                    hold=0.0, state=0, turn=-1, won=False):
+    """Foto com só as bolas cujo estado quantizado mudou desde base_q (todas, sem base)."""
+    n = len(q)
+    if base_q is None or len(base_q) != n:
+        base, changed = 0, np.ones(n, dtype=bool)
+    else:
+        changed = (q != base_q).any(axis=1)
+    header = SNAP_HEADER.pack(SNAPSHOT, seq, base, tick, push_ack, push_seen, echo, hold, state,
+                              turn, won, n)
+    return b"".join([header, np.packbits(changed).tobytes(), np.packbits(alive).tobytes(),
+                     q[changed].tobytes()])
+
+
+def decode_snapshot(data, baselines):
+    """
+    dict com os campos da foto e q/alive completos, aplicando o delta sobre
+    baselines[base] ({seq: (q, alive)}); None se a base já não existe.
+    """
+    (_, seq, base, tick, push_ack, push_seen, echo, hold, state, turn, won,
+     n) = SNAP_HEADER.unpack_from(data)
+    k = SNAP_HEADER.size
+    nbytes = (n + 7) // 8
+    changed = np.unpackbits(np.frombuffer(data, np.uint8, nbytes, k), count=n).astype(bool)
+    alive = np.unpackbits(np.frombuffer(data, np.uint8, nbytes, k + nbytes), count=n).astype(bool)
+    rows = np.frombuffer(data, "<i2", offset=k + 2 * nbytes).reshape(-1, 4)
+    if base:
+        if base not in baselines or len(baselines[base][0]) != n:
+            return None
+        q = baselines[base][0].copy()
+    else:
+        q = np.zeros((n, 4), dtype="<i2")
+    q[changed] = rows
+    return {"seq": seq, "tick": tick, "push_ack": push_ack, "push_seen": push_seen,
+            "echo": echo, "hold": hold,
+            "state": STATES[state], "turn": turn, "won": bool(won), "q": q, "alive": alive}
+
+
+# --------------------
+# Banda e latência
+# --------------------
+class NetStats:
+    """
+    Bytes enviados/recebidos (total e por segundo, na última janela de
+    STATS_WINDOW) e amostras de latência: rtt (ida e volta de um pacote) e
+    push (tacada enviada até o host confirmar), em segundos.
+    """
+
+    def __init__(self, samples=256):
+        self.sent_bytes = self.recv_bytes = 0
+        self.sent_packets = self.recv_packets = 0
+        self.rtt = collections.deque(maxlen=samples)
+        self.push = collections.deque(maxlen=samples)
+        self._marks = collections.deque()
+        self._first = None
+
+    def sent(self, n):
+        self.sent_bytes += n
+        self.sent_packets += 1
+        self._mark()
+
+    def received(self, n):
+        self.recv_bytes += n
+        self.recv_packets += 1
+        self._mark()
+
+    def _mark(self):
+        now = time.perf_counter()
+        if self._first is None:
+            self._first = now
+        if not self._marks or now - self._marks[-1][0] >= 0.1:
+            self._marks.append((now, self.sent_bytes, self.recv_bytes))
+            while len(self._marks) > 2 and now - self._marks[1][0] >= STATS_WINDOW:
+                self._marks.popleft()
+
+    def rates(self):
+        """(enviados, recebidos) em bytes/s na última janela."""
+        if not self._marks:
+            return 0.0, 0.0
+        t0, s0, r0 = self._marks[0]
+        dt = max(time.perf_counter() - t0, 1e-3)
+        return (self.sent_bytes - s0) / dt, (self.recv_bytes - r0) / dt
+
+    def averages(self):
+        """(enviados, recebidos) em bytes/s desde o primeiro pacote."""
+        if self._first is None:
+            return 0.0, 0.0
+        dt = max(time.perf_counter() - self._first, 1e-3)
+        return self.sent_bytes / dt, self.recv_bytes / dt
+
+    @staticmethod
+    def p50(samples):
+        return float(np.median(samples)) if samples else float("nan")
+
+
+class _Datagrams(asyncio.DatagramProtocol):
+    def __init__(self, on_packet):
+        self.on_packet = on_packet
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.on_packet(data, addr)
+
+
+class _LoopThread:
+    """Laço asyncio numa thread própria; o jogo (síncrono) só chama métodos thread-safe."""
+
+    def _start_loop(self, setup):
+        self._loop = asyncio.new_event_loop()
+        ready = threading.Event()
+        error = []
+
+        def run():
+            asyncio.set_event_loop(self._loop)
+            try:
+                self._loop.run_until_complete(setup())
+            except Exception as e:  # noqa: BLE001 (devolvido para quem chamou start)
+                error.append(e)
+                ready.set()
+                return
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        ready.wait()
+        if error:
+            raise error[0]
+
+    def _call(self, fn, *args):
+        self._loop.call_soon_threadsafe(fn, *args)
+
+    def close(self):
+        if getattr(self, "_thread", None) is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._stop(), self._loop).result(2.0)
+        except Exception:  # noqa: BLE001 (fechando de qualquer jeito)
+            pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=2.0)
+        self._thread = None
+
+    async def _stop(self):
+        self._close_sockets()
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _close_sockets(self):
+        pass
+
+
+# --------------------
+# Host: dono da mesa
+# --------------------
+class RemoteInput:
+    """Última entrada do outro quiosque (px na mesa do host)."""
+
+    def __init__(self):
+        self.tip = np.zeros(2)
+        self.speed = 0.0
+        self.visible = False
+        self.pointing = False
+
+
+class NetHost(_LoopThread):
+    """
+    Lado que simula a mesa. Aceita um cliente por TCP (entrada, mesa nova) e
+    troca pacotes com ele por UDP na mesma porta:
+
+        net = NetHost(port, slot=players); net.start()
+        net.set_screen(w, h)            # tamanho do frame (o cliente usa o mesmo)
+        net.remote                      # RemoteInput do outro quiosque
+        push = net.take_push()          # (vx, vy) ou None, uma vez por tacada
+        net.ack_push()                  # usou a tacada (a que não for usada é recusada)
+        net.send_rack(balls, ...)       # mesa nova (TCP)
+        net.publish(balls, tick, ...)   # uma foto por frame (UDP, delta)
+
+    slot é o índice do jogador remoto no jogo.
+    """
+
+    def __init__(self, port=NET_PORT, slot=1, bind="0.0.0.0"):
+        self.port = port
+        self.slot = slot
+        self.bind = bind
+        self.stats = NetStats()
+        self.remote = RemoteInput()
+        self.snapshots = 0
+        self.snapshot_bytes = 0
+        self.full_bytes = 0
+        self._lock = threading.Lock()
+        self._writer = None
+        self._udp = None
+        self._addr = None
+        self._rack = None
+        self._screen = None
+        self._input_seq = 0
+        self._ack = 0
+        self._echo = (0.0, 0.0)      # (t do cliente, instante da chegada)
+        self._push = None
+        self._push_seen = 0          # última tacada recebida
+        self._push_taken = 0
+        self._push_ack = 0           # última tacada usada
+        self._seq = 0
+        self._history = {}
+
+    @property
+    def connected(self):
+        return self._writer is not None
+
+    def start(self):
+        self._start_loop(self._serve)
+        return self
+
+    async def _serve(self):
+        self._server = await asyncio.start_server(self._on_client, self.bind, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        transport, self._udp = await self._loop.create_datagram_endpoint(
+            lambda: _Datagrams(self._on_datagram), local_addr=(self.bind, self.port))
+
+    async def _on_client(self, reader, writer):
+        if self._writer is not None:
+            writer.write(b'{"type": "busy"}\n')
+            writer.close()
+            return
+        try:
+            hello = json.loads(await asyncio.wait_for(reader.readline(), CONNECT_TIMEOUT))
+        except (asyncio.TimeoutError, ValueError):
+            writer.close()
+            return
+        if hello.get("type") != "hello":
+            writer.close()
+            return
+        self._writer = writer
+        self._send_line({"type": "welcome", "udp": self.port, "slot": self.slot})
+        for msg in (self._screen, self._rack):
+            if msg is not None:
+                self._send_line(msg)
+        try:
+            while await reader.readline():
+                pass
+        except (ConnectionError, asyncio.CancelledError):
+            pass                      # cliente saiu ou o host está fechando
+        finally:
+            with self._lock:
+                self._writer = self._addr = None
+                self.remote.visible = self.remote.pointing = False
+                self._input_seq = self._ack = 0
+                self._push = None
+                self._push_seen = self._push_taken = self._push_ack = 0
+                self._history.clear()
+            writer.close()
+
+    def _send_line(self, msg):
+        if self._writer is not None:
+            data = (json.dumps(msg) + "\n").encode()
+            self._writer.write(data)
+            self.stats.sent(len(data))
+
+    def _on_datagram(self, data, addr):
+        if not data or data[0] != INPUT or len(data) < INPUT_PACKET.size or self._writer is None:
+            return
+        self.stats.received(len(data))
+        _, seq, ack, t, x, y, speed, flags, push_id, vx, vy = INPUT_PACKET.unpack_from(data)
+        with self._lock:
+            if seq <= self._input_seq:
+                return                # atrasado ou repetido
+            self._input_seq = seq
+            self._addr = addr
+            self._ack = ack
+            self._echo = (t, time.perf_counter())
+            self.remote.tip[:] = (x, y)
+            self.remote.speed = speed
+            self.remote.visible = bool(flags & 1)
+            self.remote.pointing = bool(flags & 2)
+            if push_id > self._push_seen:
+                self._push_seen = push_id
+                self._push = (push_id, vx, vy)
+
+    def take_push(self):
+        """
+        Tacada nova do cliente (vx, vy), uma vez só; None se não há. Só é
+        confirmada ao cliente com ack_push; sem ele, ela conta como recusada.
+        """
+        with self._lock:
+            push, self._push = self._push, None
+        if push is None:
+            return None
+        self._push_taken = push[0]
+        return push[1:]
+
+    def ack_push(self):
+        """A última tacada de take_push foi usada."""
+        with self._lock:
+            self._push_ack = self._push_taken
+
+    def set_screen(self, width, height):
+        if self._screen is None or self._screen["size"] != [width, height]:
+            self._screen = {"type": "screen", "size": [width, height]}
+            self._call(self._send_line, self._screen)
+
+    def send_rack(self, balls, bounds, pockets, substeps):
+        """Mesa nova (cores, parâmetros, bordas e caçapas) para o cliente montar a sua."""
+        self._rack = {
+            "type": "rack",
+            "params": [balls.radius, balls.friction, balls.restitution, balls.col_restitution,
+                       balls.pocket_radius, balls.stop_speed, balls.pocket_on_move, balls.ccd,
+                       balls.sleep_ticks],
+            "colors": balls.color.tolist(), "is_white": balls.is_white.tolist(),
+            "bounds": [float(v) for v in bounds],
+            "pockets": [[float(px), float(py)] for px, py in pockets],
+            "substeps": substeps,
+        }
+        self._call(self._send_line, self._rack)
+
+    def publish(self, balls, tick, state, turn, won):
+        """Foto da mesa para o cliente, com só as bolas que mudaram desde a última que ele confirmou."""
+        if self._addr is None:
+            return
+        q = quantize(balls)
+        with self._lock:
+            # _history também é limpo pelo laço de rede quando o cliente sai
+            addr, base = self._addr, self._ack
+            if addr is None:
+                return                # o cliente saiu depois da conferência acima
+            echo, arrived = self._echo
+            push_ack, push_seen = self._push_ack, self._push_seen
+            self._seq += 1
+            seq = self._seq
+            base_q = self._history.get(base, (None,))[0]
+            self._history[seq] = (q, balls.alive.copy())
+            self._history.pop(seq - HISTORY, None)
+        data = encode_snapshot(seq, tick, q, balls.alive, base if base_q is not None else 0,
+                               base_q, push_ack, push_seen, echo, time.perf_counter() - arrived,
+                               STATES.index(state), -1 if turn is None else turn, won)
+        self.snapshots += 1
+        self.snapshot_bytes += len(data)
+        self.full_bytes += SNAP_HEADER.size + 2 * ((len(q) + 7) // 8) + q.nbytes
+        self.stats.sent(len(data))
+        self._call(self._udp.transport.sendto, data, addr)
+
+    def summary(self):
+        up, down = self.stats.averages()
+        avg = self.snapshot_bytes / max(self.snapshots, 1)
+        full = self.full_bytes / max(self.snapshots, 1)
+        return (f"rede (host): envia {up / 1000:.1f} kB/s, recebe {down / 1000:.1f} kB/s em média; "
+                f"{self.snapshots} fotos de {avg:.0f} B em média (cheias: {full:.0f} B)")
+
+    def _close_sockets(self):
+        if self._writer is not None:
+            self._writer.close()
+        if self._udp is not None and self._udp.transport is not None:
+            self._udp.transport.close()
+        self._server.close()
+
+
+# --------------------
+# Cliente: entrada local, mesa do host
+# --------------------
+class SharedHands:
+    """
+    Mãos locais (HandTracker) mais o jogador do outro quiosque numa linha a
+    mais, com a parte da interface que o jogo usa (max_hands, active,
+    visible, pointing, tip, speed). refresh() copia tudo uma vez por frame.
+    """
+
+    def __init__(self, tracker, remote):
+        self.tracker = tracker
+        self.remote = remote
+        n = tracker.max_hands + 1
+        self.max_hands = n
+        self.active = np.zeros(n, dtype=bool)
+        self.visible = np.zeros(n, dtype=bool)
+        self.pointing = np.zeros(n, dtype=bool)
+        self.tip = np.zeros((n, 2))
+        self.speed = np.zeros(n)
+
+    def refresh(self, connected=True):
+        t, r = self.tracker, self.remote
+        for dst, src in ((self.active, t.active), (self.visible, t.visible),
+                         (self.pointing, t.pointing), (self.tip, t.tip), (self.speed, t.speed)):
+            dst[:-1] = src
+        self.active[-1] = self.visible[-1] = connected and r.visible
+        self.pointing[-1] = connected and r.pointing
+        self.tip[-1] = r.tip
+        self.speed[-1] = r.speed
+
+
+class NetClient(_LoopThread):
+    """
+    Lado que só manda entrada: conecta no host por TCP, manda a mão e as
+    tacadas por UDP a cada frame e mostra a mesa das fotos recebidas,
+    INTERP_DELAY atrás da mais nova (interpolando entre duas fotos). A
+    própria tacada é prevista: a mesa local anda com a física do jogo desde
+    o empurrão até o host confirmar, e a diferença para a mesa do host some
+    aos poucos (ERROR_DECAY).
+
+        net = NetClient("host:porta"); net.start()
+        net.send_input(tip, speed, visible, pointing)
+        net.push(vx, vy)                 # tacada dada aqui (prevista já)
+        view = net.view()                # mesa para desenhar (ou None)
+    """
+
+    def __init__(self, address, interp_delay=INTERP_DELAY):
+        host, _, port = address.rpartition(":")
+        self.host = host or "127.0.0.1"
+        self.port = int(port) if port else NET_PORT
+        self.interp_delay = interp_delay
+        self.stats = NetStats()
+        self.slot = None
+        self.screen = None            # (largura, altura) do frame do host
+        self.rack = None
+        self.rack_version = 0
+        self.table = None             # BallTable com as posições mostradas
+        self._lock = threading.Lock()
+        self._udp = None
+        self._writer = None
+        self._seq = 0
+        self._ack = 0
+        self._baselines = {}
+        self._buffer = collections.deque(maxlen=HISTORY)
+        self._offset = None           # instante local - tick / SIM_RATE (mínimo suavizado)
+        self._rate = None
+        self._push_id = 0
+        self._push = (0.0, 0.0)
+        self._push_sent = {}
+        self._pred = None             # mesa prevista depois da tacada local
+        self._pred_tick = 0.0
+        self._pred_id = 0
+        self._refused = False         # o host viu a tacada prevista e não usou
+        self._error = None
+        self._shown_rack = 0
+
+    @property
+    def connected(self):
+        return self._writer is not None
+
+    def start(self, rate=30):
+        self._rate = rate
+        self._start_loop(self._connect)
+        return self
+
+    async def _connect(self):
+        reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), CONNECT_TIMEOUT)
+        self._writer.write(b'{"type": "hello"}\n')
+        welcome = json.loads(await asyncio.wait_for(reader.readline(), CONNECT_TIMEOUT) or b"{}")
+        if welcome.get("type") != "welcome":
+            self._writer.close()
+            self._writer = None
+            raise ConnectionError(f"host recusou a conexão: {welcome.get('type', 'fechou')}")
+        self.slot = welcome["slot"]
+        _, self._udp = await self._loop.create_datagram_endpoint(
+            lambda: _Datagrams(self._on_datagram), remote_addr=(self.host, welcome["udp"]))
+        self._reader_task = self._loop.create_task(self._read_lines(reader))
+
+    async def _read_lines(self, reader):
+        try:
+            while line := await reader.readline():
+                self.stats.received(len(line))
+                msg = json.loads(line)
+                if msg.get("type") == "screen":
+                    self.screen = tuple(msg["size"])
+                elif msg.get("type") == "rack":
+                    with self._lock:
+                        self.rack = msg
+                        self.rack_version += 1
+        except ConnectionError:
+            pass
+        self._writer = None
+
+    def _on_datagram(self, data, addr):
+        if not data or data[0] != SNAPSHOT:
+            return
+        now = time.perf_counter()
+        self.stats.received(len(data))
+        with self._lock:
+            snap = decode_snapshot(data, self._baselines)
+            if snap is None or snap["seq"] <= self._ack:
+                return
+            self._ack = snap["seq"]
+            self._baselines[snap["seq"]] = (snap["q"], snap["alive"])
+            self._baselines.pop(snap["seq"] - HISTORY, None)
+            snap["x"] = snap["q"][:, 0] / POS_SCALE
+            snap["y"] = snap["q"][:, 1] / POS_SCALE
+            self._buffer.append(snap)
+            sample = now - snap["tick"] / self._rate
+            if self._offset is None or sample < self._offset:
+                self._offset = sample
+            else:
+                self._offset += 0.01 * (sample - self._offset)
+            for push_id in [k for k in self._push_sent if k <= snap["push_ack"]]:
+                self.stats.push.append(now - self._push_sent.pop(push_id))
+            for push_id in [k for k in self._push_sent if k <= snap["push_seen"]]:
+                del self._push_sent[push_id]      # recusada: não entra na latência
+                if push_id == self._pred_id:
+                    self._refused = True
+        if snap["echo"] > 0.0:
+            self.stats.rtt.append(now - snap["echo"] - snap["hold"])
+
+    def send_input(self, tip, speed, visible, pointing):
+        """Mão local deste frame (px na mesa do host); repete a última tacada até o host confirmar."""
+        if self._udp is None or self._udp.transport is None:
+            return
+        self._seq += 1
+        flags = int(bool(visible)) | int(bool(pointing)) << 1
+        data = INPUT_PACKET.pack(INPUT, self._seq, self._ack, time.perf_counter(),
+                                 float(tip[0]), float(tip[1]), float(speed), flags,
+                                 self._push_id, *self._push)
+        self.stats.sent(len(data))
+        self._call(self._udp.transport.sendto, data)
+
+    def push(self, vx, vy):
+        """Tacada deste quiosque: vai para o host e já anda na mesa prevista."""
+        self._push_id += 1
+        self._push = (float(vx), float(vy))
+        self._push_sent[self._push_id] = time.perf_counter()
+        if self.table is not None and self.table.white is not None:
+            pred = self._pred = self._copy_table()
+            pred.vx[pred.white], pred.vy[pred.white] = vx, vy
+            self._pred_tick = self._render_tick(time.perf_counter())
+            self._pred_id = self._push_id
+            self._refused = False
+
+    def _copy_table(self):
+        t = self.table
+        pred = BallTable(*self.rack["params"])
+        for name in ("x", "y", "prev_x", "prev_y", "vx", "vy", "color", "alive", "is_white",
+                     "asleep", "still"):
+            setattr(pred, name, getattr(t, name).copy())
+        return pred
+
+    def _render_tick(self, now):
+        return (now - self.interp_delay - self._offset) * self._rate
+
+    def view(self):
+        """
+        (mesa, estado, vez, venceu) para desenhar agora, ou None antes da
+        primeira foto. A mesa é self.table (BallTable montada com o rack), ou
+        None enquanto o host não mandou a mesa da partida.
+        """
+        now = time.perf_counter()
+        with self._lock:
+            if not self._buffer:
+                return None
+            if self.rack is not None and self._shown_rack != self.rack_version:
+                self._shown_rack = self.rack_version
+                self.table = BallTable(*self.rack["params"])
+                for color, white in zip(self.rack["colors"], self.rack["is_white"]):
+                    self.table.add_ball(0.0, 0.0, color, is_white=white)
+                self._pred = self._error = None
+            tick = self._render_tick(now)
+            a = b = self._buffer[-1]
+            for snap in reversed(self._buffer):
+                if snap["tick"] <= tick:
+                    a = snap
+                    break
+                b = snap
+            confirmed = self._pred is not None and any(
+                s["push_ack"] >= self._pred_id and s["tick"] <= tick for s in self._buffer)
+            if self._refused:
+                self._pred = None     # a mesa volta a ser só a do host
+                self._refused = False
+        t = self.table
+        turn = None if a["turn"] < 0 else a["turn"]
+        if t is None or len(a["x"]) != len(t):
+            return None, a["state"], turn, a["won"]
+        span = b["tick"] - a["tick"]
+        f = min(max((tick - a["tick"]) / span, 0.0), 1.0) if span > 0 else 0.0
+        np.copyto(t.prev_x, t.x)
+        np.copyto(t.prev_y, t.y)
+        t.x[:] = a["x"] + f * (b["x"] - a["x"])
+        t.y[:] = a["y"] + f * (b["y"] - a["y"])
+        t.vx[:] = a["q"][:, 2] / VEL_SCALE
+        t.vy[:] = a["q"][:, 3] / VEL_SCALE
+        t.alive[:] = a["alive"]
+
+        if self._pred is not None:
+            bounds, pockets = self.rack["bounds"], self.rack["pockets"]
+            while self._pred_tick + 1 <= tick:
+                self._pred.step(*bounds, pockets, substeps=self.rack["substeps"])
+                self._pred_tick += 1
+            if confirmed:
+                # a mesa do host já mostra a tacada: segue com ela, tirando a diferença aos poucos
+                self._error = np.stack([self._pred.x - t.x, self._pred.y - t.y], axis=1)
+                self._error[~(self._pred.alive & t.alive)] = 0.0
+                self._pred = None
+            else:
+                t.x[:], t.y[:], t.alive[:] = self._pred.x, self._pred.y, self._pred.alive
+        if self._error is not None:
+            t.x += self._error[:, 0]
+            t.y += self._error[:, 1]
+            self._error *= ERROR_DECAY
+            if np.abs(self._error).max() < 0.05:
+                self._error = None
+        return t, a["state"], turn, a["won"]
+
+    def summary(self):
+        up, down = self.stats.averages()
+        rtt = self.stats.p50(self.stats.rtt)
+        push = self.stats.p50(self.stats.push)
+        return (f"rede (cliente): envia {up / 1000:.1f} kB/s, recebe {down / 1000:.1f} kB/s em média; "
+                f"RTT p50 {rtt * 1000:.1f} ms, atraso adicionado ~{(rtt / 2 + self.interp_delay) * 1000:.0f} ms "
+                f"(RTT/2 + interpolação), tacada confirmada em {push * 1000:.1f} ms")
+
+    def _close_sockets(self):
+        if self._writer is not None:
+            self._writer.close()
+        if self._udp is not None and self._udp.transport is not None:
+            self._udp.transport.close()
@@ -0,0 +1,367 @@
+import math
+
+import numpy as np
+
+from broadphase import sweep_and_prune
+
+# --------------------
+# Configurações padrão (mesmos valores de billiards_with_buttons.py)
+# --------------------
+BALL_RADIUS = 10
+FRICTION = 0.992
+RESTITUTION = 0.90
+COL_RESTITUTION = 0.95
+POCKET_RADIUS = 28
+STOP_SPEED = 0.05         # abaixo disso a componente da velocidade é zerada
+
+SIM_RATE = 30             # ticks de física por segundo (velocidades em px/tick)
+MAX_TICKS_PER_FRAME = 5   # evita "espiral da morte" se um frame travar
+CONTACT_SLOP = 1e-3       # CCD para a bola um pouco dentro do contato
+MAX_TOI_ITERS = 4         # impactos tratados por subpasso
+SLEEP_TICKS = 5           # ticks parada antes de dormir (0 desliga)
+
+
+# --------------------
+# Mesa em arrays (struct-of-arrays)
+# --------------------
+class BallTable:
+    """
+    Guarda todas as bolas em arrays NumPy contíguos (x, y, vx, vy, cor, viva, branca)
+    e avança a física de todas de uma vez, em vez de um objeto Ball por vez.
+
+    O resultado é o mesmo do Ball.update + handle_ball_collision originais:
+    - stop_speed=0.0 desliga o corte de velocidade residual (billiards.py)
+    - pocket_on_move=False não testa caçapas dentro do movimento (billiards.py)
+    - ccd=False desliga a detecção contínua (bola rápida atravessando outra)
+
+    Bola parada (vx = vy = 0) por sleep_ticks ticks dorme: sai da integração,
+    das tabelas e das caçapas, e pares de duas bolas dormindo não são
+    resolvidos. Acorda quando outra bola encosta nela ou quando alguém mexe
+    na sua velocidade (o jogo escreve em vx/vy direto). Com a mesa toda
+    dormindo, step não faz quase nada.
+    """
+
+    def __init__(self, radius=BALL_RADIUS, friction=FRICTION, restitution=RESTITUTION,
+                 col_restitution=COL_RESTITUTION, pocket_radius=POCKET_RADIUS,
+                 stop_speed=STOP_SPEED, pocket_on_move=True, ccd=True,
+                 sleep_ticks=SLEEP_TICKS):
+        self.radius = radius
+        self.friction = friction
+        self.restitution = restitution
+        self.col_restitution = col_restitution
+        self.pocket_radius = pocket_radius
+        self.stop_speed = stop_speed
+        self.pocket_on_move = pocket_on_move
+        self.ccd = ccd
+        self.sleep_ticks = sleep_ticks
+
+        self.x = np.zeros(0)
+        self.y = np.zeros(0)
+        self.prev_x = np.zeros(0)   # posições no início do último tick (interpolação)
+        self.prev_y = np.zeros(0)
+        self.vx = np.zeros(0)
+        self.vy = np.zeros(0)
+        self.color = np.zeros((0, 3), dtype=np.uint8)
+        self.alive = np.zeros(0, dtype=bool)
+        self.is_white = np.zeros(0, dtype=bool)
+        self.asleep = np.zeros(0, dtype=bool)
+        self.still = np.zeros(0, dtype=np.int64)   # ticks seguidos parada
+
+    def __len__(self):
+        return len(self.x)
+
+    def add_ball(self, x, y, color, is_white=False):
+        """
+        Acrescenta uma bola e devolve seu índice.
+        Os arrays são realocados; isso só acontece ao montar o rack.
+        """
+        self.x = np.append(self.x, float(x))
+        self.y = np.append(self.y, float(y))
+        self.prev_x = np.append(self.prev_x, float(x))
+        self.prev_y = np.append(self.prev_y, float(y))
+        self.vx = np.append(self.vx, 0.0)
+        self.vy = np.append(self.vy, 0.0)
+        self.color = np.vstack([self.color, np.asarray(color, dtype=np.uint8)])
+        self.alive = np.append(self.alive, True)
+        self.is_white = np.append(self.is_white, bool(is_white))
+        self.asleep = np.append(self.asleep, False)
+        self.still = np.append(self.still, 0)
+        return len(self.x) - 1
+
+    @property
+    def white(self):
+        """Índice da bola branca (ou None se não houver)."""
+        idx = np.flatnonzero(self.is_white)
+        return int(idx[0]) if len(idx) else None
+
+    # --------------------
+    # Passo completo
+    # --------------------
+    def step(self, left, top, right, bottom, pockets, substeps=1):
+        """
+        Um tick de física, na mesma ordem do loop principal:
+        movimento -> colisões entre bolas -> caçapas.
+        Com substeps > 1 o tick é dividido em pedaços menores (mesmo atrito
+        total por tick), o que deixa colisões rápidas mais estáveis.
+        """
+        np.copyto(self.prev_x, self.x)
+        np.copyto(self.prev_y, self.y)
+        self._wake_moved()
+        if not (self.alive & ~self.asleep).any():
+            return
+        frac = 1.0 / substeps
+        for _ in range(substeps):
+            self._advance(left, top, right, bottom, pockets, frac)
+            self.check_pockets(pockets)
+        self._update_sleep()
+
+    # --------------------
+    # Bolas dormindo
+    # --------------------
+    @property
+    def awake(self):
+        """Bolas vivas que a física ainda está simulando."""
+        return self.alive & ~self.asleep
+
+    def wake(self, idx):
+        self.asleep[idx] = False
+        self.still[idx] = 0
+
+    def _wake_moved(self):
+        # velocidade escrita de fora (empurrão do jogo, rack novo)
+        moved = self.asleep & ((self.vx != 0.0) | (self.vy != 0.0))
+        if moved.any():
+            self.wake(moved)
+
+    def _update_sleep(self):
+        if self.sleep_ticks <= 0:
+            return
+        rest = self.awake & (self.vx == 0.0) & (self.vy == 0.0)
+        self.still = np.where(rest, self.still + 1, 0)
+        self.asleep |= rest & (self.still >= self.sleep_ticks)
+
+    def _advance(self, left, top, right, bottom, pockets, frac):
+        """
+        Avança uma fração de tick. Se uma bola rápida vai encostar em outra
+        no meio do caminho (CCD), avança só até o impacto, resolve a colisão
+        e continua com o tempo que sobrou.
+        """
+        remaining = frac
+        if self.ccd:
+            for _ in range(MAX_TOI_ITERS):
+                t = self.time_of_impact(remaining)
+                if t is None:
+                    break
+                self.move(left, top, right, bottom, pockets, t)
+                self.collide()
+                remaining -= t
+        self.move(left, top, right, bottom, pockets, remaining)
+        self.collide()
+
+    def time_of_impact(self, frac):
+        """
+        Menor fração t (0 <= t < frac) em que uma bola rápida — que anda mais
+        que o próprio raio nesta fração — encosta em outra bola viva, tratando
+        as duas como círculos varridos em movimento linear. None se não há.
+        """
+        r = self.radius
+        fast = np.flatnonzero(self.awake & (np.hypot(self.vx, self.vy) * frac > r))
+        if not len(fast):
+            return None
+        others = np.flatnonzero(self.alive)
+
+        px = self.x[others][None, :] - self.x[fast][:, None]
+        py = self.y[others][None, :] - self.y[fast][:, None]
+        rvx = self.vx[others][None, :] - self.vx[fast][:, None]
+        rvy = self.vy[others][None, :] - self.vy[fast][:, None]
+
+        # |p + v t| = D  ->  a t² + b t + c = 0
+        contact = 2 * r - CONTACT_SLOP
+        a = rvx * rvx + rvy * rvy
+        b = 2 * (px * rvx + py * rvy)
+        c = px * px + py * py - contact * contact
+        disc = b * b - 4 * a * c
+        # só pares se aproximando e ainda separados (sobrepostos ficam com a colisão normal)
+        ok = (a > 0) & (b < 0) & (c > 0) & (disc >= 0)
+        if not ok.any():
+            return None
+        t = (-b[ok] - np.sqrt(disc[ok])) / (2 * a[ok])
+        t = t[t < frac]
+        return float(t.min()) if len(t) else None
+
+    def move(self, left, top, right, bottom, pockets, frac=1.0):
+        """
+        Equivalente vetorizado de Ball.update para todas as bolas acordadas:
+        integra, aplica atrito, zera velocidade residual, ricocheteia e
+        (se pocket_on_move) derruba bolas coloridas nas caçapas.
+        frac é a fração do tick (1.0 = um Ball.update inteiro).
+        """
+        m = self.awake
+        r = self.radius
+        x, y, vx, vy = self.x, self.y, self.vx, self.vy
+
+        np.add(x, vx * frac, out=x, where=m)
+        np.add(y, vy * frac, out=y, where=m)
+
+        friction = self.friction ** frac
+        np.multiply(vx, friction, out=vx, where=m)
+        np.multiply(vy, friction, out=vy, where=m)
+
+        vx[m & (np.abs(vx) < self.stop_speed)] = 0.0
+        vy[m & (np.abs(vy) < self.stop_speed)] = 0.0
+
+        # mesma ordem de testes do Ball.update (esq, dir, topo, baixo)
+        hit = m & (x - r < left)
+        x[hit] = left + r
+        vx[hit] = np.abs(vx[hit]) * self.restitution
+        hit = m & (x + r > right)
+        x[hit] = right - r
+        vx[hit] = -np.abs(vx[hit]) * self.restitution
+        hit = m & (y - r < top)
+        y[hit] = top + r
+        vy[hit] = np.abs(vy[hit]) * self.restitution
+        hit = m & (y + r > bottom)
+        y[hit] = bottom - r
+        vy[hit] = -np.abs(vy[hit]) * self.restitution
+
+        if self.pocket_on_move:
+            # a branca não some aqui, só as coloridas
+            self.alive &= ~(m & ~self.is_white & self._in_pocket(pockets))
+
+    def collide(self):
+        """
+        Colisões entre bolas. A detecção dos pares próximos é vetorizada;
+        a resposta segue sequencial na mesma ordem (i, j) do loop original,
+        porque cada separação altera as posições vistas pelos pares seguintes.
+        Par com as duas bolas dormindo é pulado (uma bola acordada no meio
+        da passada volta a contar nos pares seguintes).
+        """
+        asleep = self.asleep
+        for i, j in self.candidate_pairs():
+            if asleep[i] and asleep[j]:
+                continue
+            self._resolve_pair(i, j)
+
+    def candidate_pairs(self):
+        """
+        Pares (i < j) de bolas vivas que podem se tocar neste passo, em ordem
+        lexicográfica, vindos do broadphase (sweep-and-prune).
+        Usa folga de 2x o diâmetro porque as separações feitas durante a
+        passada podem aproximar pares que ainda não se tocavam.
+        """
+        i, j = sweep_and_prune(self.x, self.y, self.alive, 4 * self.radius)
+        return list(zip(i.tolist(), j.tolist()))
+
+    def _resolve_pair(self, i, j):
+        """Mesma colisão elástica simplificada de handle_ball_collision (massas iguais)."""
+        x, y, vx, vy = self.x, self.y, self.vx, self.vy
+        if not self.alive[i] or not self.alive[j]:
+            return
+        dx = x[j] - x[i]
+        dy = y[j] - y[i]
+        dist = math.hypot(dx, dy)
+        if dist <= 0:
+            return
+        min_dist = 2 * self.radius
+        if dist >= min_dist:
+            return
+
+        nx = dx / dist
+        ny = dy / dist
+        overlap = (min_dist - dist)
+        if self.asleep[i] or self.asleep[j]:
+            self.wake([i, j])
+        # separar bolas
+        x[i] -= nx * overlap / 2
+        y[i] -= ny * overlap / 2
+        x[j] += nx * overlap / 2
+        y[j] += ny * overlap / 2
+
+        # vetores tangente/normal
+        tx = -ny
+        ty = nx
+
+        v1n = vx[i] * nx + vy[i] * ny
+        v1t = vx[i] * tx + vy[i] * ty
+        v2n = vx[j] * nx + vy[j] * ny
+        v2t = vx[j] * tx + vy[j] * ty
+
+        # trocam as componentes normais (massas iguais)
+        v1n, v2n = v2n, v1n
+
+        c = self.col_restitution
+        vx[i] = (v1n * nx + v1t * tx) * c
+        vy[i] = (v1n * ny + v1t * ty) * c
+        vx[j] = (v2n * nx + v2t * tx) * c
+        vy[j] = (v2n * ny + v2t * ty) * c
+
+    def check_pockets(self, pockets):
+        """Remove qualquer bola viva (inclusive a branca) que esteja sobre uma caçapa."""
+        self.alive &= ~self._in_pocket(pockets)
+
+    def _in_pocket(self, pockets):
+        if not len(pockets) or not len(self.x):
+            return np.zeros(len(self.x), dtype=bool)
+        p = np.asarray(pockets, dtype=float)
+        d = np.hypot(self.x[:, None] - p[None, :, 0], self.y[:, None] - p[None, :, 1])
+        return (d < self.pocket_radius).any(axis=1)
+
+    # --------------------
+    # Consultas usadas pelo jogo
+    # --------------------
+    def render_positions(self, alpha):
+        """Posições interpoladas entre o tick anterior e o atual (0 <= alpha <= 1)."""
+        return (self.prev_x + (self.x - self.prev_x) * alpha,
+                self.prev_y + (self.y - self.prev_y) * alpha)
+
+    def white_alive(self):
+        return bool((self.alive & self.is_white).any())
+
+    def any_color_alive(self):
+        return bool((self.alive & ~self.is_white).any())
+
+    def any_moving(self):
+        return bool((self.alive & ((self.vx != 0.0) | (self.vy != 0.0))).any())
+
+
+# --------------------
+# Relógio de simulação (passo fixo)
+# --------------------
+class SimClock:
+    """
+    Acumulador de passo fixo: a física avança em ticks de 1/tick_rate s,
+    independente do FPS da câmera. advance(now) devolve quantos ticks rodar
+    neste frame; alpha diz quanto do próximo tick já passou (interpolação).
+    """
+
+    def __init__(self, tick_rate=SIM_RATE, max_ticks=MAX_TICKS_PER_FRAME):
+        self.dt = 1.0 / tick_rate
+        self.max_ticks = max_ticks
+        self.acc = 0.0
+        self.ticks = 0
+        self.last = None
+
+    @property
+    def time(self):
+        """Tempo de simulação em segundos (só anda em ticks inteiros)."""
+        return self.ticks * self.dt
+
+    @property
+    def alpha(self):
+        return self.acc / self.dt
+
+    def advance(self, now):
+        if self.last is None:
+            self.last = now
+            return 0
+        self.acc += max(0.0, now - self.last)
+        self.last = now
+        n = int(self.acc // self.dt)
+        if n > self.max_ticks:
+            # frame travado: descarta o excesso em vez de acumular atraso
+            n = self.max_ticks
+            self.acc = 0.0
+        else:
+            self.acc -= n * self.dt
+        self.ticks += n
+        return n
@@ -0,0 +1,206 @@
+import asyncio
+import collections
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+# --------------------
+# Configurações
+# --------------------
+QUEUE_SIZE = 2            # frames esperando entre duas etapas
+DEPTH_WINDOW = 300        # amostras de profundidade (uma por put) na média
+
+END = object()            # fim da entrada: passa por todas as etapas e fecha o pipeline
+
+
+# --------------------
+# Fila entre etapas
+# --------------------
+class StageQueue:
+    """
+    Fila limitada entre duas etapas. Cheia, segue a política:
+    "drop_oldest" descarta o item mais velho e a etapa de trás nunca espera
+    (uma etapa lenta perde frames em vez de travar as outras; câmera ao
+    vivo) e "block" faz a etapa de trás esperar (nenhum frame se perde:
+    entrada gravada/roteirizada, que precisa dar sempre o mesmo jogo).
+
+    merge(descartado, próximo): com drop_oldest, chamado a cada descarte
+    com o item que sai da fila em seguida (ou o que está entrando, se a
+    fila ficou vazia), para não perder o que só o descartado trazia.
+
+    Métricas: depth (agora), max_depth, mean_depth (nos últimos puts),
+    passed (itens entregues) e dropped (descartados).
+    """
+
+    def __init__(self, name, maxsize=QUEUE_SIZE, policy="drop_oldest", merge=None):
+        if policy not in ("drop_oldest", "block"):
+            raise ValueError(f"política desconhecida: {policy}")
+        self.name = name
+        self.policy = policy
+        self.merge = merge
+        self._queue = asyncio.Queue(maxsize)
+        self.max_depth = 0
+        self.passed = 0
+        self.dropped = 0
+        self._depths = collections.deque(maxlen=DEPTH_WINDOW)
+
+    @property
+    def depth(self):
+        return self._queue.qsize()
+
+    @property
+    def mean_depth(self):
+        return sum(self._depths) / len(self._depths) if self._depths else 0.0
+
+    async def put(self, item):
+        if self.policy == "drop_oldest" and item is not END:
+            while self._queue.full():
+                self._drop(item)
+            self._queue.put_nowait(item)
+            await asyncio.sleep(0)     # deixa a etapa da frente pegar (a de trás não espera)
+        else:
+            await self._queue.put(item)
+        self._depths.append(self._queue.qsize())
+        self.max_depth = max(self.max_depth, self._queue.qsize())
+
+    def _drop(self, incoming):
+        old = self._queue.get_nowait()
+        self.dropped += 1
+        if self.merge is not None:
+            # o próximo a sair é o novo primeiro da fila: tira e devolve na ordem
+            rest = [self._queue.get_nowait() for _ in range(self._queue.qsize())]
+            self.merge(old, rest[0] if rest else incoming)
+            for item in rest:
+                self._queue.put_nowait(item)
+
+    async def get(self):
+        item = await self._queue.get()
+        if item is not END:
+            self.passed += 1
+        return item
+
+    def describe(self):
+        return (f"{self.name:<22} média {self.mean_depth:4.2f}  máx {self.max_depth}  "
+                f"passaram {self.passed}  descartados {self.dropped}")
+
+
+# --------------------
+# Etapas
+# --------------------
+class Pipeline:
+    """
+    Etapas em sequência, cada uma uma task asyncio ligada à seguinte por uma
+    StageQueue. Uma etapa recebe um item e devolve o item para a próxima
+    (None: nada a passar adiante; END: encerra). A primeira não recebe
+    nada (fonte); quando a última termina, as outras são canceladas.
+
+        pipe = Pipeline(policy)
+        pipe.stage("capture", read_frame, executor=True)
+        pipe.stage("simulation", simulate, executor=True)
+        pipe.stage("sink", show)
+        asyncio.run(pipe.run())
+
+    executor=True roda a etapa numa thread só dela (o estado da etapa
+    continua sendo tocado por uma thread de cada vez); sem executor ela roda
+    no próprio laço, para etapas curtas. close() roda no fim, na mesma
+    thread da etapa (ex.: fechar a janela na thread que a abriu); stop()
+    roda antes, no laço, para destravar uma etapa parada numa espera (ex.:
+    a captura esperando a câmera). merge vai para a fila de entrada da
+    etapa (StageQueue). Com
+    profiler, a etapa marca os próprios passos (prof.mark, na linha dela no
+    trace), cada chamada vira um evento em volta deles (span) e a última
+    etapa marca o frame.
+    """
+
+    def __init__(self, policy="drop_oldest", maxsize=QUEUE_SIZE, profiler=None):
+        self.policy = policy
+        self.maxsize = maxsize
+        self.profiler = profiler
+        self.queues = []
+        self._stages = []
+
+    def stage(self, name, fn, executor=False, close=None, stop=None, merge=None):
+        inbox = None
+        if self._stages:
+            prev = self._stages[-1][0]
+            inbox = StageQueue(f"{prev} -> {name}", self.maxsize, self.policy, merge)
+            self.queues.append(inbox)
+        pool = ThreadPoolExecutor(1, thread_name_prefix=name) if executor else None
+        self._stages.append((name, fn, inbox, pool, close, stop))
+        if self.profiler is not None:
+            self.profiler.lane_names[len(self._stages) + 2] = name
+
+    async def _run_stage(self, index):
+        name, fn, inbox, pool, _, _ = self._stages[index]
+        outbox = self._stages[index + 1][2] if index + 1 < len(self._stages) else None
+        last = outbox is None
+        loop = asyncio.get_running_loop()
+        prof = self.profiler
+        while True:
+            if inbox is None:
+                item = None
+            else:
+                item = await inbox.get()
+                if item is END:
+                    break
+            t0 = time.perf_counter()
+            if pool is not None:
+                out = await loop.run_in_executor(pool, self._call, fn, item, index + 3)
+            else:
+                out = self._call(fn, item, index + 3)
+            if prof is not None and prof.enabled:
+                prof.span(name, t0, time.perf_counter() - t0, lane=index + 3)
+                if last:
+                    prof.begin_frame()
+            if out is END:
+                break
+            if outbox is not None and out is not None:
+                await outbox.put(out)
+        if outbox is not None:
+            await outbox.put(END)
+
+    def _call(self, fn, item, lane):
+        # na thread da etapa: as marcas (prof.mark) de dentro dela contam daqui;
+        # item None só na fonte (as filas nunca passam None)
+        if self.profiler is not None:
+            self.profiler.start(lane)
+        return fn() if item is None else fn(item)
+
+    async def run(self):
+        tasks = [asyncio.create_task(self._run_stage(k), name=self._stages[k][0])
+                 for k in range(len(self._stages))]
+        try:
+            pending = set(tasks)
+            while tasks[-1] in pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        raise task.exception()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            # cancelar a task não para a thread: uma etapa presa numa espera
+            # (câmera sem frame) seguraria o shutdown abaixo para sempre
+            for *_, stop in self._stages:
+                if stop is not None:
+                    stop()
+            for _, _, _, pool, close, _ in self._stages:
+                if pool is not None:
+                    if close is not None:
+                        pool.submit(close).result()
+                    pool.shutdown(wait=True)
+                elif close is not None:
+                    close()
+
+
+def draw_queues(frame, queues, origin=(10, 40)):
+    """Profundidade média/máxima e descartes de cada fila, uma linha por fila."""
+    x, y = origin
+    h = frame.shape[0]
+    for k, q in enumerate(queues):
+        org_y = h - y - 16 * (len(queues) - 1 - k)
+        cv2.putText(frame, f"{q.name}: {q.depth}/{q.mean_depth:.1f}/{q.max_depth} -{q.dropped}",
+                    (x, org_y), cv2.FONT_HERSHEY_PLAIN, 1.0, (220, 255, 220), 1)
+    return frame
@@ -0,0 +1,126 @@
+import math
+
+import numpy as np
+
+from hand_worker import NUM_LANDMARKS
+
+# --------------------
+# Configurações
+# --------------------
+MAX_PREDICT = 0.25        # s; além disso a previsão fica parada no último ponto
+VELOCITY_SMOOTHING = 0.5  # peso da velocidade antiga na média exponencial
+INFER_BUDGET = 0.5        # fração do tempo de um frame que a inferência pode custar
+MAX_INFER_EVERY = 4       # no máximo 1 inferência a cada 4 frames
+COST_SMOOTHING = 0.9
+
+
+# --------------------
+# Previsão dos landmarks entre inferências
+# --------------------
+class LandmarkPredictor:
+    """
+    Velocidade constante para os 21 pontos de cada mão: guarda, por slot, o
+    último resultado da inferência com seu instante e a velocidade (média
+    exponencial entre resultados consecutivos), e extrapola para o instante
+    de qualquer frame. Um slot por mão rastreada, tudo em arrays
+    pré-alocados (hands, 21, 3); predict não aloca se recebe out.
+
+    Uso (uma mão):
+        predictor.update(result_time, landmarks)   # só quando chega resultado
+        lm = predictor.predict(now)                # todo frame
+    Várias mãos: update(t, mãos (k, 21, 3), slots (k,)), predict_all(now).
+    """
+
+    def __init__(self, hands=1, max_predict=MAX_PREDICT, smoothing=VELOCITY_SMOOTHING):
+        self.max_predict = max_predict
+        self.smoothing = smoothing
+        self.pos = np.zeros((hands, NUM_LANDMARKS, 3), dtype=np.float32)
+        self.vel = np.zeros((hands, NUM_LANDMARKS, 3), dtype=np.float32)
+        self.t = np.zeros(hands)
+        self.valid = np.zeros(hands, dtype=bool)
+        self._has_vel = np.zeros(hands, dtype=bool)
+        self._dt = np.zeros(hands, dtype=np.float32)
+        self._out = np.zeros((hands, NUM_LANDMARKS, 3), dtype=np.float32)
+
+    def update(self, t, landmarks, slots=None):
+        if slots is None:
+            slots = [0]
+            landmarks = np.asarray(landmarks)[None]
+        slots = np.asarray(slots)
+        dt = t - self.t[slots]
+        moved = self.valid[slots] & (dt > 0)
+        if moved.any():
+            k = slots[moved]
+            inst = (landmarks[moved] - self.pos[k]) / dt[moved, None, None].astype(np.float32)
+            keep = np.where(self._has_vel[k], self.smoothing, 0.0).astype(np.float32)
+            self.vel[k] = keep[:, None, None] * self.vel[k] + (1.0 - keep[:, None, None]) * inst
+            self._has_vel[k] = True
+        self.pos[slots] = landmarks
+        self.t[slots] = t
+        self.valid[slots] = True
+
+    def reset(self, slots=0):
+        """Mão perdida: a próxima detecção no slot começa sem velocidade."""
+        self.valid[slots] = False
+        self._has_vel[slots] = False
+        self.vel[slots] = 0.0
+
+    def predict(self, t, slot=0, out=None):
+        """Landmarks (21, 3) previstos no instante t (None se não há mão no slot)."""
+        if not self.valid[slot]:
+            return None
+        if out is None:
+            out = self._out[slot]
+        dt = min(max(t - self.t[slot], 0.0), self.max_predict)
+        np.multiply(self.vel[slot], dt, out=out)
+        out += self.pos[slot]
+        return out
+
+    def predict_all(self, t, out=None):
+        """(hands, 21, 3) previstos no instante t; slots inválidos ficam parados."""
+        if out is None:
+            out = self._out
+        np.clip(t - self.t, 0.0, self.max_predict, out=self._dt, casting="unsafe")
+        np.multiply(self.vel, self._dt[:, None, None], out=out)
+        out += self.pos
+        return out
+
+
+# --------------------
+# Quando mandar inferência
+# --------------------
+class InferenceScheduler:
+    """
+    Decide em quais frames mandar o frame para o HandWorker: 1 a cada N, com
+    N escolhido pelo custo medido da inferência (worker.cost) em relação ao
+    intervalo entre frames, para a inferência não passar de INFER_BUDGET do
+    tempo de cada frame. every > 0 fixa N (ex.: 1 no modo passo-a-passo,
+    que precisa ser determinístico).
+    """
+
+    def __init__(self, every=0, budget=INFER_BUDGET, max_every=MAX_INFER_EVERY):
+        self.fixed = every
+        self.budget = budget
+        self.max_every = max_every
+        self.every = every or 1
+        self.frame_period = 0.0
+        self._last_time = None
+        self._since = 0
+
+    def due(self, now, cost=0.0):
+        """Chamado uma vez por frame; True se este frame deve ir para inferência."""
+        if self._last_time is not None and now > self._last_time:
+            dt = now - self._last_time
+            if self.frame_period == 0.0:
+                self.frame_period = dt
+            else:
+                self.frame_period += (1.0 - COST_SMOOTHING) * (dt - self.frame_period)
+        self._last_time = now
+        if not self.fixed and cost > 0.0 and self.frame_period > 0.0:
+            n = math.ceil(cost / (self.budget * self.frame_period))
+            self.every = min(max(n, 1), self.max_every)
+        self._since += 1
+        return self._since >= self.every
+
+    def submitted(self):
+        self._since = 0
@@ -0,0 +1,271 @@
+import csv
+import json
+import math
+import threading
+import time
+
+import cv2
+
+# --------------------
+# Configurações
+# --------------------
+HIST_MIN = 1e-6           # s; limite inferior do primeiro bin (1 us)
+BINS_PER_DECADE = 20      # resolução ~12% por bin
+HIST_BINS = 120           # 1 us .. 1 s (6 décadas)
+ROLLING_FRAMES = 300      # janela dos percentis (~10 s a 30 fps)
+HUD_REFRESH = 0.5         # s entre atualizações do texto do HUD
+TRACE_MAX_EVENTS = 500_000
+
+
+# --------------------
+# Histograma com janela deslizante
+# --------------------
+class RollingHistogram:
+    """
+    Últimas `window` amostras (s) em bins logarítmicos de tamanho fixo:
+    add é O(1) (entra a nova, sai a mais velha do anel) e percentis saem
+    da contagem acumulada dos bins, sem guardar nem ordenar as amostras.
+    """
+
+    def __init__(self, window=ROLLING_FRAMES, bins=HIST_BINS):
+        self.counts = [0] * bins
+        self.total = 0
+        self._ring = [-1] * window
+        self._head = 0
+
+    def add(self, seconds):
+        if seconds <= HIST_MIN:
+            b = 0
+        else:
+            b = min(int(math.log10(seconds / HIST_MIN) * BINS_PER_DECADE), len(self.counts) - 1)
+        old = self._ring[self._head]
+        if old >= 0:
+            self.counts[old] -= 1
+        else:
+            self.total += 1
+        self._ring[self._head] = b
+        self.counts[b] += 1
+        self._head = (self._head + 1) % len(self._ring)
+
+    def percentiles(self, qs=(50, 95, 99)):
+        """Percentis (s) pelo centro geométrico do bin; 0.0 sem amostras."""
+        if not self.total:
+            return [0.0] * len(qs)
+        out = []
+        targets = [q / 100.0 * self.total for q in qs]
+        seen = 0
+        k = 0
+        for b, c in enumerate(self.counts):
+            seen += c
+            while k < len(targets) and seen >= targets[k]:
+                out.append(HIST_MIN * 10 ** ((b + 0.5) / BINS_PER_DECADE))
+                k += 1
+            if k == len(targets):
+                break
+        return out
+
+
+# --------------------
+# Profiler por etapa do loop principal
+# --------------------
+class StageProfiler:
+    """
+    Tempo de cada etapa do loop, por marcas em sequência:
+
+        prof.begin_frame()
+        ret, frame, t = cap.read();   prof.mark("read")
+        frame = cv2.flip(frame, 1);   prof.mark("flip")
+        ...
+
+    mark(nome) fecha a etapa que começou na marca anterior; a mesma etapa
+    marcada duas vezes no frame soma. Cada thread tem a sua marca anterior:
+    uma etapa do pipeline (pipeline.py) chama start(linha) na thread dela e
+    marca os passos de dentro, que vão para a linha dela no trace. Cada
+    etapa tem um RollingHistogram (p50/p95/p99 dos últimos frames);
+    add(nome, s) registra um tempo medido fora (ex.: inferência no processo
+    do HandWorker) e span(nome, início, s) só um evento no trace.
+
+    No pipeline as etapas andam em frames diferentes ao mesmo tempo (a
+    captura já lê o N + 2 enquanto a saída mostra o N), então os tempos de
+    um "frame" não são os de um frame só: são o tempo de relógio gasto em
+    cada passo, em cada linha, entre duas chamadas de begin_frame (a saída
+    de dois frames seguidos). É a carga de cada passo por frame mostrado,
+    não a latência de um frame pelo pipeline. draw_hud desenha FPS
+    e a quebra por etapa no frame; export grava os eventos (trace=True) em
+    Chrome trace (.json, abre em chrome://tracing ou Perfetto) ou CSV.
+
+    Desligado (enabled=False) cada chamada só testa um atributo e volta.
+    """
+
+    def __init__(self, enabled=True, trace=False, window=ROLLING_FRAMES):
+        self.enabled = enabled
+        self.trace = trace
+        self.window = window
+        self.stages = {}             # nome -> RollingHistogram, na ordem em que apareceram
+        self.frame = RollingHistogram(window)
+        self.frames = 0
+        self.events = []             # (frame, etapa, início s, duração s, linha)
+        self.lane_names = {0: "loop", 1: "hand worker", 2: "frames"}   # linhas do trace
+        self._totals = {}
+        self._t0 = None
+        self._local = threading.local()   # marca anterior e linha do trace, por thread
+        self._lock = threading.Lock()     # marcas de várias threads no mesmo frame
+        self._hud = []
+        self._hud_time = 0.0
+
+    def _stage(self, name):
+        hist = self.stages.get(name)
+        if hist is None:
+            hist = self.stages[name] = RollingHistogram(self.window)
+        return hist
+
+    def _event(self, name, start, duration, lane=0):
+        if self.trace and len(self.events) < TRACE_MAX_EVENTS:
+            self.events.append((self.frames, name, start, duration, lane))
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        with self._lock:
+            if self._t0 is not None:
+                self._end_frame(now)
+            self.frames += 1
+            self._t0 = now
+        self._local.last = now
+
+    def _end_frame(self, now):
+        self.frame.add(now - self._t0)
+        self._event("frame", self._t0, now - self._t0, lane=2)
+        for name, total in self._totals.items():
+            self._stage(name).add(total)
+        self._totals.clear()
+
+    def start(self, lane=0):
+        """Começo de uma etapa nesta thread: o próximo mark dela conta daqui, na linha lane."""
+        if not self.enabled:
+            return
+        self._local.last = time.perf_counter()
+        self._local.lane = lane
+
+    def mark(self, name):
+        if not self.enabled:
+            return
+        last = getattr(self._local, "last", None)
+        if last is None:
+            return
+        now = time.perf_counter()
+        with self._lock:
+            self._totals[name] = self._totals.get(name, 0.0) + (now - last)
+            self._event(name, last, now - last, getattr(self._local, "lane", 0))
+        self._local.last = now
+
+    def add(self, name, seconds, lane=1):
+        """Tempo medido em outro lugar; no trace termina no instante da chamada."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._totals[name] = self._totals.get(name, 0.0) + seconds
+            self._event(name, time.perf_counter() - seconds, seconds, lane)
+
+    def span(self, name, start, seconds, lane=0):
+        """Só um evento no trace (ex.: a etapa inteira em volta das marcas dela)."""
+        if self.enabled:
+            with self._lock:
+                self._event(name, start, seconds, lane)
+
+    # --------------------
+    # Consulta, HUD e exportação
+    # --------------------
+    def summary(self):
+        """{etapa: (p50, p95, p99) em ms}, com "frame" (o loop inteiro) primeiro."""
+        with self._lock:   # begin_frame soma nos histogramas em outra thread
+            out = {"frame": tuple(p * 1000 for p in self.frame.percentiles())}
+            for name, hist in self.stages.items():
+                out[name] = tuple(p * 1000 for p in hist.percentiles())
+        return out
+
+    def fps(self):
+        with self._lock:
+            p50 = self.frame.percentiles((50,))[0]
+        return 1.0 / p50 if p50 > 0 else 0.0
+
+    def draw_hud(self, frame, origin=(10, 60)):
+        """FPS e p50/p95/p99 (ms) de cada etapa, num painel escuro no canto."""
+        if not self.enabled:
+            return frame
+        now = time.perf_counter()
+        if now - self._hud_time > HUD_REFRESH:
+            self._hud_time = now
+            self._hud = [(f"FPS {self.fps():.1f}", "p50 / p95 / p99 ms")]
+            for name, (p50, p95, p99) in self.summary().items():
+                self._hud.append((name, f"{p50:6.2f} {p95:6.2f} {p99:6.2f}"))
+        x, y = origin
+        line = 16
+        h, w = frame.shape[:2]
+        x1, y1 = min(x + 290, w), min(y + line * len(self._hud) + 6, h)
+        if x1 > x and y1 > y:
+            panel = frame[y:y1, x:x1]
+            panel //= 3
+        for k, (name, values) in enumerate(self._hud):
+            org_y = y + line * (k + 1)
+            cv2.putText(frame, name, (x + 6, org_y), cv2.FONT_HERSHEY_PLAIN, 1.0, (220, 255, 220), 1)
+            cv2.putText(frame, values, (x + 130, org_y), cv2.FONT_HERSHEY_PLAIN, 1.0, (220, 255, 220), 1)
+        return frame
+
+    def export(self, path):
+        """Eventos gravados em .json (Chrome trace) ou .csv, pela extensão."""
+        t0 = min((e[2] for e in self.events), default=0.0)
+        if path.endswith(".json"):
+            trace = [{"name": "thread_name", "ph": "M", "pid": 0, "tid": tid,
+                      "args": {"name": name}} for tid, name in self.lane_names.items()]
+            for frame, name, start, duration, lane in self.events:
+                trace.append({"name": name, "ph": "X", "pid": 0, "tid": lane,
+                              "ts": (start - t0) * 1e6, "dur": duration * 1e6,
+                              "args": {"frame": frame}})
+            with open(path, "w") as f:
+                json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+        elif path.endswith(".csv"):
+            with open(path, "w", newline="") as f:
+                out = csv.writer(f)
+                out.writerow(["frame", "stage", "start_ms", "duration_ms"])
+                for frame, name, start, duration, _ in self.events:
+                    out.writerow([frame, name, f"{(start - t0) * 1000:.4f}",
+                                  f"{duration * 1000:.4f}"])
+        else:
+            raise ValueError(f"formato de trace desconhecido (use .json ou .csv): {path}")
+
+
+# --------------------
+# Tempo de inicialização
+# --------------------
+class StartupTimer:
+    """
+    Tempo desde t0 (início do script) até o primeiro frame na tela e até a
+    primeira mão detectada; frame() e detection() só contam a primeira vez
+    (detection devolve True nela). report é a linha para o console, com o
+    tempo de carregar o modelo se ele é conhecido.
+    """
+
+    def __init__(self, t0=None):
+        self.t0 = time.perf_counter() if t0 is None else t0
+        self.first_frame = None
+        self.first_detection = None
+
+    def frame(self):
+        if self.first_frame is None:
+            self.first_frame = time.perf_counter() - self.t0
+
+    def detection(self):
+        if self.first_detection is not None:
+            return False
+        self.first_detection = time.perf_counter() - self.t0
+        return True
+
+    def report(self, model_time=None):
+        frame = "nenhum" if self.first_frame is None else f"{self.first_frame:.2f} s"
+        hand = "nenhuma" if self.first_detection is None else f"{self.first_detection:.2f} s"
+        line = f"inicialização: primeiro frame {frame}, primeira mão {hand}"
+        if model_time is not None:
+            line += f" (modelo carregado e aquecido em {model_time:.2f} s)"
+        return line
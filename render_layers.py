@@ -0,0 +1,222 @@
+import cv2
+import numpy as np
+
+# --------------------
+# Camada estática (mesa, caçapas, botões, textos)
+# --------------------
+class StaticLayer:
+    """
+    Elementos que não mudam de um frame para o outro, desenhados uma vez num
+    overlay do tamanho do frame, com a máscara (alfa) dos pixels tocados.
+    Cada desenho anota a caixa que ocupa (o contorno de um retângulo vira as
+    4 faixas dos lados); blend() copia só essas caixas para o frame da câmera
+    com cv2.copyTo e mistura à parte as poucas bordas suaves (antialiasing).
+
+    Os métodos de desenho têm os mesmos argumentos do cv2 (sem a imagem);
+    button devolve o retângulo do botão e o guarda em rects[nome].
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.overlay = np.zeros((height, width, 3), dtype=np.uint8)
+        self.mask = np.zeros((height, width), dtype=np.uint8)
+        self.rects = {}
+        self._boxes = []          # (x0, y0, x1, y1) de cada desenho
+        self._patches = None
+
+    def _box(self, x0, y0, x1, y1):
+        self._boxes.append((max(x0, 0), max(y0, 0), min(x1, self.width), min(y1, self.height)))
+
+    def rectangle(self, pt1, pt2, color, thickness=1):
+        cv2.rectangle(self.overlay, pt1, pt2, color, thickness)
+        cv2.rectangle(self.mask, pt1, pt2, 255, thickness)
+        (x0, y0), (x1, y1) = pt1, pt2
+        if thickness < 0:
+            self._box(x0, y0, x1 + 1, y1 + 1)
+        else:
+            t = thickness // 2 + 1
+            self._box(x0 - t, y0 - t, x1 + t + 1, y0 + t + 1)
+            self._box(x0 - t, y1 - t, x1 + t + 1, y1 + t + 1)
+            self._box(x0 - t, y0 - t, x0 + t + 1, y1 + t + 1)
+            self._box(x1 - t, y0 - t, x1 + t + 1, y1 + t + 1)
+
+    def circle(self, center, radius, color, thickness=1):
+        cv2.circle(self.overlay, center, radius, color, thickness)
+        cv2.circle(self.mask, center, radius, 255, thickness)
+        r = radius + max(thickness, 0) // 2 + 2
+        self._box(center[0] - r, center[1] - r, center[0] + r + 1, center[1] + r + 1)
+
+    def text(self, text, org, font_face, font_scale, color, thickness=1):
+        cv2.putText(self.overlay, text, org, font_face, font_scale, color, thickness)
+        cv2.putText(self.mask, text, org, font_face, font_scale, 255, thickness)
+        (tw, th), base = cv2.getTextSize(text, font_face, font_scale, thickness)
+        pad = thickness + 2
+        self._box(org[0] - pad, org[1] - th - pad, org[0] + tw + pad, org[1] + base + pad)
+
+    def button(self, name, text, center, size=(160, 60)):
+        cx, cy = center
+        w, h = size
+        left, top = cx - w//2, cy - h//2
+        right, bottom = cx + w//2, cy + h//2
+        self.rectangle((left, top), (right, bottom), (50, 50, 200), -1)
+        self.text(text, (left+20, cy+8), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255,255,255), 2)
+        self.rects[name] = (left, top, right, bottom)
+        return self.rects[name]
+
+    def _prepare(self):
+        # cada pixel fica com a primeira caixa que o contém. Caixa só com
+        # pixels cobertos por inteiro: cópia com a máscara (cv2.copyTo).
+        # Caixa com bordas suaves (0 < máscara < 255): o overlay está sobre
+        # preto, ou seja, já vem multiplicado pelo alfa, e o resultado é
+        # overlay + frame * (255 - alfa) / 255 na caixa toda
+        self._patches = []
+        claimed = np.zeros(self.mask.shape, dtype=bool)
+        for x0, y0, x1, y1 in self._boxes:
+            if x1 <= x0 or y1 <= y0:
+                continue
+            rows, cols = slice(y0, y1), slice(x0, x1)
+            alpha = np.where(claimed[rows, cols], 0, self.mask[rows, cols])
+            claimed[rows, cols] |= alpha > 0
+            if not alpha.any():
+                continue
+            values = np.where(alpha[:, :, None] > 0, self.overlay[rows, cols], 0).astype(np.uint8)
+            if ((alpha == 0) | (alpha == 255)).all():
+                self._patches.append((rows, cols, values, (alpha == 255).astype(np.uint8), None))
+            else:
+                keep = np.repeat((255 - alpha)[:, :, None], 3, axis=2).astype(np.uint8)
+                self._patches.append((rows, cols, values, None, keep))
+
+    def blend(self, frame):
+        """Aplica a camada sobre frame (h, w, 3), no lugar."""
+        if self._patches is None:
+            self._prepare()
+        for rows, cols, values, mask, keep in self._patches:
+            under = frame[rows, cols]
+            if keep is None:
+                cv2.copyTo(values, mask, under)
+            else:
+                cv2.add(cv2.multiply(under, keep, scale=1/255), values, dst=under)
+        return frame
+
+
+class LayerCache:
+    """
+    Guarda as camadas já montadas por (largura, altura, *chave). build(w, h,
+    *chave) monta uma StaticLayer nova quando a chave (ex.: estado do jogo)
+    ainda não foi vista; se o tamanho do frame muda, tudo é descartado.
+    """
+
+    def __init__(self, build):
+        self.build = build
+        self._size = None
+        self._layers = {}
+
+    def get(self, width, height, *key):
+        if (width, height) != self._size:
+            self._size = (width, height)
+            self._layers.clear()
+        layer = self._layers.get(key)
+        if layer is None:
+            layer = self._layers[key] = self.build(width, height, *key)
+        return layer
+
+
+# --------------------
+# Sprites das bolas (antialiasing e sombreado)
+# --------------------
+SPRITE_SUPERSAMPLE = 4        # amostras por eixo em cada pixel da borda
+LIGHT_DIR = (-0.45, -0.55, 0.70)
+
+
+def ball_sprite(color, radius, shading=True, supersample=SPRITE_SUPERSAMPLE):
+    """
+    Imagem (s, s, 3) de uma bola centrada no pixel (c, c), s = 2c + 1,
+    já multiplicada pelo alfa, e keep = 255 - alfa. A cobertura de cada
+    pixel vem de supersample² amostras (borda suave); com shading a cor é
+    iluminada como uma esfera (difusa + brilho especular).
+    """
+    c = radius + 1
+    s = 2 * c + 1
+    sub = (np.arange(s * supersample) + 0.5) / supersample - 0.5 - c
+    inside = np.hypot(sub[None, :], sub[:, None]) <= radius + 0.5
+    alpha = inside.reshape(s, supersample, s, supersample).mean(axis=(1, 3))
+
+    rgb = np.empty((s, s, 3))
+    rgb[:] = color
+    if shading:
+        px = np.arange(s) - c
+        nx = px[None, :] / (radius + 0.5)
+        ny = px[:, None] / (radius + 0.5)
+        nz = np.sqrt(np.clip(1.0 - nx * nx - ny * ny, 0.0, 1.0))
+        light = np.asarray(LIGHT_DIR) / np.linalg.norm(LIGHT_DIR)
+        lit = np.clip(nx * light[0] + ny * light[1] + nz * light[2], 0.0, 1.0)
+        rgb = rgb * (0.55 + 0.45 * lit)[:, :, None] + 255.0 * 0.6 * (lit ** 24)[:, :, None]
+
+    a = np.round(alpha * 255.0)
+    values = np.round(np.clip(rgb, 0.0, 255.0) * (a / 255.0)[:, :, None]).astype(np.uint8)
+    keep = np.repeat((255.0 - a)[:, :, None], 3, axis=2).astype(np.uint8)
+    return values, keep
+
+
+class BallSprites:
+    """
+    Cache de sprites por (cor, raio): cada bola é desenhada uma vez e depois
+    só misturada no frame (overlay + frame * keep / 255) na fatia em volta
+    da posição inteira da bola, cortada nas bordas do frame.
+
+    Uso:
+        sprites = BallSprites()
+        sprites.draw(frame, xs, ys, cores, raio, vivas)
+    """
+
+    def __init__(self, shading=True, supersample=SPRITE_SUPERSAMPLE):
+        self.shading = shading
+        self.supersample = supersample
+        self._cache = {}
+
+    def get(self, color, radius):
+        key = (tuple(int(k) for k in color), int(radius))
+        sprite = self._cache.get(key)
+        if sprite is None:
+            sprite = self._cache[key] = ball_sprite(key[0], key[1], self.shading, self.supersample)
+        return sprite
+
+    def blit(self, frame, sprite, x, y):
+        """Mistura sprite com centro no pixel (x, y); nada se estiver fora do frame."""
+        values, keep = sprite
+        c = len(values) // 2
+        h, w = frame.shape[:2]
+        x0, y0 = x - c, y - c
+        x1, y1 = x0 + len(values), y0 + len(values)
+        cx0, cy0 = max(x0, 0), max(y0, 0)
+        cx1, cy1 = min(x1, w), min(y1, h)
+        if cx1 <= cx0 or cy1 <= cy0:
+            return
+        rows = slice(cy0 - y0, cy1 - y0)
+        cols = slice(cx0 - x0, cx1 - x0)
+        under = frame[cy0:cy1, cx0:cx1]
+        cv2.add(cv2.multiply(under, keep[rows, cols], scale=1/255), values[rows, cols], dst=under)
+
+    def draw(self, frame, xs, ys, colors, radius, alive=None):
+        """Desenha as bolas (posições em px, arredondadas) na ordem dos arrays."""
+        radius = int(radius)
+        colors = [tuple(k) for k in np.asarray(colors).tolist()]
+        alive = [True] * len(colors) if alive is None else np.asarray(alive).tolist()
+        xs = np.rint(xs).astype(np.int64).tolist()
+        ys = np.rint(ys).astype(np.int64).tolist()
+        h, w = frame.shape[:2]
+        size = 2 * (int(radius) + 1) + 1
+        c = size // 2
+        multiply, add = cv2.multiply, cv2.add
+        for i in range(len(xs)):
+            if not alive[i]:
+                continue
+            sprite = self._cache.get((colors[i], radius)) or self.get(colors[i], radius)
+            x0, y0 = xs[i] - c, ys[i] - c
+            if x0 < 0 or y0 < 0 or x0 + size > w or y0 + size > h:
+                self.blit(frame, sprite, xs[i], ys[i])      # corta na borda
+                continue
+            under = frame[y0:y0 + size, x0:x0 + size]
+            add(multiply(under, sprite[1], scale=1/255), sprite[0], dst=under)
+        return frame
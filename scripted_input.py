@@ -0,0 +1,138 @@
+import collections
+import json
+import time
+
+import numpy as np
+
+from frame_sources import POINTING_HAND
+from hand_worker import NUM_LANDMARKS, UNKNOWN_HAND
+
+# --------------------
+# Entrada roteirizada (sem câmera, sem MediaPipe)
+# --------------------
+# Mão aberta (todos os dedos esticados): visível, mas is_pointing dá False.
+OPEN_HAND = np.array([
+    (0.00, 0.00),
+    (-0.25, -0.10), (-0.40, -0.25), (-0.50, -0.40), (-0.58, -0.52),
+    (-0.15, -0.55), (-0.16, -0.80), (-0.17, -0.95), (-0.18, -1.10),
+    (0.00, -0.58), (0.00, -0.85), (0.00, -1.02), (0.00, -1.18),
+    (0.13, -0.55), (0.15, -0.80), (0.16, -0.96), (0.17, -1.10),
+    (0.25, -0.48), (0.28, -0.68), (0.30, -0.80), (0.32, -0.92),
+])
+
+HAND_TEMPLATES = {"point": POINTING_HAND, "open": OPEN_HAND}
+
+# Roteiro padrão (segundos, x, y normalizados na visão do jogo, gesto):
+# aperta START/RESTART um pouco à direita do centro (fora da branca), afasta
+# a mão aberta, empurra a branca da esquerda para a direita, abre a mão logo
+# depois do toque e espera as bolas pararem. Repete em loop.
+DEFAULT_SCRIPT = [
+    (0.0, 0.60, 0.85, "none"),
+    (1.0, 0.60, 0.50, "point"),
+    (2.5, 0.60, 0.50, "open"),
+    (3.0, 0.30, 0.51, "point"),
+    (3.8, 0.50, 0.51, "open"),
+    (4.0, 0.50, 0.85, "none"),
+    (9.0, 0.50, 0.85, "none"),
+]
+
+
+def load_script(path):
+    """Roteiro em JSON: lista de [t, x, y, gesto] com gesto em "point", "open" ou "none"."""
+    with open(path) as f:
+        return [tuple(k) for k in json.load(f)]
+
+
+class ScriptedInput:
+    """
+    Gera frames de fundo e os landmarks de uma mão que segue um roteiro de
+    quadros-chave: a ponta do indicador anda em linha reta entre eles e o
+    gesto é o do quadro-chave em vigor. Tem a interface de fonte de frames
+    e de HandWorker (como LogReplayer), para rodar o jogo inteiro sem câmera.
+    realtime=True entrega cada frame na hora dele (como uma câmera).
+    """
+
+    def __init__(self, script=None, width=640, height=480, fps=30.0, loop=True,
+                 hand_size=0.3, realtime=False):
+        self.script = list(script or DEFAULT_SCRIPT)
+        self.times = np.array([k[0] for k in self.script], dtype=float)
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.loop = loop
+        self.hand_size = hand_size
+        self.realtime = realtime
+        self.index = -1
+        self.cost = 0.0            # sem inferência de verdade (ver HandWorker.cost)
+        self.last_cost = 0.0
+        self.ready = True          # nenhum modelo a carregar
+        self.load_time = None
+        self._background = np.full((height, width, 3), 40, dtype=np.uint8)
+        self._landmarks = np.zeros((NUM_LANDMARKS, 3), dtype=np.float32)
+        self._t0 = None
+        self._pending = collections.deque()   # frames lidos cuja mão ainda não saiu em poll
+
+    @property
+    def duration(self):
+        return float(self.times[-1])
+
+    def isOpened(self):
+        return True
+
+    def _time(self, index):
+        return index / self.fps
+
+    def hand_at(self, t):
+        """(x, y, gesto) da ponta do indicador no instante t do roteiro."""
+        if self.loop and self.duration > 0:
+            t = t % self.duration
+        k = int(np.searchsorted(self.times, t, side="right")) - 1
+        k = min(max(k, 0), len(self.script) - 1)
+        _, x0, y0, gesture = self.script[k]
+        if k + 1 < len(self.script):
+            t1, x1, y1, _ = self.script[k + 1]
+            span = t1 - self.times[k]
+            a = (t - self.times[k]) / span if span > 0 else 0.0
+            x0 += (x1 - x0) * a
+            y0 += (y1 - y0) * a
+        return x0, y0, gesture
+
+    def read(self):
+        t = self._time(self.index + 1)
+        if not self.loop and t > self.duration:
+            return False, None, 0.0
+        if self.realtime:
+            if self._t0 is None:
+                self._t0 = time.perf_counter()
+            delay = self._t0 + t - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        self.index += 1
+        self._pending.append(self.index)
+        return True, self._background.copy(), t
+
+    def acquire(self, shape):
+        return None
+
+    def submit(self, frame_id, frame_time=0.0):
+        pass
+
+    def poll(self, wait=False):
+        """Mão do frame lido mais antigo ainda sem resultado (um por read, em ordem)."""
+        if not self._pending:
+            return None
+        index = self._pending.popleft()
+        t = self._time(index)
+        x, y, gesture = self.hand_at(t)
+        if gesture not in HAND_TEMPLATES:
+            return index, t, None, None
+        scale = np.array([self.hand_size * self.height / self.width, self.hand_size])
+        pts = HAND_TEMPLATES[gesture] * scale
+        self._landmarks[:, :2] = pts - pts[8] + (x, y)
+        return index, t, self._landmarks[None].copy(), np.array([UNKNOWN_HAND], dtype=np.int8)
+
+    def release(self):
+        pass
+
+    def close(self):
+        pass
@@ -0,0 +1,237 @@
+import math
+import multiprocessing as mp_proc
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+
+import numpy as np
+
+from batch_physics import BatchTable
+from physics import BallTable
+
+# --------------------
+# Configurações
+# --------------------
+AI_BUDGET = 0.8           # s; a melhor tacada achada até aqui é devolvida nesse prazo
+AI_TICKS = 90             # horizonte de cada tacada simulada (3 s a 30 ticks/s)
+AI_ANGLES = 720           # direções da grade (0.5°)
+AI_SPEEDS = (6.0, 9.0, 13.0, 19.0)   # px/tick; até 2 raios por tick (2 subpassos sem CCD)
+AI_CHUNK = 256            # tacadas por tarefa (uma BatchTable de AI_CHUNK mesas)
+
+POT_SCORE = 1.0           # por bola colorida encaçapada
+SCRATCH_PENALTY = -10.0   # branca na caçapa: fim de jogo
+SAFETY_SCORE = 0.3        # branca longe das caçapas no fim
+NEAR_SCORE = 0.1          # por bola colorida parada perto de uma caçapa
+
+
+# --------------------
+# Tacadas candidatas
+# --------------------
+def candidate_shots(table, pockets, angles=AI_ANGLES, speeds=AI_SPEEDS):
+    """
+    (M, 2) de (ângulo rad, força px/tick). Primeiro as miras de "bola
+    fantasma" (a branca no ponto que manda cada bola colorida direto para
+    cada caçapa), depois a grade angles x speeds inteira em ordem
+    embaralhada fixa: qualquer prefixo já cobre a mesa toda, então um
+    pedaço avaliado antes do prazo é uma amostra boa do resto.
+    """
+    wi = table.white
+    wx, wy = table.x[wi], table.y[wi]
+    d = 2 * table.radius
+    ghost = []
+    for i in np.flatnonzero(table.alive & ~table.is_white):
+        for px, py in pockets:
+            gx, gy = table.x[i] - px, table.y[i] - py
+            norm = math.hypot(gx, gy)
+            if norm == 0:
+                continue
+            ghost.append(math.atan2(table.y[i] + gy / norm * d - wy,
+                                    table.x[i] + gx / norm * d - wx))
+    grid = np.linspace(-math.pi, math.pi, angles, endpoint=False)
+    speeds = np.asarray(speeds, dtype=float)
+    first = np.stack(np.meshgrid(np.asarray(ghost, dtype=float), speeds, indexing="ij"), -1)
+    rest = np.stack(np.meshgrid(grid, speeds, indexing="ij"), -1).reshape(-1, 2)
+    rest = rest[np.random.default_rng(0).permutation(len(rest))]
+    return np.concatenate([first.reshape(-1, 2), rest])
+
+
+def score_tables(batch, start_alive, pockets, white):
+    """Nota de cada mesa do lote depois da tacada (maior = melhor)."""
+    colored = ~batch.is_white
+    potted = (start_alive & ~batch.alive & colored).sum(axis=1)
+    p = np.asarray(pockets, dtype=float)
+    # distância de cada bola à caçapa mais próxima
+    dist = np.min(np.hypot(batch.x[:, :, None] - p[:, 0], batch.y[:, :, None] - p[:, 1]), axis=2)
+    white_alive = batch.alive[:, white]
+    safety = np.where(white_alive, np.clip(dist[:, white] / (4 * batch.pocket_radius), 0.0, 1.0), 0.0)
+    near = (batch.alive & colored & (dist < 3 * batch.pocket_radius)).sum(axis=1)
+    return (POT_SCORE * potted + SCRATCH_PENALTY * ~white_alive
+            + SAFETY_SCORE * safety + NEAR_SCORE * near)
+
+
+def evaluate_shots(state, bounds, pockets, shots, substeps, max_ticks=AI_TICKS):
+    """
+    Simula as tacadas (ângulo, força) em lote a partir de state (dict de
+    table_state) e devolve a nota de cada uma. Mesa que parou é pontuada
+    e sai do lote; só as outras continuam sendo simuladas.
+    """
+    table = table_from_state(state)
+    batch = BatchTable.from_table(table, len(shots))
+    wi = table.white
+    batch.vx[:, wi] = shots[:, 1] * np.cos(shots[:, 0])
+    batch.vy[:, wi] = shots[:, 1] * np.sin(shots[:, 0])
+    left, top, right, bottom = bounds
+    scores = np.empty(len(shots))
+    ids = np.arange(len(shots))
+    for _ in range(max_ticks):
+        batch.step(left, top, right, bottom, pockets, substeps)
+        moving = batch.moving()
+        if not moving.all():
+            scores[ids[~moving]] = score_tables(batch.take(~moving), table.alive, pockets, wi)
+            batch, ids = batch.take(moving), ids[moving]
+            if not len(ids):
+                return scores
+    scores[ids] = score_tables(batch, table.alive, pockets, wi)
+    return scores
+
+
+def table_state(table):
+    """O que os processos precisam da mesa (picklável e pequeno)."""
+    return {"x": table.x.copy(), "y": table.y.copy(), "alive": table.alive.copy(),
+            "is_white": table.is_white.copy(),
+            "params": (table.radius, table.friction, table.restitution, table.col_restitution,
+                       table.pocket_radius, table.stop_speed, table.pocket_on_move)}
+
+
+def table_from_state(state):
+    table = BallTable(*state["params"])
+    for x, y, white in zip(state["x"], state["y"], state["is_white"]):
+        table.add_ball(x, y, (255, 255, 255), is_white=bool(white))
+    table.alive[:] = state["alive"]
+    return table
+
+
+def _warm_up():
+    return os.getpid()
+
+
+# --------------------
+# Busca em paralelo com prazo
+# --------------------
+class ShotSearch:
+    """
+    Adversário do computador: espalha as tacadas candidatas em pedaços de
+    AI_CHUNK por um pool de processos (criado uma vez, spawn como o
+    HandWorker) e guarda a melhor nota conforme os pedaços voltam.
+
+        search.start(balls, bounds, pockets)   # não bloqueia
+        shot = search.poll()                   # None até acabar ou vencer o prazo
+        if shot is not None: balls.vx[wi], balls.vy[wi] = shot
+
+    Com budget=None poll espera todos os pedaços (resultado igual em toda
+    execução, para entrada gravada; com poll(wait=True)). workers=0 avalia
+    no próprio processo, um pedaço por poll. last_cost/evaluated/searched descrevem a
+    última busca.
+    """
+
+    def __init__(self, workers=None, budget=AI_BUDGET, chunk=AI_CHUNK, max_ticks=AI_TICKS):
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.budget = budget
+        self.chunk = chunk
+        self.max_ticks = max_ticks
+        self.last_cost = 0.0
+        self.evaluated = 0
+        self.searched = 0
+        self._pool = None
+        self._jobs = None
+
+    def warm_up(self):
+        """
+        Cria o pool (só na primeira chamada) e manda os processos subirem em
+        segundo plano, sem esperar: até a primeira vez do computador eles já
+        importaram NumPy. Sem warm_up, start cria o pool na hora.
+        """
+        if self.workers and self._pool is None:
+            ctx = mp_proc.get_context("spawn")
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=ctx)
+            for _ in range(self.workers):
+                self._pool.submit(_warm_up)
+
+    @property
+    def running(self):
+        return self._jobs is not None
+
+    def start(self, table, bounds, pockets, substeps=2):
+        self.warm_up()
+        self._shots = candidate_shots(table, pockets)
+        speed = float(np.max(self._shots[:, 1]))
+        # sem CCD no lote: nenhuma bola anda mais que um raio por subpasso
+        substeps = max(substeps, math.ceil(speed / table.radius))
+        state = table_state(table)
+        pockets = [(float(px), float(py)) for px, py in pockets]
+        args = [(state, tuple(bounds), pockets, self._shots[k:k + self.chunk], substeps,
+                 self.max_ticks) for k in range(0, len(self._shots), self.chunk)]
+        if self._pool is not None:
+            self._jobs = [(k, self._pool.submit(evaluate_shots, *a))
+                          for k, a in zip(range(0, len(self._shots), self.chunk), args)]
+        else:
+            self._jobs = list(zip(range(0, len(self._shots), self.chunk), args))
+        self._scores = np.full(len(self._shots), -np.inf)
+        self._started = time.perf_counter()
+        self.evaluated = 0
+
+    def poll(self, wait=False):
+        """
+        (vx, vy) da branca quando a busca termina; None enquanto ela continua.
+        wait=True espera todos os pedaços (ou o prazo) antes de voltar; com
+        prazo, nunca mais que ele, mesmo sem nenhum pedaço pronto (o pool
+        ainda subindo): aí devolve None e a busca segue no próximo poll.
+        """
+        if self._jobs is None:
+            return None
+        pending = []
+        for k, job in self._jobs:
+            if self._pool is None:
+                if (pending and not wait) or self._expired():
+                    pending.append((k, job))
+                    continue
+                scores = evaluate_shots(*job)
+            elif wait or job.done():
+                timeout = None if self.budget is None else max(
+                    self._started + self.budget - time.perf_counter(), 0.0)
+                try:
+                    scores = job.result(timeout)
+                except TimeoutError:
+                    pending.append((k, job))
+                    continue
+            else:
+                pending.append((k, job))
+                continue
+            self._scores[k:k + len(scores)] = scores
+            self.evaluated += len(scores)
+        self._jobs = pending
+        if pending and not (self._expired() and self.evaluated):
+            return None
+        for _, job in pending:
+            if self._pool is not None:
+                job.cancel()
+        self._jobs = None
+        self.last_cost = time.perf_counter() - self._started
+        self.searched = len(self._shots)
+        angle, speed = self._shots[int(np.argmax(self._scores))]
+        return float(speed * math.cos(angle)), float(speed * math.sin(angle))
+
+    def _expired(self):
+        return self.budget is not None and time.perf_counter() - self._started > self.budget
+
+    def cancel(self):
+        if self._jobs is not None and self._pool is not None:
+            for _, job in self._jobs:
+                job.cancel()
+        self._jobs = None
+
+    def close(self):
+        self.cancel()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
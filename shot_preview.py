@@ -0,0 +1,237 @@
+import math
+import time
+
+import cv2
+import numpy as np
+
+# --------------------
+# Configurações
+# --------------------
+PREVIEW_TICKS = 90        # horizonte da prévia (3 s a 30 ticks/s)
+AIM_STEP = math.radians(0.5)  # mira arredondada para reaproveitar a prévia entre frames
+SPEED_STEP = 0.5          # px/tick; idem para a força
+
+
+# --------------------
+# Trajetória prevista de uma tacada
+# --------------------
+class ShotPath:
+    """
+    Resultado de simulate_shot: pontos (px) da branca e da primeira bola que
+    ela acerta (target = índice na mesa, ou None), o ponto de contato e se
+    cada uma termina numa caçapa. Cada caminho para quando a bola para, cai,
+    encosta em outra bola ou o horizonte acaba.
+    """
+
+    def __init__(self):
+        self.cue = []
+        self.target = None
+        self.target_path = []
+        self.contact = None
+        self.cue_pocketed = False
+        self.target_pocketed = False
+
+
+class _Moving:
+    """Estado de uma bola em movimento na prévia (floats do Python, sem arrays)."""
+
+    __slots__ = ("index", "x", "y", "vx", "vy", "path", "done", "pocketed")
+
+    def __init__(self, index, x, y, vx, vy, path):
+        self.index = index
+        self.x, self.y = x, y
+        self.vx, self.vy = vx, vy
+        self.path = path
+        self.done = False
+        self.pocketed = False
+
+
+def simulate_shot(table, bounds, pockets, vx, vy, substeps=1, max_ticks=PREVIEW_TICKS):
+    """
+    Simula a branca saindo com (vx, vy) px/tick sobre uma cópia leve da mesa:
+    só a branca (e, depois do primeiro contato, a bola acertada) se mexe,
+    com as mesmas contas de BallTable.move e _resolve_pair (atrito,
+    tabelas, caçapas, colisão com COL_RESTITUTION); as outras bolas ficam
+    paradas numa grade de células de 2 raios, então cada contato testado é
+    só com as bolas vizinhas.
+    """
+    left, top, right, bottom = bounds
+    r = table.radius
+    min_dist = 2 * r
+    stop = table.stop_speed
+    friction = table.friction ** (1.0 / substeps)
+    frac = 1.0 / substeps
+    pr2 = table.pocket_radius ** 2
+    pockets = [(float(px), float(py)) for px, py in pockets]
+
+    wi = table.white
+    path = ShotPath()
+    if wi is None or not table.alive[wi]:
+        return path
+
+    # cada bola parada entra nas 9 células em volta da sua: um contato
+    # possível com a bola na célula (cx, cy) está todo em grid[(cx, cy)]
+    xs, ys = table.x.tolist(), table.y.tolist()
+    grid = {}
+    for i in np.flatnonzero(table.alive).tolist():
+        if i == wi:
+            continue
+        cx, cy = int(xs[i] // min_dist), int(ys[i] // min_dist)
+        for gx in (cx - 1, cx, cx + 1):
+            for gy in (cy - 1, cy, cy + 1):
+                grid.setdefault((gx, gy), []).append(i)
+
+    def in_pocket(b):
+        return any((b.x - px) ** 2 + (b.y - py) ** 2 < pr2 for px, py in pockets)
+
+    def touching(b):
+        """Bola parada mais próxima encostando em b (ou None)."""
+        best, best_d = None, min_dist
+        for j in grid.get((int(b.x // min_dist), int(b.y // min_dist)), ()):
+            d = math.hypot(xs[j] - b.x, ys[j] - b.y)
+            if 0 < d < best_d:
+                best, best_d = j, d
+        return best
+
+    cue = _Moving(wi, xs[wi], ys[wi], float(vx), float(vy), path.cue)
+    cue.path.append((cue.x, cue.y))
+    moving = [cue]
+
+    for _ in range(max_ticks):
+        for _ in range(substeps):
+            for b in list(moving):     # a bola acertada só anda a partir do próximo passo
+                if b.done:
+                    continue
+                # passos menores que o raio para não atravessar uma bola (como o CCD)
+                n = max(1, math.ceil(math.hypot(b.vx, b.vy) * frac / r))
+                hit = None
+                for _ in range(n):
+                    b.x += b.vx * frac / n
+                    b.y += b.vy * frac / n
+                    hit = touching(b)
+                    if hit is not None:
+                        break
+                b.vx *= friction
+                b.vy *= friction
+                if abs(b.vx) < stop:
+                    b.vx = 0.0
+                if abs(b.vy) < stop:
+                    b.vy = 0.0
+                if b.x - r < left:
+                    b.x, b.vx = left + r, abs(b.vx) * table.restitution
+                if b.x + r > right:
+                    b.x, b.vx = right - r, -abs(b.vx) * table.restitution
+                if b.y - r < top:
+                    b.y, b.vy = top + r, abs(b.vy) * table.restitution
+                if b.y + r > bottom:
+                    b.y, b.vy = bottom - r, -abs(b.vy) * table.restitution
+                b.path.append((b.x, b.y))
+
+                if hit is not None and b is cue and path.target is None:
+                    # primeiro contato: a bola acertada passa a andar também
+                    path.target = hit
+                    path.contact = (b.x, b.y)
+                    for cell in grid.values():
+                        if hit in cell:
+                            cell.remove(hit)
+                    target = _Moving(hit, xs[hit], ys[hit], 0.0, 0.0, path.target_path)
+                    target.path.append((target.x, target.y))
+                    _bounce(cue, target, min_dist, table.col_restitution)
+                    moving.append(target)
+                elif hit is not None:
+                    b.done = True              # encostou em outra bola: a prévia para aqui
+                if b.vx == 0.0 and b.vy == 0.0:
+                    b.done = True
+            if len(moving) == 2:
+                _bounce(moving[0], moving[1], min_dist, table.col_restitution)
+            for b in moving:
+                if not b.done and in_pocket(b):
+                    b.done = b.pocketed = True
+        if all(b.done for b in moving):
+            break
+
+    path.cue_pocketed = cue.pocketed
+    path.target_pocketed = len(moving) > 1 and moving[1].pocketed
+    return path
+
+
+def _bounce(a, b, min_dist, restitution):
+    """Mesma colisão de BallTable._resolve_pair (massas iguais), entre duas _Moving."""
+    dx, dy = b.x - a.x, b.y - a.y
+    dist = math.hypot(dx, dy)
+    if dist <= 0 or dist >= min_dist:
+        return
+    nx, ny = dx / dist, dy / dist
+    overlap = min_dist - dist
+    a.x -= nx * overlap / 2
+    a.y -= ny * overlap / 2
+    b.x += nx * overlap / 2
+    b.y += ny * overlap / 2
+    tx, ty = -ny, nx
+    v1n = a.vx * nx + a.vy * ny
+    v1t = a.vx * tx + a.vy * ty
+    v2n = b.vx * nx + b.vy * ny
+    v2t = b.vx * tx + b.vy * ty
+    v1n, v2n = v2n, v1n
+    a.vx = (v1n * nx + v1t * tx) * restitution
+    a.vy = (v1n * ny + v1t * ty) * restitution
+    b.vx = (v2n * nx + v2t * tx) * restitution
+    b.vy = (v2n * ny + v2t * ty) * restitution
+
+
+# --------------------
+# Prévia com cache entre frames
+# --------------------
+class ShotPreview:
+    """
+    Guarda a última ShotPath e só simula de novo quando a mira (ângulo em
+    passos de AIM_STEP, força em passos de SPEED_STEP) ou a mesa (posições
+    e bolas vivas) mudou. last_cost é o tempo da última simulação (s).
+    """
+
+    def __init__(self, max_ticks=PREVIEW_TICKS):
+        self.max_ticks = max_ticks
+        self.path = None
+        self.last_cost = 0.0
+        self._key = None
+
+    def update(self, table, bounds, pockets, vx, vy, substeps=1):
+        speed = math.hypot(vx, vy)
+        angle = round(math.atan2(vy, vx) / AIM_STEP)
+        speed_q = round(speed / SPEED_STEP)
+        key = (angle, speed_q, tuple(bounds), table.x.tobytes(), table.y.tobytes(),
+               table.alive.tobytes())
+        if key != self._key:
+            t0 = time.perf_counter()
+            a = angle * AIM_STEP
+            s = speed_q * SPEED_STEP
+            self.path = simulate_shot(table, bounds, pockets, s * math.cos(a), s * math.sin(a),
+                                      substeps, self.max_ticks)
+            self.last_cost = time.perf_counter() - t0
+            self._key = key
+        return self.path
+
+    def clear(self):
+        self.path = None
+        self._key = None
+
+
+def draw_shot_path(frame, path, table, color=(255, 255, 255)):
+    """Linha da branca, bola fantasma no contato e linha da bola acertada (na cor dela)."""
+    if path is None or len(path.cue) < 2:
+        return frame
+    r = table.radius
+    cue = np.rint(path.cue).astype(np.int32)
+    cv2.polylines(frame, [cue], False, color, 1, cv2.LINE_AA)
+    if path.contact is not None:
+        contact = tuple(int(round(v)) for v in path.contact)
+        cv2.circle(frame, contact, r, color, 1, cv2.LINE_AA)
+    if path.target is not None and len(path.target_path) > 1:
+        target_color = tuple(int(c) for c in table.color[path.target])
+        pts = np.rint(path.target_path).astype(np.int32)
+        cv2.polylines(frame, [pts], False, target_color, 2, cv2.LINE_AA)
+        if path.target_pocketed:
+            cv2.circle(frame, tuple(pts[-1]), r // 2, target_color, -1, cv2.LINE_AA)
+    if path.cue_pocketed:
+        cv2.drawMarker(frame, tuple(cue[-1]), (0, 0, 255), cv2.MARKER_TILTED_CROSS, 2 * r, 2)
+    return frame
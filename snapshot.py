@@ -0,0 +1,138 @@
+import numpy as np
+
+# --------------------
+# Fotos do estado (rollback e replay exato)
+# --------------------
+# Uma foto é um registro de um array estruturado: o tick em que foi tirada,
+# um campo por array de estado (com o mesmo dtype e shape) e um por escalar.
+# Os arrays são lidos/escritos no lugar, então quem guarda uma referência
+# para eles (tracker.tip é finger.x) continua vendo o estado restaurado.
+
+
+def state_arrays(**objects):
+    """
+    {"nome.atributo": array} com todos os arrays NumPy de cada objeto dado
+    (o estado de BallTable, HandTracker, bancos de filtro...). Um array que
+    aparece em dois objetos (apelido) entra uma vez só.
+    """
+    arrays, seen = {}, set()
+    for prefix, obj in objects.items():
+        for name, value in vars(obj).items():
+            if isinstance(value, np.ndarray) and id(value) not in seen:
+                seen.add(id(value))
+                arrays[f"{prefix}.{name}"] = value
+    return arrays
+
+
+class SnapshotRing:
+    """
+    Anel pré-alocado com as últimas capacity fotos do estado, em ordem de
+    tick. save copia os arrays e escalares para o próximo registro (sem
+    alocar); uma foto nova com o mesmo tick da última a substitui, então
+    com capacity = segundos * SIM_RATE + 1 o anel cobre pelo menos esses
+    segundos. restore copia de volta só os arrays pedidos: custo do tamanho
+    do estado, não da história guardada.
+
+        ring.save(tick, arrays, {"turn": turn, ...})
+        back = ring.find(tick - 5 * SIM_RATE)      # fotos a voltar
+        scalars = ring.rewind(back, arrays)        # restaura e esquece as mais novas
+
+    O formato (campos) sai da primeira foto; se os arrays mudam de shape
+    (mesa nova com outro nº de bolas), o anel recomeça vazio.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.buf = None
+        self.count = 0
+        self._head = 0           # próximo registro a escrever
+        self._layout = None
+        self._scalars = ()
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+        self._head = 0
+
+    def _allocate(self, layout, scalars):
+        fields = [("tick", np.int64)]
+        fields += [(name, dtype, shape) for name, shape, dtype in layout]
+        fields += [(name, np.asarray(value).dtype) for name, value in scalars.items()]
+        self.buf = np.zeros(self.capacity, dtype=fields)
+        self._layout = layout
+        self._scalars = tuple(scalars)
+        self.clear()
+
+    def _slot(self, back):
+        return (self._head - 1 - back) % self.capacity
+
+    def save(self, tick, arrays, scalars=None):
+        scalars = scalars or {}
+        layout = tuple((name, a.shape, a.dtype) for name, a in arrays.items())
+        if layout != self._layout:
+            self._allocate(layout, scalars)
+        if self.count and self.buf["tick"][self._slot(0)] == tick:
+            slot = self._slot(0)
+        else:
+            slot = self._head
+            self._head = (self._head + 1) % self.capacity
+            self.count = min(self.count + 1, self.capacity)
+        rec = self.buf[slot]
+        rec["tick"] = tick
+        for name, a in arrays.items():
+            rec[name] = a
+        for name, value in scalars.items():
+            rec[name] = value
+
+    def ticks(self):
+        """Ticks das fotos guardadas, da mais velha para a mais nova."""
+        return self.buf["tick"][[self._slot(k) for k in range(self.count - 1, -1, -1)]]
+
+    def find(self, tick):
+        """Fotos a voltar até a mais nova com tick <= tick (ou até a mais velha)."""
+        if not self.count:
+            raise IndexError("nenhuma foto guardada")
+        k = int(np.searchsorted(self.ticks(), tick, side="right")) - 1
+        return self.count - 1 - max(k, 0)
+
+    def restore(self, back, arrays):
+        """
+        Copia a foto de back passos atrás (0 = a mais nova) para os arrays
+        dados (um subconjunto dos salvos) e devolve seus escalares e o tick.
+        """
+        if not 0 <= back < self.count:
+            raise IndexError(f"só há {self.count} fotos")
+        rec = self.buf[self._slot(back)]
+        for name, a in arrays.items():
+            a[...] = rec[name]
+        scalars = {name: rec[name].item() for name in self._scalars}
+        scalars["tick"] = int(rec["tick"])
+        return scalars
+
+    def rewind(self, back, arrays):
+        """restore e descarta as fotos mais novas que a restaurada."""
+        scalars = self.restore(back, arrays)
+        self._head = (self._head - back) % self.capacity
+        self.count -= back
+        return scalars
+
+    def dump(self, path):
+        """Grava as fotos (da mais velha para a mais nova) em .npy, formato binário incluso."""
+        np.save(path, self.buf[[self._slot(k) for k in range(self.count - 1, -1, -1)]])
+
+
+def load_snapshots(path):
+    """SnapshotRing cheio com as fotos de um .npy gravado por dump."""
+    data = np.load(path)
+    ring = SnapshotRing(max(len(data), 1))
+    ring.buf = np.zeros(ring.capacity, dtype=data.dtype)
+    ring.buf[:len(data)] = data
+    ring.count = len(data)
+    ring._head = len(data) % ring.capacity
+    # escalares são os campos sem shape (nenhum array de estado é 0-d)
+    fields = [(n, data.dtype[n].shape, data.dtype[n].base) for n in data.dtype.names[1:]]
+    ring._layout = tuple(f for f in fields if f[1])
+    ring._scalars = tuple(n for n, shape, _ in fields if not shape)
+    return ring
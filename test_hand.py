@@ -1,21 +1,26 @@
 import cv2
-import mediapipe as mp
+import sys
 
-# Inicializa o MediaPipe Hands
-mp_hands = mp.solutions.hands
-mp_drawing = mp.solutions.drawing_utils
+from frame_sources import open_source
+from hand_worker import BackgroundHands
+from profiler import StartupTimer
+
+# Tempo até o primeiro frame e a primeira mão
+startup = StartupTimer()
 
 # Abre a câmera
-cap = cv2.VideoCapture(0)
+cap = open_source(sys.argv[1] if len(sys.argv) > 1 else 0)  # webcam, vídeo, pasta ou "synthetic"
 
-with mp_hands.Hands(
+# Inicializa o MediaPipe Hands numa thread (import, modelo e um frame de aquecimento);
+# a câmera aparece enquanto isso
+with BackgroundHands(
     max_num_hands=1,  # número máximo de mãos
     min_detection_confidence=0.7,  # confiança mínima
     min_tracking_confidence=0.7
 ) as hands:
 
     while True:
-        ret, frame = cap.read()
+        ret, frame, _ = cap.read()
         if not ret:
             break
 
@@ -25,11 +30,13 @@ with mp_hands.Hands(
         # Converte para RGB (MediaPipe usa RGB, OpenCV usa BGR)
         rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
 
-        # Processa a imagem e detecta mãos
+        # Processa a imagem e detecta mãos (None enquanto o modelo carrega)
         results = hands.process(rgb_frame)
 
         # Se encontrar alguma mão
-        if results.multi_hand_landmarks:
+        if results is not None and results.multi_hand_landmarks:
+            startup.detection()
+            mp_drawing, mp_hands = hands.solutions.drawing_utils, hands.solutions.hands
             for hand_landmarks in results.multi_hand_landmarks:
                 # Desenha os pontos e conexões na mão
                 mp_drawing.draw_landmarks(
@@ -41,11 +48,17 @@ with mp_hands.Hands(
                 )
 
 
+        if not hands.ready:
+            cv2.putText(frame, "carregando o modelo das maos...", (10, 30),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+
         # Mostra o resultado
         cv2.imshow("Detecção de Mão", frame)
+        startup.frame()
 
         if cv2.waitKey(1) & 0xFF == ord("q"):
             break
 
+print(startup.report(hands.load_time))
 cap.release()
 cv2.destroyAllWindows()
@@ -0,0 +1,788 @@
+import asyncio
+import json
+import math
+import os
+import random
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from benchmark import case_key, compare, run_suite
+from batch_physics import BatchGame, BatchTable, ExactBatchTable, GAMEOVER, PLAYING
+from broadphase import sweep_and_prune
+from filters import FILTERS, OneEuroBank, make_bank, make_filter
+from frame_sources import POINTING_HAND, SyntheticSource, open_sink, open_source
+from gestures import GESTURES, classify, classify_batch, push_aim
+from hand_tracker import HandTracker
+from hand_worker import hand_roi, roi_to_frame
+from landmark_log import LandmarkRecorder, load_log, replay_gestures
+from net_play import NetClient, NetHost, decode_snapshot, encode_snapshot, quantize
+from physics import BallTable, SimClock, SLEEP_TICKS
+from pipeline import END, Pipeline, StageQueue
+from prediction import InferenceScheduler, LandmarkPredictor
+from render_layers import BallSprites, LayerCache, StaticLayer
+from scripted_input import OPEN_HAND
+from shot_ai import ShotSearch
+from shot_preview import AIM_STEP, ShotPreview, simulate_shot
+from snapshot import SnapshotRing, state_arrays
+
+# --------------------
+# Implementação de referência: Ball / handle_ball_collision por objeto,
+# como estavam em billiards_with_buttons.py (cutoff e caçapa no update)
+# e em billiards.py (sem cutoff e sem caçapa no update).
+# --------------------
+BALL_RADIUS = 10
+FRICTION = 0.992
+RESTITUTION = 0.90
+COL_RESTITUTION = 0.95
+POCKET_RADIUS = 28
+
+
+class RefBall:
+    def __init__(self, x, y, is_white=False):
+        self.x = float(x)
+        self.y = float(y)
+        self.vx = 0.0
+        self.vy = 0.0
+        self.is_white = is_white
+        self.alive = True
+
+    def update(self, left, top, right, bottom, pockets, cutoff):
+        if not self.alive:
+            return
+        self.x += self.vx
+        self.y += self.vy
+        self.vx *= FRICTION
+        self.vy *= FRICTION
+        if cutoff:
+            if abs(self.vx) < 0.05:
+                self.vx = 0.0
+            if abs(self.vy) < 0.05:
+                self.vy = 0.0
+        if self.x - BALL_RADIUS < left:
+            self.x = left + BALL_RADIUS
+            self.vx = abs(self.vx) * RESTITUTION
+        if self.x + BALL_RADIUS > right:
+            self.x = right - BALL_RADIUS
+            self.vx = -abs(self.vx) * RESTITUTION
+        if self.y - BALL_RADIUS < top:
+            self.y = top + BALL_RADIUS
+            self.vy = abs(self.vy) * RESTITUTION
+        if self.y + BALL_RADIUS > bottom:
+            self.y = bottom - BALL_RADIUS
+            self.vy = -abs(self.vy) * RESTITUTION
+        if pockets is None:
+            return
+        for px, py in pockets:
+            if math.hypot(self.x - px, self.y - py) < POCKET_RADIUS:
+                if not self.is_white:
+                    self.alive = False
+                break
+
+
+def ref_collision(b1, b2):
+    if not b1.alive or not b2.alive:
+        return
+    dx = b2.x - b1.x
+    dy = b2.y - b1.y
+    dist = math.hypot(dx, dy)
+    if dist <= 0:
+        return
+    min_dist = 2 * BALL_RADIUS
+    if dist < min_dist:
+        nx = dx / dist
+        ny = dy / dist
+        overlap = (min_dist - dist)
+        b1.x -= nx * overlap / 2
+        b1.y -= ny * overlap / 2
+        b2.x += nx * overlap / 2
+        b2.y += ny * overlap / 2
+        tx = -ny
+        ty = nx
+        v1n = b1.vx * nx + b1.vy * ny
+        v1t = b1.vx * tx + b1.vy * ty
+        v2n = b2.vx * nx + b2.vy * ny
+        v2t = b2.vx * tx + b2.vy * ty
+        v1n, v2n = v2n, v1n
+        b1.vx = v1n * nx + v1t * tx
+        b1.vy = v1n * ny + v1t * ty
+        b2.vx = v2n * nx + v2t * tx
+        b2.vy = v2n * ny + v2t * ty
+        b1.vx *= COL_RESTITUTION
+        b1.vy *= COL_RESTITUTION
+        b2.vx *= COL_RESTITUTION
+        b2.vy *= COL_RESTITUTION
+
+
+def ref_step(balls, left, top, right, bottom, pockets, cutoff, pocket_on_move):
+    for b in balls:
+        b.update(left, top, right, bottom, pockets if pocket_on_move else None, cutoff)
+    for i in range(len(balls)):
+        for j in range(i + 1, len(balls)):
+            ref_collision(balls[i], balls[j])
+    for b in balls:
+        if not b.alive:
+            continue
+        for px, py in pockets:
+            if math.hypot(b.x - px, b.y - py) < POCKET_RADIUS:
+                b.alive = False
+                break
+
+
+# --------------------
+# Cenários
+# --------------------
+LEFT, TOP, RIGHT, BOTTOM = 60, 80, 580, 400
+CX = (LEFT + RIGHT) // 2
+POCKETS = [(LEFT, TOP), (CX, TOP), (RIGHT, TOP),
+           (LEFT, BOTTOM), (CX, BOTTOM), (RIGHT, BOTTOM)]
+
+
+def make_rack(seed, n_balls, **table_kwargs):
+    """Rack triangular + bolas aleatórias, com a branca disparada contra o rack."""
+    rnd = random.Random(seed)
+    ref = []
+    table = BallTable(radius=BALL_RADIUS, friction=FRICTION, restitution=RESTITUTION,
+                      col_restitution=COL_RESTITUTION, pocket_radius=POCKET_RADIUS,
+                      **table_kwargs)
+
+    def add(x, y, is_white=False):
+        ref.append(RefBall(x, y, is_white))
+        table.add_ball(x, y, (255, 255, 255), is_white=is_white)
+
+    add((LEFT + RIGHT) / 2, (TOP + BOTTOM) / 2, is_white=True)
+    spacing = BALL_RADIUS * 2 + 2
+    k = 0
+    for row in range(5):
+        for col in range(row + 1):
+            if k >= n_balls:
+                break
+            add(LEFT + 140 - row * spacing, (TOP + BOTTOM) / 2 - row * spacing / 2 + col * spacing)
+            k += 1
+    while k < n_balls:
+        add(rnd.uniform(LEFT + 20, RIGHT - 20), rnd.uniform(TOP + 20, BOTTOM - 20))
+        k += 1
+
+    speed = rnd.uniform(8, 30)
+    angle = math.pi + rnd.uniform(-0.3, 0.3)
+    for i, b in enumerate(ref):
+        vx = speed * math.cos(angle) if b.is_white else rnd.uniform(-2, 2)
+        vy = speed * math.sin(angle) if b.is_white else rnd.uniform(-2, 2)
+        b.vx = vx
+        b.vy = vy
+        table.vx[i] = vx
+        table.vy[i] = vy
+    return ref, table
+
+
+def assert_same(ref, table):
+    assert [b.alive for b in ref] == table.alive.tolist()
+    for name in ("x", "y", "vx", "vy"):
+        expected = np.array([getattr(b, name) for b in ref])
+        got = getattr(table, name)
+        assert np.allclose(expected, got, rtol=0, atol=1e-9), name
+
+
+def run_parity(cutoff, pocket_on_move, steps=600):
+    for seed in range(12):
+        ref, table = make_rack(seed, n_balls=15 + seed,
+                               stop_speed=0.05 if cutoff else 0.0,
+                               pocket_on_move=pocket_on_move, ccd=False)
+        for _ in range(steps):
+            ref_step(ref, LEFT, TOP, RIGHT, BOTTOM, POCKETS, cutoff, pocket_on_move)
+            table.step(LEFT, TOP, RIGHT, BOTTOM, POCKETS)
+            assert_same(ref, table)
+
+
+def test_parity_with_buttons_version():
+    run_parity(cutoff=True, pocket_on_move=True)
+
+
+def test_parity_billiards_version():
+    run_parity(cutoff=False, pocket_on_move=False)
+
+
+def test_broadphase_matches_brute_force():
+    rng = np.random.default_rng(0)
+    reach = 4 * BALL_RADIUS
+    for n in (0, 1, 2, 16, 300, 2000):
+        x = rng.uniform(0, 1500, n)
+        y = rng.uniform(0, 900, n)
+        alive = rng.random(n) > 0.2
+        i, j = sweep_and_prune(x, y, alive, reach)
+
+        d = np.hypot(x[None, :] - x[:, None], y[None, :] - y[:, None])
+        near = np.triu(d < reach, k=1) & alive[:, None] & alive[None, :]
+        ei, ej = np.nonzero(near)
+        assert i.tolist() == ei.tolist() and j.tolist() == ej.tolist()
+
+
+def test_ccd_prevents_tunneling():
+    for ccd, should_hit in ((False, False), (True, True)):
+        table = BallTable(ccd=ccd)
+        a = table.add_ball(100, 200, (255, 255, 255), is_white=True)
+        b = table.add_ball(130, 200, (200, 30, 30))
+        table.vx[a] = 60.0
+        table.step(0, 0, 1000, 1000, [])
+        assert (table.vx[b] > 0) == should_hit
+        if should_hit:
+            assert table.x[a] < table.x[b]
+
+
+def test_resting_balls_sleep_and_wake_on_contact():
+    table = BallTable()
+    a = table.add_ball(100, 200, (255, 255, 255), is_white=True)
+    b = table.add_ball(200, 200, (200, 30, 30))
+    c = table.add_ball(400, 400, (200, 30, 30))
+    for _ in range(SLEEP_TICKS):
+        table.step(0, 0, 1000, 1000, [])
+    assert table.asleep.all()
+
+    # empurrão escrito direto em vx acorda a bola; o contato acorda a outra
+    table.vx[a] = 20.0
+    for _ in range(10):
+        table.step(0, 0, 1000, 1000, [])
+    assert table.vx[b] > 0 and not table.asleep[b]
+    assert table.asleep[c] and table.x[c] == 400
+
+
+def test_batch_matches_table_with_isolated_contacts():
+    # bolas espalhadas (um contato por vez): o lote dá o mesmo que BallTable
+    def spread_table():
+        table = BallTable(radius=BALL_RADIUS, friction=FRICTION, restitution=RESTITUTION,
+                          col_restitution=COL_RESTITUTION, pocket_radius=POCKET_RADIUS, ccd=False)
+        table.add_ball(300, 240, (255, 255, 255), is_white=True)
+        for x, y in ((200, 230), (420, 300), (300, 140)):
+            table.add_ball(x, y, (200, 30, 30))
+        return table
+
+    angles = np.linspace(-math.pi, math.pi, 64, endpoint=False)
+    batch = BatchTable.from_table(spread_table(), len(angles))
+    batch.vx[:, 0] = 18 * np.cos(angles)
+    batch.vy[:, 0] = 18 * np.sin(angles)
+    for _ in range(150):
+        batch.step(LEFT, TOP, RIGHT, BOTTOM, POCKETS, substeps=2)
+    for k, angle in enumerate(angles):
+        ref = spread_table()
+        ref.vx[0], ref.vy[0] = 18 * np.cos(angle), 18 * np.sin(angle)
+        for _ in range(150):
+            ref.step(LEFT, TOP, RIGHT, BOTTOM, POCKETS, substeps=2)
+        assert ref.alive.tolist() == batch.alive[k].tolist()
+        for name in ("x", "y", "vx", "vy"):
+            assert np.allclose(getattr(ref, name), getattr(batch, name)[k], rtol=0, atol=1e-9), name
+
+
+def test_exact_batch_matches_table():
+    # rack com tudo em movimento, CCD e bolas dormindo: igual bit a bit
+    tables = [make_rack(seed, n_balls=15)[1] for seed in range(8)]
+    batch = ExactBatchTable(len(tables), len(tables[0]))
+    for k, table in enumerate(tables):
+        for name in ("x", "y", "vx", "vy", "alive", "is_white"):
+            getattr(batch, name)[k] = getattr(table, name)
+    for _ in range(300):
+        for table in tables:
+            table.step(LEFT, TOP, RIGHT, BOTTOM, POCKETS, substeps=2)
+        batch.step(LEFT, TOP, RIGHT, BOTTOM, POCKETS, substeps=2)
+        for k, table in enumerate(tables):
+            for name in ("x", "y", "vx", "vy", "alive", "asleep"):
+                assert np.array_equal(getattr(table, name), getattr(batch, name)[k]), name
+
+
+def test_batch_game_ends_like_the_game():
+    table = BallTable()
+    table.add_ball(CX, 240, (255, 255, 255), is_white=True)
+    table.add_ball(CX, TOP + 40, (200, 30, 30))
+    game = BatchGame(ExactBatchTable.from_table(table, 3), (LEFT, TOP, RIGHT, BOTTOM), POCKETS, 2)
+    game.shoot([0], -13.0, -8.0)      # branca direto na caçapa do canto
+    game.shoot([1], 0.0, -15.0)       # branca manda a colorida na caçapa do meio
+    for _ in range(200):
+        game.step()
+    assert game.state.tolist() == [GAMEOVER, GAMEOVER, PLAYING]
+    assert game.won.tolist() == [False, True, False]
+    assert game.pocketed.tolist() == [0, 1, 0] and game.shots.tolist() == [1, 1, 0]
+    assert game.pocket_tick[0, 0] > 0 and game.pocket_tick[2].tolist() == [-1, -1]
+
+
+def test_clock_is_independent_of_frame_rate():
+    results = []
+    for fps in (15, 24, 60):
+        _, table = make_rack(3, n_balls=15, ccd=True)
+        clock = SimClock()
+        clock.advance(0.0)
+        frame = steps = 0
+        while steps < 90:
+            frame += 1
+            for _ in range(clock.advance(frame / fps)):
+                if steps < 90:
+                    table.step(LEFT, TOP, RIGHT, BOTTOM, POCKETS, substeps=2)
+                    steps += 1
+        results.append(np.concatenate([table.x, table.y, table.vx, table.vy]))
+    for r in results[1:]:
+        assert np.array_equal(results[0], r)
+
+
+def test_rewind_replays_the_same_ticks():
+    # mesa + filtro do dedo com a mesma entrada: voltar e rodar de novo dá os mesmos bits
+    _, table = make_rack(4, n_balls=15, ccd=True)
+    finger = OneEuroBank(2)
+    tip = finger.x
+    rng = np.random.default_rng(1)
+    points = rng.uniform(0, 400, (60, 2, 2))
+    ring = SnapshotRing(31)
+
+    def run(start, stop):
+        for t in range(start, stop):
+            finger.update(points[t], t / 30, np.array([True, t % 3 != 0]))
+            table.step(LEFT, TOP, RIGHT, BOTTOM, POCKETS, substeps=2)
+            ring.save(t + 1, state_arrays(balls=table, finger=finger), {"t": t + 1})
+
+    run(0, 60)
+    arrays = state_arrays(balls=table, finger=finger)
+    first = {name: a.copy() for name, a in arrays.items()}
+    assert len(ring) == 31 and ring.ticks()[0] == 30
+    state = ring.rewind(ring.find(45), state_arrays(balls=table, finger=finger))
+    assert state["tick"] == state["t"] == 45 and len(ring) == 16
+    run(45, 60)
+    assert finger.x is tip
+    for name, a in state_arrays(balls=table, finger=finger).items():
+        assert np.array_equal(a, first[name]), name
+
+
+def test_filter_banks_match_filters():
+    # cada banco é n filtros lado a lado: mão sumindo e voltando dá os mesmos números
+    rng = np.random.default_rng(2)
+    points = rng.uniform(0, 400, (90, 3, 2))
+    for kind in FILTERS:
+        filters = [make_filter(kind) for _ in range(3)]
+        bank = make_bank(kind, 3)
+        for k in range(90):
+            t = k / 30
+            if k == 30:
+                filters[2].reset()
+                bank.reset([2])
+            mask = np.array([True, k % 4 != 0, k < 30 or k >= 50])
+            bank.update(points[k], t, mask)
+            for i in np.flatnonzero(mask):
+                x, y = filters[i].update(*points[k, i], t)
+                assert np.allclose(bank.x[i], (x, y)), (kind, k, i)
+                assert math.isclose(bank.speed[i], filters[i].speed, rel_tol=1e-9, abs_tol=1e-9), (kind, k, i)
+
+
+def test_filters_follow_a_constant_velocity_ramp():
+    # numa rampa a velocidade medida converge para a real, em qualquer filtro
+    vel = np.array([300.0, -120.0])
+    for kind in FILTERS:
+        f = make_filter(kind)
+        bank = make_bank(kind, 1)
+        for k in range(60):
+            t = k / 30
+            p = 100.0 + vel * t
+            f.update(*p, t)
+            bank.update(p[None], t, np.array([True]))
+        assert np.allclose((f.vx, f.vy), vel, rtol=1e-3), kind
+        assert np.allclose(bank.v[0], vel, rtol=1e-3), kind
+
+
+def test_gestures_batch_matches_single_hands():
+    # mãos de exemplo (e uma com o indicador curvado) com ruído, no frame normalizado
+    hooked = POINTING_HAND.copy()
+    hooked[6:9] = [(-0.15, -0.42), (-0.15, -0.60), (-0.15, -0.72)]   # PIP abaixo do MCP
+    rng = np.random.default_rng(3)
+    hands = []
+    for template in (POINTING_HAND, OPEN_HAND, hooked):
+        for _ in range(50):
+            lm = np.zeros((21, 3), dtype=np.float32)
+            lm[:, :2] = 0.5 + 0.2 * template + rng.normal(0, 0.002, template.shape)
+            hands.append(lm)
+    batch = classify_batch(np.stack(hands))
+    for k, lm in enumerate(hands):
+        assert classify(lm) == {name: bool(batch[name][k]) for name in GESTURES}, k
+    # a regra estrita (botões) exige o indicador esticado; a do ball_gameV1 não
+    assert batch["pointing"][:50].all() and not batch["pointing"][50:].any()
+    assert batch["index_up"][:50].all() and batch["index_up"][100:].all()
+    assert not batch["index_up"][50:100].any()
+
+
+def test_push_on_the_ball_center_uses_the_fallback():
+    assert push_aim(100.0, 100.0, 100.0, 100.0, 0.0, 8.0, 1.6) is None
+    assert push_aim(100.0, 100.0, 100.0, 100.0, 0.0, 8.0, 1.6, fallback=(1.0, 0.0)) == (8.0, 0.0)
+
+
+def test_landmark_log_without_records():
+    path = os.path.join(tempfile.mkdtemp(), "vazio.hlog")
+    LandmarkRecorder(path, 640, 480).close()
+    records, width, height = load_log(path)
+    assert len(records) == 0 and (width, height) == (640, 480)
+    assert len(replay_gestures(records, width, height)) == 0
+    with LandmarkRecorder(path, 640, 480) as rec:
+        for k in range(3):
+            rec.write(k / 30, np.full((21, 3), 0.5, dtype=np.float32))
+    with open(path, "ab") as f:
+        f.write(b"\0" * 10)                   # gravação interrompida no meio de um registro
+    records, _, _ = load_log(path)
+    assert len(records) == 3 and records["t"][2] == 2 / 30
+
+
+def test_net_delta_snapshots_on_localhost():
+    _, table = make_rack(5, n_balls=15)
+    table.vx[:] = table.vy[:] = 0.0
+    q0 = quantize(table)
+    table.vx[0] = 12.0
+    table.step(LEFT, TOP, RIGHT, BOTTOM, POCKETS)
+    q1 = quantize(table)
+    big = np.arange(300 * 4, dtype="<i2").reshape(300, 4)    # mais de 255 bolas
+    snap = decode_snapshot(encode_snapshot(1, 1, big, np.ones(300, dtype=bool)), {})
+    assert np.array_equal(snap["q"], big)
+    full = encode_snapshot(1, 1, q0, table.alive)
+    delta = encode_snapshot(2, 2, q1, table.alive, base=1, base_q=q0)
+    assert len(delta) < len(full)
+    assert decode_snapshot(delta, {}) is None           # sem a base, o cliente descarta
+    snap = decode_snapshot(delta, {1: (decode_snapshot(full, {})["q"], table.alive)})
+    assert np.array_equal(snap["q"], q1)
+
+    host = NetHost(0, bind="127.0.0.1").start()
+    client = NetClient(f"127.0.0.1:{host.port}").start()
+    try:
+        host.send_rack(table, (LEFT, TOP, RIGHT, BOTTOM), POCKETS, 1)
+        client.push(3.0, 0.0)
+        pushes = []
+
+        def exchange(packets):
+            deadline = time.perf_counter() + 5.0
+            target = client.stats.recv_packets + packets
+            while client.stats.recv_packets < target and time.perf_counter() < deadline:
+                client.send_input((100.0, 200.0), 5.0, True, True)
+                time.sleep(0.01)
+                push = host.take_push()
+                if push is not None:
+                    pushes.append(push)
+                    if len(pushes) == 1:
+                        host.ack_push()       # a primeira é usada, a segunda recusada
+                host.publish(table, 1, "playing", 1, False)
+
+        exchange(10)
+        assert pushes == [(3.0, 0.0)] and host.remote.pointing
+        assert np.array_equal(client._buffer[-1]["q"], quantize(table))
+        assert client.stats.rtt and len(client.stats.push) == 1 and not client._push_sent
+        client.push(-2.0, 1.0)
+        exchange(10)
+        # recusada: sai das pendentes do cliente e não conta como confirmada
+        assert pushes == [(3.0, 0.0), (-2.0, 1.0)]
+        assert len(client.stats.push) == 1 and not client._push_sent
+    finally:
+        client.close()
+        host.close()
+
+
+def test_shot_search_poll_keeps_its_budget():
+    # pool ainda subindo: poll(wait=True) volta no prazo sem tacada e a busca segue
+    _, table = make_rack(6, n_balls=15)
+    search = ShotSearch(workers=1, budget=0.05, chunk=512, max_ticks=20)
+    try:
+        search.start(table, (LEFT, TOP, RIGHT, BOTTOM), POCKETS)
+        t0 = time.perf_counter()
+        assert search.poll(wait=True) is None
+        assert time.perf_counter() - t0 < 0.5 and search.running
+        deadline = time.perf_counter() + 30.0
+        shot = None
+        while shot is None and time.perf_counter() < deadline:
+            shot = search.poll(wait=True)
+        assert shot is not None and search.evaluated > 0
+    finally:
+        search.close()
+
+
+def test_pipeline_drops_oldest_behind_a_slow_stage():
+    def run(policy):
+        items = iter(range(40))
+        got = []
+
+        def slow(k):
+            time.sleep(0.002)
+            got.append(k)
+
+        pipe = Pipeline(policy, maxsize=2)
+        pipe.stage("source", lambda: next(items, END))
+        pipe.stage("slow", slow, executor=True)
+        asyncio.run(pipe.run())
+        return got, pipe.queues[0]
+
+    got, queue = run("block")
+    assert got == list(range(40)) and queue.dropped == 0
+    got, queue = run("drop_oldest")
+    # a fonte nunca espera: a etapa lenta só vê os mais novos, em ordem
+    assert queue.dropped > 0 and len(got) + queue.dropped == 40
+    assert got == sorted(got) and got[-1] == 39
+    assert queue.max_depth == 2
+
+
+def test_drop_oldest_merges_into_the_next_item():
+    # o resultado de um item descartado vai para o próximo a sair, sem passar um mais novo
+    def merge(old, newer):
+        if old["result"] is not None and newer["result"] is None:
+            newer["result"] = old["result"]
+
+    async def run(results):
+        queue = StageQueue("a -> b", maxsize=2, merge=merge)
+        for k, r in enumerate(results):
+            await queue.put({"id": k, "result": r})
+        return [await queue.get() for _ in range(queue.depth)], queue.dropped
+
+    got, dropped = asyncio.run(run(["r0", None, None]))
+    assert dropped == 1 and [(i["id"], i["result"]) for i in got] == [(1, "r0"), (2, None)]
+    got, dropped = asyncio.run(run(["r0", None, None, "r3", None]))
+    assert dropped == 3 and [(i["id"], i["result"]) for i in got] == [(3, "r3"), (4, None)]
+
+
+def test_image_folder_replays_the_synthetic_source():
+    # sintética -> pasta de PNGs -> ImageFolderSource: mesmos frames, tempo i / fps, fim
+    source = open_source("synthetic:160x120")
+    assert (source.width, source.height) == (160, 120)
+    folder = tempfile.mkdtemp()
+    sink = open_sink(folder)
+    frames = []
+    for k in range(5):
+        ok, frame, t = source.read()
+        assert ok and frame.shape == (120, 160, 3) and t == k / source.fps
+        # o frame vem espelhado, como a câmera crua: a ponta do dedo fica do outro lado
+        x, y = source.fingertip(t)
+        assert np.allclose(source.last_landmarks[8, :2], (x, y))
+        px, py = int(x * 160), int(y * 120)
+        assert (frame[py, 159 - px] != source.background[py, px]).any()
+        sink.write(frame)
+        frames.append(frame)
+    sink.release()
+    replay = open_source(folder)
+    for k, frame in enumerate(frames):
+        ok, got, t = replay.read()
+        assert ok and np.array_equal(got, frame) and t == k / replay.fps
+    assert replay.read()[0] is False
+    short = SyntheticSource(64, 48, frames=2)
+    assert [short.read()[0] for _ in range(3)] == [True, True, False]
+
+
+def test_roi_crop_maps_back_to_the_frame():
+    source = SyntheticSource(640, 480, hand_size=0.2)
+    source.read()
+    hand = source.last_landmarks.copy()
+    x0, y0, side = roi = hand_roi(hand, 640, 480)
+    xs, ys = hand[:, 0] * 640, hand[:, 1] * 480
+    assert 0 <= x0 <= xs.min() and xs.max() <= x0 + side <= 640
+    assert 0 <= y0 <= ys.min() and ys.max() <= y0 + side <= 480
+    # landmarks como o modelo daria no recorte (normalizados nele) voltam aos do frame
+    in_crop = hand.copy()
+    in_crop[:, 0] = (xs - x0) / side
+    in_crop[:, 1] = (ys - y0) / side
+    in_crop[:, 2] = hand[:, 2] * 640 / side
+    assert np.allclose(roi_to_frame(in_crop, roi, 640, 480), hand, atol=1e-5)
+    # mão no canto: o recorte é deslocado para caber; mão enorme: sem recorte
+    corner = hand.copy()
+    corner[:, :2] -= hand[:, :2].min(axis=0)
+    x0, y0, side = hand_roi(corner, 640, 480)
+    assert x0 == 0 and y0 == 0
+    assert hand_roi(hand * [4.0, 4.0, 1.0], 640, 480) is None
+
+
+def test_predictor_extrapolates_and_scheduler_spaces_inference():
+    vel = np.zeros((21, 3), dtype=np.float32)
+    vel[:, 0], vel[:, 1] = 0.5, -0.2
+    start = np.full((21, 3), 0.4, dtype=np.float32)
+    predictor = LandmarkPredictor(hands=2, max_predict=0.25)
+    assert predictor.predict(0.0) is None
+    predictor.update(0.0, start)
+    predictor.update(0.1, start + vel * 0.1)
+    assert np.allclose(predictor.predict(0.15), start + vel * 0.15, atol=1e-6)
+    assert np.allclose(predictor.predict(5.0), start + vel * 0.35, atol=1e-6)   # parada em max_predict
+    assert np.allclose(predictor.predict_all(0.15)[1], 0.0)                    # slot vazio não anda
+    predictor.reset(0)
+    assert predictor.predict(0.2) is None
+
+    def submitted(scheduler, cost, frames=60):
+        n = 0
+        for k in range(frames):
+            if scheduler.due(k / 30, cost):
+                scheduler.submitted()
+                n += 1
+        return n
+
+    assert submitted(InferenceScheduler(every=1), cost=1.0) == 60      # passo a passo: todo frame
+    scheduler = InferenceScheduler()
+    assert submitted(scheduler, cost=0.04) == 20 and scheduler.every == 3   # 40 ms em frames de 33 ms
+    scheduler = InferenceScheduler()
+    submitted(scheduler, cost=1.0)
+    assert scheduler.every == scheduler.max_every
+
+
+def test_tracker_keeps_identity_when_hands_cross():
+    # duas mãos se cruzando quase na mesma altura, em ordem trocada a cada resultado:
+    # sem a previsão (última posição parada) os slots trocariam no cruzamento
+    def hand_at(x, y):
+        lm = np.zeros((21, 3), dtype=np.float32)
+        lm[:, :2] = POINTING_HAND * 0.15 + (x, y)
+        return lm
+
+    def track(max_predict):
+        tracker = HandTracker(4)
+        tracker.predictor.max_predict = max_predict
+        rng = np.random.default_rng(4)
+        slots = []
+        for k in range(40):
+            t = k / 30
+            hands = np.stack([hand_at(0.2 + 0.6 * t, 0.5), hand_at(0.81 - 0.6 * t, 0.51)])
+            order = rng.permutation(2)
+            tracker.observe(t, hands[order])
+            slots.append([next(s for s in range(4) if np.array_equal(tracker.predictor.pos[s], h))
+                          for h in hands])
+        return tracker, slots
+
+    tracker, slots = track(0.25)
+    assert all(s == slots[0] for s in slots) and tracker.pointing[slots[0]].all()
+    _, slots = track(0.0)
+    assert any(s != slots[0] for s in slots)
+    # mão sumida por mais de LOST_GRACE libera o slot para uma mão nova
+    last = np.stack([hand_at(0.2 + 0.6 * 39 / 30, 0.5)])
+    tracker.observe(1.4, last)
+    assert tracker.active.sum() == 2 and tracker.visible.sum() == 1
+    tracker.observe(1.8, last)
+    assert tracker.active.sum() == 1
+    tracker.observe(1.9, np.stack([hand_at(0.5, 0.8)]))
+    assert tracker.active.sum() == 2 and tracker.pointing.sum() == 0   # gesto recomeça
+
+
+def test_layer_cache_rebuilds_only_on_new_state_or_size():
+    built = []
+
+    def build(w, h, state, variant=None):
+        built.append((w, h, state, variant))
+        layer = StaticLayer(w, h)
+        layer.rectangle((10, 10), (w - 10, h - 10), (0, 120, 0), 3)
+        layer.text(state, (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+        if state == "menu":
+            layer.button("start", "START", (w // 2, h // 2))
+        return layer
+
+    cache = LayerCache(build)
+    menu = cache.get(320, 240, "menu")
+    assert cache.get(320, 240, "menu") is menu and len(built) == 1
+    cache.get(320, 240, "playing", 0)
+    cache.get(320, 240, "playing", 1)
+    assert cache.get(320, 240, "menu") is menu and len(built) == 3
+    assert cache.get(640, 480, "menu") is not menu and len(built) == 4
+    # a mistura só toca os pixels desenhados: opacos viram o overlay, os outros ficam
+    frame = np.random.default_rng(5).integers(0, 256, (240, 320, 3), dtype=np.uint8)
+    before = frame.copy()
+    menu.blend(frame)
+    opaque, untouched = menu.mask == 255, menu.mask == 0
+    assert np.array_equal(frame[opaque], menu.overlay[opaque])
+    assert np.array_equal(frame[untouched], before[untouched])
+    assert np.array_equal(menu.blend(np.zeros_like(frame)), menu.overlay)
+    assert menu.rects["start"] == (80, 90, 240, 150)
+
+
+def test_ball_sprites_blit_and_clip_at_the_border():
+    sprites = BallSprites()
+    values, keep = sprites.get((0, 0, 255), 10)
+    assert sprites.get((0, 0, 255), 10)[0] is values
+    coverage = (255.0 - keep[:, :, 0]).sum() / 255.0
+    assert abs(coverage - math.pi * 10.5 ** 2) < 0.02 * math.pi * 10.5 ** 2
+    # bola inteira no frame: a fatia em volta do centro é o sprite sobre o fundo
+    frame = np.zeros((60, 80, 3), dtype=np.uint8)
+    sprites.draw(frame, [40.3], [30.0], [(0, 0, 255)], 10)
+    c = len(values) // 2
+    assert np.array_equal(frame[30 - c:30 + c + 1, 40 - c:40 + c + 1], values)
+    assert frame.sum() == values.astype(np.int64).sum()
+    # bolas saindo pelas bordas são cortadas como num frame maior recortado
+    xs, ys = np.array([2.0, 78.0, 40.0, 200.0]), np.array([3.0, 58.0, -5.0, 30.0])
+    colors = [(0, 0, 255), (255, 255, 255), (0, 200, 0), (0, 0, 0)]
+    small = np.full((60, 80, 3), 90, dtype=np.uint8)
+    big = np.full((100, 120, 3), 90, dtype=np.uint8)
+    sprites.draw(small, xs, ys, colors, 10)
+    sprites.draw(big, xs + 20, ys + 20, colors, 10)
+    assert np.array_equal(small, big[20:80, 20:100])
+    # bola morta não é desenhada
+    frame = np.zeros((60, 80, 3), dtype=np.uint8)
+    sprites.draw(frame, [40.0], [30.0], [(0, 0, 255)], 10, alive=[False])
+    assert not frame.any()
+
+
+def test_benchmark_compare_flags_regressions():
+    base = {"results": [{"key": case_key("a", {"balls": 16}), "us": 10.0},
+                        {"key": case_key("b", {}), "us": 10.0},
+                        {"key": "antigo", "us": 1.0}]}
+    current = {"results": [{"key": "a balls=16", "us": 12.0},
+                           {"key": "b", "us": 13.0},
+                           {"key": "novo", "us": 1.0}]}
+    rows = compare(base, current, tolerance=0.25)
+    assert [(key, ratio, slower) for key, _, _, ratio, slower in rows] == [
+        ("a balls=16", 1.2, False), ("b", 1.3, True)]
+    doc = run_suite(only=["physics.move balls=16"], repeat=1)
+    assert [r["key"] for r in doc["results"]] == ["physics.move balls=16"]
+    assert doc["results"][0]["us"] > 0 and json.loads(json.dumps(doc)) == doc
+    assert compare(doc, doc) == [("physics.move balls=16", doc["results"][0]["us"],
+                                  doc["results"][0]["us"], 1.0, False)]
+
+
+def test_shot_preview_follows_the_table_until_the_first_contact():
+    table = BallTable(radius=BALL_RADIUS)
+    table.add_ball(150, 240, (255, 255, 255), is_white=True)
+    table.add_ball(400, 250, (0, 0, 255))
+    table.add_ball(300, 380, (0, 255, 0))
+    bounds = (LEFT, TOP, RIGHT, BOTTOM)
+    path = simulate_shot(table, bounds, POCKETS, 12.0, 0.0)
+    assert path.target == 1 and path.target_path and not path.cue_pocketed
+
+    # a mesma tacada na mesa de verdade: mesmos pontos da branca até a bola acertada andar
+    ref = BallTable(radius=BALL_RADIUS)
+    for i in range(len(table)):
+        ref.add_ball(table.x[i], table.y[i], tuple(table.color[i]), is_white=bool(table.is_white[i]))
+    ref.vx[0] = 12.0
+    for x, y in path.cue[1:]:
+        ref.step(*bounds, POCKETS)
+        if ref.vx[1] != 0.0 or ref.vy[1] != 0.0:
+            break
+        assert math.isclose(ref.x[0], x, abs_tol=1e-6) and math.isclose(ref.y[0], y, abs_tol=1e-6)
+    assert ref.vx[2] == ref.vy[2] == 0.0
+    assert math.isclose(ref.x[0], path.contact[0], abs_tol=1.0)
+
+    # a prévia só simula de novo quando a mira (além do passo) ou a mesa muda
+    preview = ShotPreview()
+    first = preview.update(table, bounds, POCKETS, 12.0, 0.0)
+    turn = 12.0 * math.tan(AIM_STEP / 4)
+    assert preview.update(table, bounds, POCKETS, 12.0, turn) is first
+    aimed = preview.update(table, bounds, POCKETS, 12.0, 3.0)
+    assert aimed is not first
+    table.y[2] += 1.0
+    assert preview.update(table, bounds, POCKETS, 12.0, 3.0) is not aimed
+
+
+if __name__ == "__main__":
+    test_parity_with_buttons_version()
+    test_parity_billiards_version()
+    test_broadphase_matches_brute_force()
+    test_ccd_prevents_tunneling()
+    test_resting_balls_sleep_and_wake_on_contact()
+    test_batch_matches_table_with_isolated_contacts()
+    test_exact_batch_matches_table()
+    test_batch_game_ends_like_the_game()
+    test_clock_is_independent_of_frame_rate()
+    test_rewind_replays_the_same_ticks()
+    test_gestures_batch_matches_single_hands()
+    test_push_on_the_ball_center_uses_the_fallback()
+    test_landmark_log_without_records()
+    test_filter_banks_match_filters()
+    test_filters_follow_a_constant_velocity_ramp()
+    test_net_delta_snapshots_on_localhost()
+    test_shot_search_poll_keeps_its_budget()
+    test_pipeline_drops_oldest_behind_a_slow_stage()
+    test_drop_oldest_merges_into_the_next_item()
+    test_image_folder_replays_the_synthetic_source()
+    test_roi_crop_maps_back_to_the_frame()
+    test_predictor_extrapolates_and_scheduler_spaces_inference()
+    test_tracker_keeps_identity_when_hands_cross()
+    test_layer_cache_rebuilds_only_on_new_state_or_size()
+    test_ball_sprites_blit_and_clip_at_the_border()
+    test_benchmark_compare_flags_regressions()
+    test_shot_preview_follows_the_table_until_the_first_contact()
+    print("Física, entrada, mãos, desenho, rede e pipeline: todos os testes passaram.")